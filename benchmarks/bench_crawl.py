@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ==============================================================================
+# File:         bench_crawl.py
+# Author:       Cashiuus
+# Created:      17-Oct-2026     -     Revised:
+#
+# Depends:      pyftpdlib (requirements-dev.txt)
+# Compat:       3.7+
+#
+#-[ Usage ]---------------------------------------------------------------------
+#
+#   End-to-end crawler benchmark. Starts bench_server.py over a synthetic tree in
+#   its own process, then crawls it with crawl_ftpserver_with_report() (or the
+#   --async crawler) exactly as ftp_crawler.py would. It reports throughput and
+#   peak memory per run:
+#
+#       python3 benchmarks/bench_crawl.py --shape wide --fanout 2000
+#       python3 benchmarks/bench_crawl.py --shape deep --depth 500 --latency 10 --workers 4
+#       python3 benchmarks/bench_crawl.py --shape bulk --fanout 10 --depth 2 --files 10000 --repeat 3
+#       python3 benchmarks/bench_crawl.py --shape profiles --users 200 --async --workers 8
+#
+#   Every run is a fresh process, so its peak RSS is its own. Results are appended
+#   to a JSON lines file (--results) with the crawler version and git revision.
+#   Each summary is compared against the last earlier result with the same settings,
+#   so a change can be benchmarked before and after.
+#
+#   NOTE: The server is pure Python too, so at zero latency on big trees it can be
+#   the bottleneck; compare versions against each other rather than reading the
+#   numbers as what a real server would do.
+#
+# ==============================================================================
+import argparse
+import asyncio
+import contextlib
+import json
+import multiprocessing
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+from time import perf_counter, strftime
+
+try:
+    import resource
+except ImportError:
+    # Windows, no peak RSS there
+    resource = None
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_DIR))
+from bench_server import SHAPES, SyntheticTree, serve
+
+
+# Settings two results have to share to be comparable
+CONFIG_KEYS = ('shape', 'fanout', 'depth', 'files', 'users', 'file_size', 'latency', 'workers', 'download_workers',
+               'use_async', 'all_files', 'rate')
+
+
+def peak_rss():
+    """ Peak resident memory of this process in bytes, None where it can't be had. """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # KB on Linux, bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def run_crawl(config, port, results):
+    """ One crawl of the bench server, run in its own process and putting its measurements to 'results'. """
+    # Imported here, so the cost of importing the crawler isn't part of the baseline RSS
+    import ftp_crawler
+    from ftp_checkpoint import CrawlCheckpoint
+    from ftp_index import CrawlIndex
+    from ftp_metrics import CrawlMetrics
+    from ftp_store import DownloadStore
+    from ftp_throttle import AdaptiveThrottle
+
+    output_dir = Path(tempfile.mkdtemp(prefix='ftp_bench_'))
+    baseline = peak_rss()
+    if config['tracemalloc']:
+        tracemalloc.start()
+    metrics = CrawlMetrics('127.0.0.1')
+    index = CrawlIndex(output_dir / "FTP_crawl_index.db")
+    indexed = index.begin('127.0.0.1')
+    listing = ftp_crawler.ListingWriter(ftp_crawler.listing_file_path(output_dir, '127.0.0.1'), index=indexed)
+    store = DownloadStore(output_dir)
+    throttle = AdaptiveThrottle(config['rate']) if config['rate'] else None
+    # The crawler's progress output would only measure the terminal
+    out = sys.stdout if config['verbose'] else open(os.devnull, 'w')
+    started = perf_counter()
+    try:
+        with contextlib.redirect_stdout(out):
+            if config['use_async']:
+                async def crawl():
+                    return await ftp_crawler.crawl_ftpserver_async(
+                        '127.0.0.1', 'anonymous', 'anonymous', output_dir, asyncio.Semaphore(100),
+                        all_files=config['all_files'], port=port, per_host=config['workers'],
+                        download_workers=config['download_workers'], listing=listing, throttle=throttle,
+                        store=store, metrics=metrics)
+                stats = asyncio.run(crawl())
+            else:
+                checkpoint = CrawlCheckpoint(output_dir / "FTP_crawl_state_bench.db")
+                stats = ftp_crawler.crawl_ftpserver_with_report(
+                    '127.0.0.1', 'anonymous', 'anonymous', output_dir, all_files=config['all_files'],
+                    workers=config['workers'], port=port, download_workers=config['download_workers'],
+                    checkpoint=checkpoint, listing=listing, throttle=throttle, store=store, metrics=metrics)
+            listing.close()
+            indexed.close()
+            index.close()
+            store.close()
+    finally:
+        elapsed = perf_counter() - started
+        shutil.rmtree(output_dir, ignore_errors=True)
+    snapshot = metrics.snapshot()
+    results.put({
+        'seconds': round(elapsed, 3),
+        'dirs': stats['dirs'],
+        'files': stats['files'],
+        'matches': stats['matches'],
+        'dirs_per_sec': round(stats['dirs'] / elapsed, 1),
+        'files_per_sec': round(stats['files'] / elapsed, 1),
+        'downloads': snapshot['downloads'],
+        'bytes': snapshot['bytes'],
+        'list_p50': snapshot['list_latency']['p50'],
+        'list_p95': snapshot['list_latency']['p95'],
+        'errors': snapshot['errors'],
+        'peak_rss': peak_rss(),
+        'baseline_rss': baseline,
+        'peak_traced': tracemalloc.get_traced_memory()[1] if config['tracemalloc'] else None,
+    })
+
+
+def start_server(ctx, config):
+    """ Start bench_server in its own process, returning (process, port). """
+    tree_args = dict(shape=config['shape'], fanout=config['fanout'], depth=config['depth'], files=config['files'],
+                     users=config['users'], file_size=config['file_size'])
+    ready = ctx.Queue()
+    server = ctx.Process(target=serve, args=(tree_args,), daemon=True,
+                         kwargs={'latency': config['latency'] / 1000, 'ready': ready, 'quiet': True})
+    server.start()
+    return server, ready.get(timeout=30)
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=str(REPO_DIR), capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def mb(nbytes):
+    return "{:.1f}".format(nbytes / 1048576) if nbytes is not None else "-"
+
+
+def previous_result(results_file, config):
+    """ The last result in 'results_file' run with the same settings as 'config', or None. """
+    if not results_file.is_file():
+        return None
+    previous = None
+    with open(results_file) as fh:
+        for line in fh:
+            try:
+                result = json.loads(line)
+            except ValueError:
+                continue
+            if all(result['config'].get(k) == config[k] for k in CONFIG_KEYS):
+                previous = result
+    return previous
+
+
+def compare(result, previous):
+    """ Print the change in median throughput and memory against an earlier result. """
+    print("[*] Compared with {} at revision {}, {}:".format(previous.get('label') or 'the previous run',
+                                                            previous.get('revision'), previous.get('time')))
+    for key in ('dirs_per_sec', 'files_per_sec', 'peak_rss'):
+        old, new = previous['median'].get(key), result['median'].get(key)
+        if old and new is not None:
+            print("      {:<14} {:>12} -> {:<12} {:+.1f}%".format(key, old, new, (new - old) * 100.0 / old))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the crawler end to end against a local synthetic FTP server")
+    parser.add_argument("--shape", choices=SHAPES, default='wide', help="Tree shape, see bench_server.py (default: wide)")
+    parser.add_argument("--fanout", type=int, default=1000, help="Subdirs per dir (default: 1000)")
+    parser.add_argument("--depth", type=int, default=3, help="Levels of dirs for deep/bulk (default: 3)")
+    parser.add_argument("--files", type=int, default=20, help="Files per dir (default: 20)")
+    parser.add_argument("--users", type=int, default=20, help="User profiles for 'profiles' (default: 20)")
+    parser.add_argument("--file-size", dest='file_size', type=int, default=1024, help="Bytes per file (default: 1024)")
+    parser.add_argument("--latency", type=float, default=0, metavar='MS',
+                        help="Delay before every server reply in ms (default: 0)")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="Crawl sessions (default: 1)")
+    parser.add_argument("--download-workers", dest='download_workers', type=int, default=2,
+                        help="Download sessions (default: 2)")
+    parser.add_argument("--async", dest='use_async', action='store_true', help="Benchmark the asyncio crawler")
+    parser.add_argument("-a", "--all-files", dest='all_files', action='store_true', help="List all files")
+    parser.add_argument("--rate", type=float, default=0, help="Requests/sec to throttle to (default: 0, unthrottled)")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs to take the median of (default: 1)")
+    parser.add_argument("--tracemalloc", action='store_true',
+                        help="Also report peak Python allocations (slows the crawl down noticeably)")
+    parser.add_argument("--results", type=Path, default=REPO_DIR / "benchmarks" / "bench_results.jsonl",
+                        help="JSON lines file results are appended to and compared against")
+    parser.add_argument("--label", help="Name for this result, e.g. the branch being benchmarked")
+    parser.add_argument("-v", "--verbose", action='store_true', help="Show the crawler's own output")
+    config = vars(parser.parse_args())
+    results_file = config.pop('results')
+    label = config.pop('label')
+
+    dirs, files = SyntheticTree(**{k: config[k] for k in ('shape', 'fanout', 'depth', 'files', 'users',
+                                                           'file_size')}).count()
+    print("[*] '{}' tree: {} dirs, {} files (before any pruning), {}ms latency".format(
+        config['shape'], dirs, files, config['latency']))
+    # Spawned, so neither the server nor the runs inherit anything from this process
+    ctx = multiprocessing.get_context('spawn')
+    server, port = start_server(ctx, config)
+    runs = []
+    try:
+        print("{:>4} {:>9} {:>7} {:>9} {:>9} {:>10} {:>8} {:>9} {:>9} {:>9}".format(
+            'run', 'seconds', 'dirs', 'files', 'dirs/s', 'files/s', 'matches', 'DL MB', 'RSS MB', 'traced MB'))
+        for i in range(config['repeat']):
+            queue = ctx.Queue()
+            proc = ctx.Process(target=run_crawl, args=(config, port, queue))
+            proc.start()
+            run = queue.get()
+            proc.join()
+            runs.append(run)
+            print("{:>4} {:>9.2f} {:>7} {:>9} {:>9} {:>10} {:>8} {:>9} {:>9} {:>9}".format(
+                i + 1, run['seconds'], run['dirs'], run['files'], run['dirs_per_sec'], run['files_per_sec'],
+                run['matches'], mb(run['bytes']), mb(run['peak_rss']), mb(run['peak_traced'])))
+            if run['errors']:
+                print("      errors: {}".format(run['errors']))
+    finally:
+        server.terminate()
+        server.join()
+
+    median = {key: statistics.median(r[key] for r in runs)
+              for key in ('seconds', 'dirs_per_sec', 'files_per_sec', 'peak_rss', 'peak_traced')
+              if all(r[key] is not None for r in runs)}
+    import ftp_crawler
+    result = {'time': strftime('%Y-%m-%dT%H:%M:%S'), 'label': label, 'version': ftp_crawler.__version__,
+              'revision': git_revision(), 'python': sys.version.split()[0], 'config': config,
+              'median': median, 'runs': runs}
+    previous = previous_result(results_file, config)
+    with open(results_file, 'a') as fh:
+        fh.write(json.dumps(result) + "\n")
+    print("[*] Median of {} run(s): {:.2f}s, {} dirs/s, {} files/s, peak RSS {} MB".format(
+        len(runs), median['seconds'], median['dirs_per_sec'], median['files_per_sec'], mb(median.get('peak_rss'))))
+    if previous is not None:
+        compare(result, previous)
+    print("[*] Result appended to: {}".format(results_file))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ==============================================================================
+# File:         bench_match.py
+# Author:       Cashiuus
+# Created:      17-Oct-2026     -     Revised:
+#
+# Depends:      n/a
+# Compat:       3.7+
+#
+#-[ Usage ]---------------------------------------------------------------------
+#
+#   Micro-benchmark of file name matching, reporting the cost per million names
+#   for the compiled FileMatcher against the old per-file Path.suffixes approach.
+#
+#       python3 benchmarks/bench_match.py -n 1000000
+#
+# ==============================================================================
+import argparse
+import random
+import sys
+from pathlib import Path
+from time import perf_counter
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from config import *
+from ftp_match import FileMatcher
+
+
+NAMES = ('report', 'IMG_2041', 'thumbcache_256', 'desktop', 'backup.2022', 'notes', 'data', 'setup', 'ntuser')
+EXTENSIONS = ('.txt', '.jpg', '.db', '.ini', '.zip', '.tar.gz', '.dll', '.xlsx', '.dat', '', '.log', '.conf')
+
+
+def legacy_match_files(dirname, files):
+    """ The matching loop as it was before FileMatcher, kept here only as a baseline. """
+    matches = []
+    downloads = []
+    for f in files:
+        full_filename = Path(dirname, f)
+        suf = full_filename.suffixes
+        if len(suf) > 1:
+            real_suffix = '.'.join([x.lower() for x in suf])
+        elif len(suf) == 1:
+            real_suffix = full_filename.suffix.lower()
+        else:
+            real_suffix = ''
+        if real_suffix in INTERESTING_EXTENSIONS:
+            if f not in EXCLUDE_FILES and 'thumbcache_' not in f:
+                matches.append(full_filename)
+        if f in INTERESTING_FILENAMES:
+            if full_filename not in matches: matches.append(full_filename)
+            downloads.append(full_filename)
+    return matches, downloads
+
+
+def make_dirs(total, per_dir, seed=1):
+    """ Build (dirname, files) batches totalling 'total' synthetic file names. """
+    rnd = random.Random(seed)
+    batches = []
+    for i in range(0, total, per_dir):
+        dirname = "/Users/user{}/AppData/Local/Cache{}".format(i % 50, i)
+        files = ["{}_{}{}".format(rnd.choice(NAMES), j, rnd.choice(EXTENSIONS)) for j in range(min(per_dir, total - i))]
+        batches.append((dirname, files))
+    return batches
+
+
+def bench(label, fn, batches, total):
+    start = perf_counter()
+    found = 0
+    for (dirname, files) in batches:
+        found += len(fn(dirname, files)[0])
+    elapsed = perf_counter() - start
+    print("{:<14} {:>8.3f}s per million names  ({:.0f} ns/name, {} matches)".format(
+        label, elapsed * 1000000 / total, elapsed * 1e9 / total, found))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark file name matching")
+    parser.add_argument("-n", dest='total', type=int, default=1000000, help="Number of file names (default: 1000000)")
+    parser.add_argument("--per-dir", dest='per_dir', type=int, default=100, help="Files per directory (default: 100)")
+    args = parser.parse_args()
+
+    batches = make_dirs(args.total, args.per_dir)
+    matcher = FileMatcher(INTERESTING_EXTENSIONS, INTERESTING_FILENAMES, EXCLUDE_FILES, EXCLUDE_PATTERNS, APPDATA)
+    bench("legacy", legacy_match_files, batches, args.total)
+    bench("FileMatcher", matcher.match_dir, batches, args.total)
+
+
+if __name__ == '__main__':
+    main()
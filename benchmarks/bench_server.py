@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ==============================================================================
+# File:         bench_server.py
+# Author:       Cashiuus
+# Created:      17-Oct-2026     -     Revised:
+#
+# Depends:      pyftpdlib (requirements-dev.txt)
+# Compat:       3.7+
+#
+#-[ Usage ]---------------------------------------------------------------------
+#
+#   Local FTP server over a synthetic directory tree, for benchmarking the crawler
+#   (see bench_crawl.py) or just pointing it at something big. Nothing is written
+#   to disk: every listing is generated from its path on the fly, so a tree of
+#   millions of files costs no more to serve than a small one. An injected delay
+#   before every command reply simulates a far-away server.
+#
+#       python3 -m pip install -r requirements-dev.txt
+#       python3 benchmarks/bench_server.py --shape profiles --users 50 --latency 20 --port 2121
+#       ftp_crawler.py -t 127.0.0.1 --port 2121
+#
+#   Shapes:
+#       wide        - 'fanout' dirs under '/', each with 'files' files
+#       deep        - a single chain of dirs 'depth' levels deep, 'files' files in each
+#       bulk        - 'fanout' dirs per level, 'depth' levels, 'files' small files in every dir
+#                     (e.g. --fanout 10 --depth 2 --files 10000 is 111 dirs and 1.1M files)
+#       profiles    - /Users/<user>/... Windows profiles: Desktop, Documents, AppData with its
+#                     Temp, INetCache, Protect, Recent, PSReadLine... with 'files' in the big dirs
+#
+#   Every tree has some files matching config.py patterns, so matching and the
+#   download pipeline get exercised too.
+#
+# ==============================================================================
+import argparse
+import errno
+import functools
+import logging
+import os
+import stat
+import time
+import zlib
+
+from pyftpdlib.authorizers import DummyAuthorizer
+from pyftpdlib.filesystems import AbstractedFS
+from pyftpdlib.handlers import FTPHandler
+from pyftpdlib.log import config_logging
+from pyftpdlib.servers import ThreadedFTPServer
+
+
+SHAPES = ('wide', 'deep', 'bulk', 'profiles')
+# File names cycle through these, about 1 in 6 is listed for its extension
+EXTENSIONS = ('.txt', '.jpg', '.dll', '.conf', '.log', '.png', '.htm', '.sql', '.xml', '.dat', '.js', '.csv')
+# Every this many dirs also holds a file that gets downloaded
+DOWNLOAD_EVERY = 50
+# mtimes are spread over ~4 months before this
+BASE_MTIME = 1700000000
+
+# Relative dir in a profile -> (subdirs, files); "{n}" names repeat 'files' times
+PROFILE_TEMPLATE = {
+    '': (['Desktop', 'Documents', 'Downloads', 'AppData'], ['NTUSER.DAT', 'ntuser.dat.LOG1', 'desktop.ini']),
+    'Desktop': ([], ['shortcut{n}.lnk', 'passwords.xlsx', 'desktop.ini']),
+    'Documents': (['Projects'], ['report{n}.docx', 'budget.xlsx']),
+    'Documents/Projects': ([], ['main{n}.py', 'config.php', 'deploy.sh']),
+    'Downloads': ([], ['setup{n}.exe', 'backup.zip']),
+    'AppData': (['Local', 'Roaming', 'LocalLow'], []),
+    'AppData/Local': (['Temp', 'Microsoft', 'Packages'], ['IconCache.db']),
+    'AppData/Local/Temp': ([], ['tmp{n}.tmp']),
+    'AppData/Local/Microsoft': (['Windows'], []),
+    'AppData/Local/Microsoft/Windows': (['INetCache', 'Explorer'], []),
+    # Excluded by EXCLUDE_DIRS, so never LISTed; holds 'fanout' IE* cache dirs of 'files' files each
+    'AppData/Local/Microsoft/Windows/INetCache': ([], []),
+    'AppData/Local/Microsoft/Windows/Explorer': ([], ['thumbcache_{n}.db', 'iconcache_16.db']),
+    'AppData/Local/Packages': ([], ['settings{n}.dat']),
+    'AppData/Roaming': (['Microsoft', 'Mozilla'], []),
+    'AppData/Roaming/Microsoft': (['Protect', 'Windows'], []),
+    'AppData/Roaming/Microsoft/Protect': ([], ['Preferred', 'CREDHIST']),
+    'AppData/Roaming/Microsoft/Windows': (['Recent', 'PowerShell'], []),
+    'AppData/Roaming/Microsoft/Windows/Recent': ([], ['doc{n}.lnk']),
+    'AppData/Roaming/Microsoft/Windows/PowerShell': (['PSReadLine'], []),
+    'AppData/Roaming/Microsoft/Windows/PowerShell/PSReadLine': ([], ['ConsoleHost_history.txt']),
+    'AppData/Roaming/Mozilla': ([], ['profiles.ini']),
+    'AppData/LocalLow': ([], []),
+}
+
+
+class SyntheticTree(object):
+    """ A directory tree of the given shape, every listing generated from its path.
+
+        shape               - One of SHAPES
+        fanout              - Subdirs per dir (wide, bulk) or cache dirs in INetCache (profiles)
+        depth               - Levels of dirs below '/' (deep, bulk)
+        files               - Files per dir, or in each of a profile's big dirs
+        users               - Number of user profiles (profiles)
+        file_size           - Rough size of every file in bytes, varied a little per file
+    """
+    def __init__(self, shape='wide', fanout=1000, depth=3, files=20, users=20, file_size=1024):
+        if shape not in SHAPES:
+            raise ValueError("Unknown tree shape: {}".format(shape))
+        self.shape = shape
+        self.fanout = fanout
+        self.depth = depth
+        self.files = files
+        self.users = users
+        self.file_size = file_size
+        # pyftpdlib stats every entry of a listing it sends, so listings are generated once, not per entry
+        self._cached = functools.lru_cache(maxsize=256)(self._listing)
+
+    def file_stats(self, path):
+        """ (size, mtime) of a file, stable for its path and spread out so no two files look the same. """
+        h = zlib.crc32(path.encode('utf-8', 'surrogateescape'))
+        return self.file_size + h % 1024, BASE_MTIME - h % 10000000
+
+    def _numbered(self, names):
+        listing = []
+        for name in names:
+            if '{n}' in name:
+                listing.extend(name.replace('{n}', str(i)) for i in range(self.files))
+            else:
+                listing.append(name)
+        return listing
+
+    def _levels(self):
+        return 1 if self.shape == 'wide' else self.depth
+
+    def _generated(self, path, level):
+        subdirs = ['d{:04d}'.format(i) for i in range(self.fanout if self.shape != 'deep' else 1)] \
+            if level < self._levels() else []
+        files = ['file{:06d}{}'.format(j, EXTENSIONS[j % len(EXTENSIONS)]) for j in range(self.files)]
+        if zlib.crc32(path.encode('utf-8', 'surrogateescape')) % DOWNLOAD_EVERY == 0:
+            files.append('web.config')
+        return subdirs, files
+
+    def _listing(self, path):
+        subdirs, files = self._listdir(path)
+        return tuple(subdirs), tuple(files), frozenset(files)
+
+    def listdir(self, path):
+        """ Return (subdirs, files) of a dir, raising FileNotFoundError if it isn't one. """
+        subdirs, files, _ = self._cached(path)
+        return subdirs, files
+
+    def _listdir(self, path):
+        parts = [p for p in path.split('/') if p]
+        if self.shape == 'profiles':
+            if not parts:
+                return ['Users'], []
+            if parts[0] != 'Users':
+                raise FileNotFoundError(errno.ENOENT, "No such directory", path)
+            if len(parts) == 1:
+                return ['user{:03d}'.format(i) for i in range(self.users)], []
+            rel = '/'.join(parts[2:])
+            if rel.startswith('AppData/Local/Microsoft/Windows/INetCache/IE'):
+                if len(parts) == 8:
+                    return [], ['cache{}.htm'.format(i) for i in range(self.files)]
+                raise FileNotFoundError(errno.ENOENT, "No such directory", path)
+            if rel == 'AppData/Local/Microsoft/Windows/INetCache':
+                return ['IE{}'.format(i) for i in range(self.fanout)], []
+            if rel not in PROFILE_TEMPLATE:
+                raise FileNotFoundError(errno.ENOENT, "No such directory", path)
+            subdirs, files = PROFILE_TEMPLATE[rel]
+            return self._numbered(subdirs), self._numbered(files)
+        # Generated shapes, check the path is one of ours: d0000/d0001/... no deeper than 'depth'
+        width = self.fanout if self.shape != 'deep' else 1
+        if len(parts) > self._levels() or not all(p.startswith('d') and p[1:].isdigit() and int(p[1:]) < width
+                                               for p in parts):
+            raise FileNotFoundError(errno.ENOENT, "No such directory", path)
+        return self._generated(path, len(parts))
+
+    def isdir(self, path):
+        try:
+            self._cached(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def isfile(self, path):
+        parent, name = os.path.split(path.rstrip('/'))
+        try:
+            return name in self._cached(parent)[2]
+        except FileNotFoundError:
+            return False
+
+    def count(self, path='/'):
+        """ Walk the whole tree, returning (dirs, files) as a crawler that doesn't prune anything would find. """
+        dirs = files = 0
+        pending = [path]
+        while pending:
+            dirname = pending.pop()
+            subdirs, names = self.listdir(dirname)
+            dirs += 1
+            files += len(names)
+            pending.extend(os.path.join(dirname, sub) for sub in subdirs)
+        return dirs, files
+
+
+class SyntheticFS(AbstractedFS):
+    """ Read-only pyftpdlib filesystem serving the handler's SyntheticTree instead of the disk. """
+    tree = None
+
+    def ftp2fs(self, ftppath):
+        return self.ftpnorm(ftppath)
+
+    def fs2ftp(self, fspath):
+        return fspath
+
+    def validpath(self, path):
+        return True
+
+    def chdir(self, path):
+        if not self.tree.isdir(path):
+            raise FileNotFoundError(errno.ENOENT, "No such directory", path)
+        self.cwd = path
+
+    def listdir(self, path):
+        subdirs, files = self.tree.listdir(path)
+        return list(subdirs + files)
+
+    def listdirinfo(self, path):
+        return self.listdir(path)
+
+    def stat(self, path):
+        if self.tree.isdir(path):
+            return os.stat_result((stat.S_IFDIR | 0o755, 0, 0, 2, 0, 0, 0, BASE_MTIME, BASE_MTIME, BASE_MTIME))
+        if not self.tree.isfile(path):
+            raise FileNotFoundError(errno.ENOENT, "No such file", path)
+        size, mtime = self.tree.file_stats(path)
+        return os.stat_result((stat.S_IFREG | 0o644, 0, 0, 1, 0, 0, size, mtime, mtime, mtime))
+
+    lstat = stat
+
+    def isdir(self, path):
+        return self.tree.isdir(path)
+
+    def isfile(self, path):
+        return self.tree.isfile(path)
+
+    def islink(self, path):
+        return False
+
+    def lexists(self, path):
+        return self.isdir(path) or self.isfile(path)
+
+    def getsize(self, path):
+        return self.stat(path).st_size
+
+    def getmtime(self, path):
+        return self.stat(path).st_mtime
+
+    def realpath(self, path):
+        return path
+
+    def open(self, filename, mode):
+        if 'w' in mode or 'a' in mode:
+            raise PermissionError(errno.EACCES, "Read-only filesystem", filename)
+        size = self.stat(filename).st_size
+        return SyntheticFile(filename, size)
+
+    def get_user_by_uid(self, uid):
+        return "owner"
+
+    def get_group_by_gid(self, gid):
+        return "group"
+
+
+class SyntheticFile(object):
+    """ Read-only file object of 'size' filler bytes, enough for pyftpdlib to RETR (with REST) from. """
+    closed = False
+
+    def __init__(self, name, size):
+        self.name = name
+        self.size = size
+        self._pos = 0
+        self._fill = (name.encode('utf-8', 'surrogateescape') + b'\n') * 64
+
+    def seek(self, offset, whence=0):
+        self._pos = offset if whence == 0 else (self._pos + offset if whence == 1 else self.size + offset)
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+    def read(self, n=-1):
+        end = self.size if n is None or n < 0 else min(self.size, self._pos + n)
+        data = bytearray()
+        while self._pos + len(data) < end:
+            offset = (self._pos + len(data)) % len(self._fill)
+            data.extend(self._fill[offset:offset + end - self._pos - len(data)])
+        self._pos = end
+        return bytes(data)
+
+    def close(self):
+        self.closed = True
+
+
+class LatencyHandler(FTPHandler):
+    """ FTPHandler that waits 'latency' seconds before acting on every command, like a far-away server would.
+
+        Each connection has its own thread under ThreadedFTPServer, so the delays don't add up across them.
+    """
+    latency = 0.0
+    # The files don't exist on disk, so sendfile() is out
+    use_sendfile = False
+
+    def pre_process_command(self, line, cmd, arg):
+        if self.latency:
+            time.sleep(self.latency)
+        FTPHandler.pre_process_command(self, line, cmd, arg)
+
+
+def make_server(tree, host='127.0.0.1', port=0, latency=0.0, max_cons=512):
+    """ Build (but don't start) an anonymous read-only FTP server over 'tree', see serve(). """
+    authorizer = DummyAuthorizer()
+    # The home dir is never read, SyntheticFS answers for everything, but it has to exist
+    authorizer.add_anonymous(os.path.dirname(os.path.abspath(__file__)))
+    handler = type('BenchHandler', (LatencyHandler,), {
+        'authorizer': authorizer,
+        'abstracted_fs': type('BenchFS', (SyntheticFS,), {'tree': tree}),
+        'latency': latency,
+        'banner': "bench_server ready",
+    })
+    server = ThreadedFTPServer((host, port), handler)
+    server.max_cons = max_cons
+    return server
+
+
+def serve(tree_args, latency=0.0, port=0, ready=None, quiet=False):
+    """ Serve a SyntheticTree(**tree_args) until killed, putting the port it listens on to the 'ready' queue.
+
+        quiet               - Only log warnings, not every connection and transfer
+    """
+    if quiet:
+        config_logging(level=logging.WARNING)
+    server = make_server(SyntheticTree(**tree_args), port=port, latency=latency)
+    if ready is not None:
+        ready.put(server.address[1])
+    server.serve_forever(handle_exit=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a synthetic directory tree over FTP for benchmarking")
+    parser.add_argument("--shape", choices=SHAPES, default='wide', help="Tree shape (default: wide)")
+    parser.add_argument("--fanout", type=int, default=1000, help="Subdirs per dir (default: 1000)")
+    parser.add_argument("--depth", type=int, default=3, help="Levels of dirs for deep/bulk (default: 3)")
+    parser.add_argument("--files", type=int, default=20, help="Files per dir (default: 20)")
+    parser.add_argument("--users", type=int, default=20, help="User profiles for 'profiles' (default: 20)")
+    parser.add_argument("--file-size", dest='file_size', type=int, default=1024, help="Bytes per file (default: 1024)")
+    parser.add_argument("--latency", type=float, default=0, metavar='MS',
+                        help="Delay before every command reply in ms (default: 0)")
+    parser.add_argument("--port", type=int, default=2121, help="Port to listen on (default: 2121)")
+    args = parser.parse_args()
+
+    tree_args = dict(shape=args.shape, fanout=args.fanout, depth=args.depth, files=args.files, users=args.users,
+                     file_size=args.file_size)
+    print("[*] Serving a '{}' tree on 127.0.0.1:{} with {}ms latency, Ctrl-C to stop".format(
+        args.shape, args.port, args.latency))
+    serve(tree_args, latency=args.latency / 1000, port=args.port)
+
+
+if __name__ == '__main__':
+    main()
@@ -32,19 +32,25 @@ EXCLUDE_FILES = ('IconCache.db',
 )
 
 
+# Dirs never LISTed or descended into (case-insensitive):
+#   '/abs/path' - that dir and everything below it
+#   'rel/path'  - that path anywhere in the tree, e.g. under any user profile
+#   '*/glob/*'  - glob against the full dir path, '*' also spans '/'; 'rel/*/glob' can start anywhere
 EXCLUDE_DIRS = (
     '/AppData/Local/Microsoft/local',
+    '*/AppData/Local/Microsoft/Windows/INetCache',      # IE/Edge web cache, thousands of cache folders
+    'AppData/Local/Mozilla/Firefox/Profiles/*/cache2',
 )
 
 
-## --
-# Here and below are not used at this time, possible future uses
+# Globs, never listed for their extension alone (case-insensitive)
 EXCLUDE_PATTERNS = (
     "iconcache_*",
     "thumbcache_*",
 )
 
 
+# Path fragments matched anywhere in a remote path; everything under a dir fragment gets listed
 APPDATA = (
     'AppData/Roaming/Microsoft/Protect',                # DPAPI master keys
     'AppData/Roaming/Microsoft/Windows/Recent',         # Recent files user has accessed
@@ -52,6 +58,26 @@ APPDATA = (
 )
 
 
+# Secret/credential detectors run over file contents with --scan, as (name, regex) pairs. Matched
+# case-insensitively unless wrapped in (?-i:...); keep each match well under 1 KB and don't use named groups
+SECRET_PATTERNS = (
+    ('private_key', r'-----BEGIN (?:RSA |DSA |EC |OPENSSH |ENCRYPTED |PGP )?PRIVATE KEY(?: BLOCK)?-----'),
+    ('aws_access_key', r'(?-i:\b(?:AKIA|ASIA)[0-9A-Z]{16}\b)'),
+    ('connection_string', r'(?:data source|server|host)\s*=[^;\r\n]{1,100};[^\r\n]{0,300}?(?:password|pwd)\s*=[^;"\'\r\n]{1,100}'),
+    ('url_credentials', r'\b[a-z][a-z0-9+.-]{1,20}://[^\s:/@"\']{1,64}:[^\s:/@"\']{1,64}@[^\s/"\']{1,255}'),
+    ('gpp_cpassword', r'cpassword="[^"]{4,}"'),                          # Group Policy Preferences XML
+    ('securestring', r'ConvertTo-SecureString[^\r\n]{1,200}?-AsPlainText'),   # PowerShell plaintext passwords
+    ('password', r'(?:password|passwd|pwd|secret|api_?key|access_?token|auth_?token)["\']?\s*[:=]\s*["\']?[^\s"\'<>;,]{4,100}'),
+)
+
+
+# Listed files whose first --scan-remote KB are fetched and scanned even though they aren't downloaded
+SCAN_EXTENSIONS = (
+    '.bat', '.cfg', '.cmd', '.conf', '.config', '.env', '.ini', '.json', '.php', '.properties',
+    '.ps1', '.psm1', '.py', '.sh', '.sql', '.txt', '.xml', '.yaml', '.yml',
+)
+
+
 # Are these interesting?
 #/AppData/Roaming/Code/User/globalStorage/state.vscdb
 #/AppData/Roaming/Code/User/globalStorage/state.vscdb.backup
@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ==============================================================================
+# File:         ftp_archive.py
+# Author:       Cashiuus
+# Created:      17-Oct-2026     -     Revised:
+#
+# Depends:      n/a
+# Compat:       3.7+
+#
+#-[ Usage ]---------------------------------------------------------------------
+#
+#   List the members of a remote archive without downloading all of it, so their
+#   names can be pattern matched like regular files ('backup.zip!/inetpub/web.config').
+#
+#   - zip family (.zip, .jar, .xlsx, ...): only the end of central directory record
+#     and the central directory itself are fetched, both from the end of the file.
+#   - tar (.tar, .tar.gz, .tgz, .tar.bz2, .tar.xz): the stream is parsed header by
+#     header as it arrives. Over an uncompressed tar, big members are skipped with a
+#     REST to the next header rather than being transferred; compressed ones have to
+#     be read through, up to 'max_bytes'.
+#
+#   The listers here only know about archive formats. They are driven by a transport
+#   that fetches whichever byte range they ask for next:
+#
+#       lister = archive_lister("backup.zip", size=remote_size, max_bytes=64 * 1024 * 1024)
+#       while True:
+#           next_range = lister.next_range()        # (offset, max bytes) or None when done
+#           if next_range is None:
+#               break
+#           ... RETR from REST offset, lister.write(chunk) per chunk until lister.stop or max bytes ...
+#           lister.end()
+#       lister.members                              # [ArchiveMember(name, size, mtime)]
+#
+# - https://pkware.cachefly.net/webdocs/casestudies/APPNOTE.TXT (zip)
+# - https://www.gnu.org/software/tar/manual/html_node/Standard.html (tar)
+#
+# ==============================================================================
+import bz2
+import calendar
+import logging
+import lzma
+import struct
+import zlib
+from collections import namedtuple
+
+
+logger = logging.getLogger(__name__)
+
+ArchiveMember = namedtuple('ArchiveMember', 'name size mtime')
+
+ZIP_EXTENSIONS = ('.zip', '.jar', '.war', '.ear', '.apk', '.docx', '.xlsx', '.xlsm', '.pptx', '.odt', '.ods')
+TAR_EXTENSIONS = {
+    '.tar': None,
+    '.tar.gz': 'gz', '.tgz': 'gz',
+    '.tar.bz2': 'bz2', '.tar.bzip': 'bz2', '.tbz2': 'bz2',
+    '.tar.xz': 'xz', '.txz': 'xz',
+}
+# Max members listed per archive, the rest are dropped with a warning
+MAX_MEMBERS = 100000
+
+
+class ArchiveError(Exception):
+    """ Raised when a remote file isn't the archive its name says it is, or is truncated/corrupt. """
+
+
+def is_archive(name):
+    """ Whether a file name has one of the archive extensions that can be listed. """
+    return name.lower().endswith(ZIP_EXTENSIONS + tuple(TAR_EXTENSIONS))
+
+
+def archive_lister(name, size=None, max_bytes=None):
+    """ Return a ZipLister or TarLister for a remote file by its name, or None if it isn't a supported archive.
+
+        size                - The remote file's size, needed to find a zip's central directory
+        max_bytes           - Never fetch more than this many bytes of the archive in total, None for no limit
+    """
+    lname = name.lower()
+    if lname.endswith(ZIP_EXTENSIONS):
+        # An empty or unsized zip has no central directory to go looking for
+        return ZipLister(size, max_bytes=max_bytes) if size else None
+    for ext, compression in TAR_EXTENSIONS.items():
+        if lname.endswith(ext):
+            return TarLister(compression, max_bytes=max_bytes)
+    return None
+
+
+class _Lister(object):
+    """ Bookkeeping shared by the listers: the byte budget and the member list. """
+    def __init__(self, max_bytes=None):
+        self.max_bytes = max_bytes
+        self.members = []
+        self.received = 0
+        self.truncated = False
+        self.done = False
+        # Set once the transfer in progress can be cut short
+        self.stop = False
+
+    def _add(self, name, size, mtime):
+        name = name.lstrip('/')
+        if name.startswith('./'):
+            name = name[2:]
+        if not name:
+            return
+        if len(self.members) >= MAX_MEMBERS:
+            self.truncated = True
+            self.done = self.stop = True
+            return
+        self.members.append(ArchiveMember(name, size, mtime))
+
+
+# ----------------------------------[ ZIP ]---------------------------------- #
+ZIP_EOCD = b'PK\x05\x06'
+ZIP64_LOCATOR = b'PK\x06\x07'
+ZIP64_EOCD = b'PK\x06\x06'
+ZIP_CENTRAL = b'PK\x01\x02'
+# End of central directory record plus the longest possible comment, and the zip64 records before it
+ZIP_TAIL = 22 + 65535 + 20 + 56
+
+
+def dos_time(dos_date, dos_time):
+    """ Convert a zip's MS-DOS date and time fields to a Unix timestamp (taken as UTC), or None if invalid. """
+    try:
+        return float(calendar.timegm((1980 + (dos_date >> 9), (dos_date >> 5) & 0xF, dos_date & 0x1F,
+                                      dos_time >> 11, (dos_time >> 5) & 0x3F, (dos_time & 0x1F) * 2, 0, 0, 0)))
+    except (ValueError, OverflowError):
+        return None
+
+
+class ZipLister(_Lister):
+    """ Lists a zip from its central directory, which is all kept at the end of the file. """
+    def __init__(self, size, max_bytes=None):
+        _Lister.__init__(self, max_bytes=max_bytes)
+        self.size = size
+        self._start = max(0, size - ZIP_TAIL)
+        self._length = size - self._start
+        self._data = bytearray()
+        self._tail = None
+
+    def _budget(self, wanted):
+        """ Cap a range length to what's left of 'max_bytes', flagging the listing as truncated if it had to. """
+        if self.max_bytes is None:
+            return wanted
+        left = self.max_bytes - self.received
+        if wanted > left:
+            self.truncated = True
+            return max(0, left)
+        return wanted
+
+    def next_range(self):
+        if self.done:
+            return None
+        length = self._budget(self._length)
+        if not length:
+            self.done = True
+            return None
+        return self._start, length
+
+    def write(self, chunk):
+        self.received += len(chunk)
+        self._data.extend(chunk)
+
+    def end(self):
+        data = bytes(self._data)
+        self._data = bytearray()
+        if self._tail is None:
+            self._tail = data
+            self._locate_directory()
+        else:
+            self._parse_directory(data)
+            self.done = True
+
+    def _locate_directory(self):
+        tail = self._tail
+        pos = tail.rfind(ZIP_EOCD)
+        if pos < 0 or len(tail) < pos + 22:
+            raise ArchiveError("No zip end of central directory record found")
+        (entries, cd_size, cd_offset) = struct.unpack('<10xH2I2x', tail[pos:pos + 22])
+        if 0xFFFFFFFF in (cd_size, cd_offset) or entries == 0xFFFF:
+            # Zip64, the real values are in a zip64 end of central directory record found via its locator
+            loc = pos - 20
+            if loc < 0 or tail[loc:loc + 4] != ZIP64_LOCATOR:
+                raise ArchiveError("Zip64 end of central directory locator missing")
+            (eocd64_offset,) = struct.unpack('<8xQ4x', tail[loc:loc + 20])
+            rel = eocd64_offset - self._start
+            if rel < 0 or tail[rel:rel + 4] != ZIP64_EOCD:
+                raise ArchiveError("Zip64 end of central directory record missing")
+            (cd_size, cd_offset) = struct.unpack('<40x2Q', tail[rel:rel + 56])
+        rel = cd_offset - self._start
+        if rel >= 0 and rel + cd_size <= len(tail):
+            # Small archive, the whole directory came along with the tail
+            self._parse_directory(tail[rel:rel + cd_size])
+            self.done = True
+        else:
+            self._start, self._length = cd_offset, cd_size
+
+    def _parse_directory(self, data):
+        pos = 0
+        while data[pos:pos + 4] == ZIP_CENTRAL and len(data) >= pos + 46 and not self.done:
+            (flags, mtime, mdate, usize, nlen, xlen, clen) = struct.unpack('<8xH2x2H8xI3H12x', data[pos:pos + 46])
+            end = pos + 46 + nlen + xlen + clen
+            if end > len(data):
+                break
+            raw_name = data[pos + 46:pos + 46 + nlen]
+            # Bit 11 flags a UTF-8 name, otherwise it's the original IBM PC code page
+            name = raw_name.decode('utf-8' if flags & 0x800 else 'cp437', 'replace')
+            if usize == 0xFFFFFFFF:
+                usize = self._zip64_size(data[pos + 46 + nlen:pos + 46 + nlen + xlen], usize)
+            if not name.endswith('/'):
+                self._add(name, usize, dos_time(mdate, mtime))
+            pos = end
+        if pos < len(data) and not self.done:
+            # Ran out of budget partway, or the directory is corrupt; either way keep what was listed
+            self.truncated = True
+
+    @staticmethod
+    def _zip64_size(extra, default):
+        pos = 0
+        while pos + 4 <= len(extra):
+            (tag, length) = struct.unpack('<2H', extra[pos:pos + 4])
+            if tag == 0x0001 and length >= 8:
+                return struct.unpack('<Q', extra[pos + 4:pos + 12])[0]
+            pos += 4 + length
+        return default
+
+
+# ----------------------------------[ TAR ]---------------------------------- #
+TAR_BLOCK = 512
+# Members bigger than this are skipped over with a REST rather than being read through
+TAR_SEEK_THRESHOLD = 1024 * 1024
+TAR_REGULAR_TYPES = (b'0', b'\0', b'7')
+
+
+def tar_number(field):
+    """ Parse a tar header numeric field, octal or (for big values) GNU base-256. """
+    if field and field[0] & 0x80:
+        return int.from_bytes(bytes([field[0] & 0x7F]) + field[1:], 'big')
+    field = field.rstrip(b'\0 ').strip()
+    return int(field, 8) if field else 0
+
+
+class TarLister(_Lister):
+    """ Incremental tar header parser, fed the (possibly compressed) stream as it arrives.
+
+        compression         - None, 'gz', 'bz2' or 'xz'
+    """
+    def __init__(self, compression=None, max_bytes=None):
+        _Lister.__init__(self, max_bytes=max_bytes)
+        self.compression = compression
+        if compression == 'gz':
+            # 16 + MAX_WBITS expects a gzip header
+            self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif compression == 'bz2':
+            self._decompressor = bz2.BZ2Decompressor()
+        elif compression == 'xz':
+            self._decompressor = lzma.LZMADecompressor()
+        else:
+            self._decompressor = None
+        self.pos = 0            # Offset in the uncompressed tar stream
+        self._offset = 0        # Offset in the remote file to fetch from next
+        self._header = bytearray()
+        self._skip = 0
+        self._capture = None
+        self._capture_size = 0
+        self._capture_type = None
+        self._long_name = None
+        self._started = False
+
+    def next_range(self):
+        if self.done:
+            return None
+        if self._started and not self.stop:
+            # The last transfer ran out, at the end of the file or of the budget, before the end of archive marker
+            self.truncated = self.max_bytes is not None and self.received >= self.max_bytes
+            self.done = True
+            return None
+        length = None if self.max_bytes is None else self.max_bytes - self.received
+        if length is not None and length <= 0:
+            self.truncated = self.done = True
+            return None
+        self._started = True
+        self.stop = False
+        return self._offset, length
+
+    def end(self):
+        if self.done:
+            self.stop = True
+
+    def write(self, chunk):
+        if self.stop:
+            return
+        self.received += len(chunk)
+        if self._decompressor is not None:
+            try:
+                chunk = self._decompressor.decompress(chunk)
+            except (zlib.error, OSError, EOFError, lzma.LZMAError) as e:
+                raise ArchiveError("Corrupt {} stream: {}".format(self.compression, e))
+        else:
+            self._offset += len(chunk)
+        self._consume(chunk)
+
+    def _consume(self, data):
+        i = 0
+        while i < len(data) and not self.stop:
+            if self._skip:
+                n = min(self._skip, len(data) - i)
+                if self._capture is not None:
+                    self._capture.extend(data[i:i + n])
+                self._skip -= n
+                self.pos += n
+                i += n
+                if not self._skip and self._capture is not None:
+                    self._captured(bytes(self._capture[:self._capture_size]))
+                    self._capture = None
+                continue
+            take = data[i:i + TAR_BLOCK - len(self._header)]
+            self._header.extend(take)
+            self.pos += len(take)
+            i += len(take)
+            if len(self._header) == TAR_BLOCK:
+                header = bytes(self._header)
+                self._header = bytearray()
+                self._parse_header(header)
+
+    def _parse_header(self, header):
+        if header == b'\0' * TAR_BLOCK:
+            # End of archive marker
+            self.done = self.stop = True
+            return
+        try:
+            size = tar_number(header[124:136])
+            mtime = tar_number(header[136:148])
+        except ValueError:
+            raise ArchiveError("Not a tar header at offset {}".format(self.pos - TAR_BLOCK))
+        typeflag = header[156:157]
+        padded = -(-size // TAR_BLOCK) * TAR_BLOCK
+        if typeflag in (b'L', b'x'):
+            # GNU long name, or a pax extended header that may carry a 'path' record, for the next member
+            self._capture = bytearray()
+            self._capture_size = size
+            self._capture_type = typeflag
+            self._skip = padded
+            return
+        name = header[0:100].split(b'\0', 1)[0]
+        if header[257:262] == b'ustar':
+            prefix = header[345:500].split(b'\0', 1)[0]
+            if prefix:
+                name = prefix + b'/' + name
+        name = self._long_name if self._long_name is not None else name.decode('utf-8', 'replace')
+        self._long_name = None
+        if typeflag in TAR_REGULAR_TYPES:
+            self._add(name, size, float(mtime))
+        if padded > TAR_SEEK_THRESHOLD and self._decompressor is None and not self.stop:
+            # Jump straight to the next header instead of reading through the member
+            self.pos += padded
+            self._offset = self.pos
+            self.stop = True
+        else:
+            self._skip = padded
+
+    def _captured(self, data):
+        if self._capture_type == b'L':
+            self._long_name = data.split(b'\0', 1)[0].decode('utf-8', 'replace')
+            return
+        # pax records are "<length> <key>=<value>\n"
+        for record in data.split(b'\n'):
+            key, _, value = record.partition(b' ')[2].partition(b'=')
+            if key == b'path':
+                self._long_name = value.decode('utf-8', 'replace')
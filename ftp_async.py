@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ==============================================================================
+# File:         ftp_async.py
+# Author:       Cashiuus
+# Created:      17-Oct-2026     -     Revised:
+#
+# Depends:      ftputil (only for its LIST line parsers)
+# Compat:       3.7+
+#
+#-[ Usage ]---------------------------------------------------------------------
+#
+#   Minimal non-blocking FTP client built on asyncio streams, just enough of the
+#   protocol (login, MLSD/LIST, RETR) for the async crawler in ftp_crawler.py.
+#   Each AsyncFTPClient is one control connection and runs one command at a time,
+#   so open several clients per host to get concurrent LIST/RETR operations.
+#
+# - RFC 959 (FTP), RFC 3659 (MLSD, SIZE, MDTM, REST STREAM)
+#
+# ==============================================================================
+import asyncio
+import calendar
+import logging
+import re
+import stat
+import time
+
+import ftputil.error
+import ftputil.stat
+
+
+logger = logging.getLogger(__name__)
+
+PASV_REGEX = re.compile(r'(\d+),(\d+),(\d+),(\d+),(\d+),(\d+)')
+
+
+def parse_mlsd_time(value):
+    """ Convert an MLSD 'modify' fact (YYYYMMDDHHMMSS[.sss], UTC) to a Unix timestamp, or None. """
+    if not value:
+        return None
+    try:
+        return float(calendar.timegm(time.strptime(value[:14], "%Y%m%d%H%M%S")))
+    except ValueError:
+        return None
+
+
+class AsyncFTPError(Exception):
+    """ Raised for any unexpected FTP reply; 'code' holds the 3-digit reply code as a string. """
+    def __init__(self, code, message):
+        # Server replies already start with their code, only our own messages need it added
+        Exception.__init__(self, message if message.startswith(code) else "{} {}".format(code, message))
+        self.code = code
+        self.message = message
+
+
+class AsyncFTPClient(object):
+    """ A single asyncio FTP control connection.
+
+        client = AsyncFTPClient(target, port=2121)
+        await client.connect()
+        await client.login("anonymous", "anonymous")
+        entries = await client.list_dir("/")
+        await client.quit()
+    """
+    def __init__(self, host, port=21, timeout=30, encoding='latin-1', connect_timeout=None):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        # Dead hosts should fail fast, so connecting can be given a shorter timeout than everything else
+        self.connect_timeout = connect_timeout or timeout
+        self.encoding = encoding
+        self.features = set()
+        self.use_list_a_option = True
+        self._reader = None
+        self._writer = None
+
+    async def connect(self):
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), self.connect_timeout)
+        code, text = await asyncio.wait_for(self._read_response(), self.connect_timeout)
+        if code != '220':
+            raise AsyncFTPError(code, text)
+        return text
+
+    async def login(self, username, password):
+        code, text = await self.command("USER {}".format(username), expect=('230', '331'))
+        if code == '331':
+            await self.command("PASS {}".format(password), expect=('230', '202'))
+        # Binary mode for all transfers, and learn whether the server can do MLSD
+        await self.command("TYPE I", expect=('200',))
+        try:
+            code, text = await self.command("FEAT", expect=('211',))
+            self.features = set(line.strip().split(' ')[0].upper() for line in text.splitlines()[1:-1])
+        except AsyncFTPError:
+            self.features = set()
+        logger.debug("Server features: %s", self.features)
+
+    async def quit(self):
+        if self._writer is None:
+            return
+        try:
+            await self.command("QUIT")
+        except (AsyncFTPError, OSError, asyncio.TimeoutError):
+            pass
+        finally:
+            self.close()
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    async def _read_line(self):
+        line = await asyncio.wait_for(self._reader.readline(), self.timeout)
+        if not line:
+            raise ConnectionResetError("FTP control connection closed by server")
+        return line.decode(self.encoding).rstrip('\r\n')
+
+    async def _read_response(self):
+        """ Read one (possibly multi-line) reply and return (code, text). """
+        line = await self._read_line()
+        lines = [line]
+        code = line[:3]
+        if line[3:4] == '-':
+            # Multi-line reply runs until a line starting with the same code followed by a space
+            while True:
+                line = await self._read_line()
+                lines.append(line)
+                if line[:3] == code and line[3:4] == ' ':
+                    break
+        return code, '\n'.join(lines)
+
+    async def command(self, cmd, expect=None):
+        """ Send a command and return its (code, text) reply, raising AsyncFTPError if not in 'expect'. """
+        self._writer.write((cmd + '\r\n').encode(self.encoding))
+        await self._writer.drain()
+        code, text = await self._read_response()
+        if expect is not None and code not in expect:
+            raise AsyncFTPError(code, text)
+        if code[0] in '45':
+            raise AsyncFTPError(code, text)
+        return code, text
+
+    async def _open_data_connection(self, cmd):
+        """ Open a passive data connection and issue 'cmd' over the control channel. """
+        code, text = await self.command("PASV", expect=('227',))
+        parts = PASV_REGEX.search(text)
+        if not parts:
+            raise AsyncFTPError(code, "Unparsable PASV reply: {}".format(text))
+        port = (int(parts.group(5)) << 8) + int(parts.group(6))
+        # Ignore the address in the PASV reply, NAT'ed servers often hand out an internal IP
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(self.host, port), self.timeout)
+        try:
+            await self.command(cmd, expect=('125', '150'))
+        except BaseException:
+            writer.close()
+            raise
+        return reader, writer
+
+    async def _transfer(self, cmd, callback, max_bytes=None, stop=None):
+        """ Run a data command, passing each received chunk to 'callback' until EOF or 'max_bytes' is reached,
+            or until the optional 'stop' callable returns True after a chunk.
+        """
+        reader, writer = await self._open_data_connection(cmd)
+        received = 0
+        aborted = False
+        try:
+            while True:
+                chunk = await asyncio.wait_for(reader.read(65536), self.timeout)
+                if not chunk:
+                    break
+                if max_bytes is not None and received + len(chunk) >= max_bytes:
+                    callback(chunk[:max_bytes - received])
+                    received = max_bytes
+                    aborted = True
+                    break
+                received += len(chunk)
+                callback(chunk)
+                if stop is not None and stop():
+                    aborted = True
+                    break
+        finally:
+            writer.close()
+        if aborted:
+            # The server answers twice: once for the transfer (426 if cut short, 226 if it had already
+            # finished sending) and once for the ABOR itself (225/226)
+            self._writer.write(b'ABOR\r\n')
+            await self._writer.drain()
+            await self._read_response()
+            await self._read_response()
+        else:
+            code, text = await self._read_response()
+            if code[0] != '2':
+                raise AsyncFTPError(code, text)
+        return received
+
+    async def _retrieve_lines(self, cmd):
+        data = bytearray()
+        await self._transfer(cmd, data.extend)
+        return data.decode(self.encoding).splitlines()
+
+    async def mlsd(self, path):
+        """ Return [(name, facts)] for 'path', where facts is a dict of lower-case MLSD fact names. """
+        entries = []
+        for line in await self._retrieve_lines("MLSD {}".format(path)):
+            facts_str, _, name = line.partition(' ')
+            facts = {}
+            for fact in facts_str.rstrip(';').split(';'):
+                key, _, value = fact.partition('=')
+                facts[key.lower()] = value
+            entries.append((name, facts))
+        return entries
+
+    async def list_dir(self, path):
+        """ Return [(name, is_dir, size, mtime)] for the entries of 'path', via MLSD if supported, else LIST. """
+        entries = []
+        # Servers advertise MLST in FEAT, and MLSD comes along with it (RFC 3659)
+        if 'MLST' in self.features or 'MLSD' in self.features:
+            for name, facts in await self.mlsd(path):
+                kind = facts.get('type', '').lower()
+                if kind in ('cdir', 'pdir') or name in ('.', '..'):
+                    continue
+                size = int(facts['size']) if facts.get('size', '').isdigit() else None
+                entries.append((name, kind == 'dir', size, parse_mlsd_time(facts.get('modify'))))
+            return entries
+        # Like ftputil, CWD into the dir first since many servers won't accept both "-a" and a path
+        await self.command("CWD {}".format(path), expect=('250',))
+        cmd = "LIST -a" if self.use_list_a_option else "LIST"
+        parsers = (ftputil.stat.UnixParser(), ftputil.stat.MSParser())
+        for line in await self._retrieve_lines(cmd):
+            for parser in parsers:
+                if parser.ignores_line(line):
+                    break
+                try:
+                    result = parser.parse_line(line)
+                except ftputil.error.ParserError:
+                    continue
+                if result._st_name not in ('.', '..'):
+                    entries.append((result._st_name, stat.S_ISDIR(result.st_mode), result.st_size, result.st_mtime))
+                break
+        return entries
+
+    async def retr(self, path, fileobj, rest=None, max_bytes=None, stop=None):
+        """ Download 'path' into 'fileobj', optionally starting at offset 'rest' and stopping after 'max_bytes'
+            or once 'stop()' returns True.
+        """
+        if rest:
+            await self.command("REST {}".format(rest), expect=('350',))
+        return await self._transfer("RETR {}".format(path), fileobj.write, max_bytes=max_bytes, stop=stop)
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ==============================================================================
+# File:         ftp_cache.py
+# Author:       Cashiuus
+# Created:      17-Oct-2026     -     Revised:
+#
+# Depends:      n/a
+# Compat:       3.7+
+#
+#-[ Usage ]---------------------------------------------------------------------
+#
+#   Persistent SQLite cache of directory listings keyed by host + path, so a daily
+#   re-crawl (--incremental) can skip LISTing dirs that haven't changed and report
+#   the files that were added, changed or removed since the last crawl.
+#
+#   A dir's mtime only changes when entries are added, removed or renamed in it,
+#   never when something deeper in the tree changes. So a dir is served from the
+#   cache only when its mtime (as seen in its parent's fresh listing) is unchanged
+#   AND it has no subdirs; dirs with subdirs are always LISTed to get current
+#   mtimes for their children. Leaf dirs make up most of a typical tree.
+#
+#   Caveat: a file rewritten in place doesn't touch its dir's mtime, so that change
+#   is only picked up once something else changes the dir.
+#
+# ==============================================================================
+import logging
+from collections import namedtuple
+
+from ftp_db import SQLiteDB
+
+
+logger = logging.getLogger(__name__)
+
+# One entry of a remote directory listing, as produced by list_remote_dir() in ftp_crawler.py
+RemoteEntry = namedtuple('RemoteEntry', 'name is_dir size mtime is_link')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS dirs (host TEXT, path TEXT, mtime REAL, PRIMARY KEY (host, path));
+CREATE TABLE IF NOT EXISTS entries (host TEXT, dir TEXT, name TEXT, is_dir INTEGER, size INTEGER, mtime REAL,
+                                    is_link INTEGER, PRIMARY KEY (host, dir, name));
+"""
+
+
+def join_remote(dirname, name):
+    return dirname.rstrip('/') + '/' + name
+
+
+class ListingCache(SQLiteDB):
+    """ Thread-safe listing cache for one host, shared by every crawl worker.
+
+        cache = ListingCache(output_dir / "FTP_listing_cache.db", "10.10.1.20:21")
+        entries = cache.reuse(dirname, mtime)       # None means it has to be LISTed
+        cache.update(dirname, mtime, entries)       # after LISTing it
+        cache.close()
+        cache.changes                               # [('+' | '~' | '-', remote path)]
+    """
+    def __init__(self, db_file, host, commit_interval=2.0):
+        SQLiteDB.__init__(self, db_file, SCHEMA, commit_interval)
+        self.host = host
+        self.changes = []
+        self.reused = 0
+        # Nothing to diff against on the first crawl of a host, every file would show up as new
+        self.first_crawl = self._conn.execute("SELECT 1 FROM dirs WHERE host = ? LIMIT 1", (host,)).fetchone() is None
+
+    def _entries(self, dirname):
+        rows = self._conn.execute("SELECT name, is_dir, size, mtime, is_link FROM entries WHERE host = ? AND dir = ?",
+                                  (self.host, dirname))
+        return [RemoteEntry(name, bool(is_dir), size, mtime, bool(is_link))
+                for (name, is_dir, size, mtime, is_link) in rows]
+
+    def reuse(self, dirname, mtime):
+        """ Return the cached entries of 'dirname' if they can stand in for a fresh LIST, else None. """
+        if mtime is None:
+            return None
+        with self._lock:
+            if self._conn is None:
+                return None
+            row = self._conn.execute("SELECT mtime FROM dirs WHERE host = ? AND path = ?",
+                                     (self.host, dirname)).fetchone()
+            if row is None or row[0] != mtime:
+                return None
+            entries = self._entries(dirname)
+            if any(e.is_dir for e in entries):
+                return None
+            self.reused += 1
+        return entries
+
+    def update(self, dirname, mtime, entries):
+        """ Replace the cached listing of 'dirname' with a fresh one, recording what changed. """
+        with self._lock:
+            if self._conn is None:
+                return
+            old = {e.name: e for e in self._entries(dirname)}
+            new = {e.name: e for e in entries}
+            if not self.first_crawl:
+                for e in entries:
+                    if e.is_dir:
+                        continue
+                    before = old.get(e.name)
+                    if before is None or before.is_dir:
+                        self.changes.append(('+', join_remote(dirname, e.name)))
+                    elif (before.size, before.mtime) != (e.size, e.mtime):
+                        self.changes.append(('~', join_remote(dirname, e.name)))
+            for e in old.values():
+                after = new.get(e.name)
+                if not e.is_dir and (after is None or after.is_dir) and not self.first_crawl:
+                    self.changes.append(('-', join_remote(dirname, e.name)))
+                elif e.is_dir and (after is None or not after.is_dir):
+                    self._remove_subtree(join_remote(dirname, e.name))
+            self._conn.execute("DELETE FROM entries WHERE host = ? AND dir = ?", (self.host, dirname))
+            self._conn.executemany(
+                "INSERT INTO entries (host, dir, name, is_dir, size, mtime, is_link) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(self.host, dirname, e.name, e.is_dir, e.size, e.mtime, e.is_link) for e in entries])
+            self._conn.execute("INSERT OR REPLACE INTO dirs (host, path, mtime) VALUES (?, ?, ?)",
+                               (self.host, dirname, mtime))
+            self._maybe_commit()
+
+    def _remove_subtree(self, path):
+        """ Drop a vanished dir and everything cached below it, reporting its files as removed. """
+        prefix = path + '/'
+        below = "host = ? AND ({col} = ? OR substr({col}, 1, ?) = ?)"
+        params = (self.host, path, len(prefix), prefix)
+        if not self.first_crawl:
+            for (dirname, name) in self._conn.execute(
+                    "SELECT dir, name FROM entries WHERE is_dir = 0 AND " + below.format(col='dir'), params):
+                self.changes.append(('-', join_remote(dirname, name)))
+        self._conn.execute("DELETE FROM entries WHERE " + below.format(col='dir'), params)
+        self._conn.execute("DELETE FROM dirs WHERE " + below.format(col='path'), params)
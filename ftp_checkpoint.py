@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ==============================================================================
+# File:         ftp_checkpoint.py
+# Author:       Cashiuus
+# Created:      17-Oct-2026     -     Revised:
+#
+# Depends:      n/a
+# Compat:       3.7+
+#
+#-[ Usage ]---------------------------------------------------------------------
+#
+#   SQLite-backed checkpoint of a crawl in progress, so a crawl that dies partway
+#   (timeout, 421, Ctrl-C) can be picked back up with --resume instead of starting
+#   over from "/". It holds the directory frontier (pending and completed dirs),
+#   the matches found so far and the downloads that were queued but not finished.
+#
+#   Writes are committed in batches, so after a crash the file reflects a prefix
+#   of the crawl. A dir is only marked done after its subdirs and matches have
+#   been recorded, so nothing below it can be lost.
+#
+# ==============================================================================
+import logging
+
+from ftp_db import SQLiteDB
+
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS dirs (path TEXT PRIMARY KEY, done INTEGER NOT NULL DEFAULT 0);
+CREATE TABLE IF NOT EXISTS matches (path TEXT PRIMARY KEY);
+CREATE TABLE IF NOT EXISTS downloads (path TEXT PRIMARY KEY, done INTEGER NOT NULL DEFAULT 0);
+"""
+RESET = "DROP TABLE IF EXISTS dirs; DROP TABLE IF EXISTS matches; DROP TABLE IF EXISTS downloads;"
+
+
+class CrawlCheckpoint(SQLiteDB):
+    """ Thread-safe persistent state of one crawl, shared by every crawl and download worker.
+
+        checkpoint = CrawlCheckpoint(output_dir / "FTP_crawl_state_10.10.1.20.db", resume=True)
+        pending = checkpoint.pending_dirs()
+        ...
+        checkpoint.close()
+    """
+    def __init__(self, db_file, resume=False, commit_interval=2.0):
+        SQLiteDB.__init__(self, db_file, SCHEMA if resume else RESET + SCHEMA, commit_interval)
+
+    def _write(self, sql, params):
+        """ Run one write, quietly ignored once closed since daemon workers can outlive an interrupted crawl. """
+        with self._lock:
+            if self._conn is None:
+                return False
+            cur = self._conn.execute(sql, params)
+            self._maybe_commit()
+            return cur.rowcount == 1
+
+    def _read(self, sql):
+        with self._lock:
+            return self._conn.execute(sql).fetchall()
+
+    def add_dir(self, path):
+        """ Record a newly discovered dir, returning False if it was already known. """
+        return self._write("INSERT OR IGNORE INTO dirs (path) VALUES (?)", (path,))
+
+    def complete_dir(self, path):
+        self._write("UPDATE dirs SET done = 1 WHERE path = ?", (path,))
+
+    def add_match(self, path):
+        """ Record a matched remote path, returning False if it was already recorded by an earlier run. """
+        return self._write("INSERT OR IGNORE INTO matches (path) VALUES (?)", (path,))
+
+    def add_download(self, path):
+        """ Record a queued download, returning False if it was already recorded (finished or not). """
+        return self._write("INSERT OR IGNORE INTO downloads (path) VALUES (?)", (str(path),))
+
+    def complete_download(self, path):
+        self._write("UPDATE downloads SET done = 1 WHERE path = ?", (str(path),))
+
+    def pending_dirs(self):
+        return [row[0] for row in self._read("SELECT path FROM dirs WHERE done = 0")]
+
+    def pending_downloads(self):
+        return [row[0] for row in self._read("SELECT path FROM downloads WHERE done = 0")]
+
+    def counts(self):
+        """ Return (discovered, done) directory counts. """
+        return tuple(self._read("SELECT COUNT(*), COALESCE(SUM(done), 0) FROM dirs")[0])
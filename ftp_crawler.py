@@ -23,18 +23,37 @@ __license__ = 'MIT'
 __copyright__ = 'Copyright (C) 2022 Cashiuus'
 ## =======[ IMPORTS ]========= ##
 import argparse
+import asyncio
+import csv
+import ipaddress
+import json
 import logging
 import os
+import posixpath
+import queue
+import stat
 import sys
+import threading
+from collections import deque
 from pathlib import Path
 from random import randrange, uniform
-from time import sleep, strftime
+from time import localtime, mktime, monotonic, perf_counter, sleep, strftime, strptime
 
 import ftplib
 import ftputil
 
 # Our local patterns config
 from config import *
+from ftp_archive import ArchiveError, archive_lister, is_archive
+from ftp_async import AsyncFTPClient, AsyncFTPError, parse_mlsd_time
+from ftp_cache import ListingCache, RemoteEntry
+from ftp_checkpoint import CrawlCheckpoint
+from ftp_index import CrawlIndex
+from ftp_match import DirFilter, FileMatcher, remote_depth
+from ftp_metrics import CrawlMetrics, StatsReporter, enable_profiling, profiled
+from ftp_scan import FindingsWriter, ScanPool
+from ftp_store import DownloadStore
+from ftp_throttle import AdaptiveThrottle, is_overload_error
 
 
 ## =========[  TEXT COLORS  ]============= ##
@@ -59,6 +78,9 @@ DEBUG = False
 BASE_DIR = Path(__file__).resolve(strict=True).parent       # one parent means dir of this file
 SAVE_DIR = BASE_DIR / "saved"
 LOG_FILE = BASE_DIR / "ftp_crawler.log"
+# Compiled once from the pattern lists in config.py
+FILE_MATCHER = FileMatcher(INTERESTING_EXTENSIONS, INTERESTING_FILENAMES, EXCLUDE_FILES, EXCLUDE_PATTERNS, APPDATA)
+DIR_FILTER = DirFilter(EXCLUDE_DIRS)
 
 
 # Logging Cookbook: https://docs.python.org/3/howto/logging-cookbook.html
@@ -83,56 +105,760 @@ class MyFTPSession(ftplib.FTP):
 
         with ftputil.FTPHost(target, username, password, port=2121, session_factory=MyFTPSession) as ftp_host:
             # do normal stuff with the connection
+
+        connect_timeout     - Seconds to wait for connect and login, so dead hosts fail fast (Default: 'timeout')
+        timeout             - Seconds to wait on any later command or data transfer (Default: None, forever)
     """
-    def __init__(self, target, username, password, port=21):
+    def __init__(self, target, username, password, port=21, timeout=None, connect_timeout=None):
         ftplib.FTP.__init__(self)
-        self.connect(target, port)
+        self.connect(target, port, timeout=connect_timeout or timeout)
         self.login(username, password)
+        # ftplib reuses self.timeout for every data connection it opens
+        self.timeout = timeout
+        self.sock.settimeout(timeout)
+        # Learn whether the server can do MLSD, which gives exact sizes/mtimes without parsing LIST output
+        try:
+            feat = self.sendcmd("FEAT")
+            self.features = set(line.strip().split(' ')[0].upper() for line in feat.splitlines()[1:-1])
+        except (ftplib.error_perm, ftplib.error_reply):
+            self.features = set()
+        self.use_mlsd = 'MLST' in self.features or 'MLSD' in self.features
+        if self.use_mlsd:
+            # Ask for just the facts list_remote_dir() reads, once, rather than with every MLSD
+            try:
+                self.sendcmd("OPTS MLST type;size;modify;")
+            except (ftplib.error_perm, ftplib.error_reply):
+                pass
+
+
+def list_remote_dir(ftpobj, dirname):
+    """ LIST a single remote directory, returning a RemoteEntry per name.
+
+        Uses MLSD where the server supports it. Otherwise falls back to ftputil's LIST parsing, where
+        the lstat()/isdir() calls are answered from the stat cache that listdir() has just populated,
+        so either way this costs one listing per directory.
+    """
+    # ftputil has no MLSD support, so go straight to the MyFTPSession behind the FTPHost
+    session = ftpobj._session
+    if getattr(session, 'use_mlsd', False):
+        entries = []
+        for name, facts in session.mlsd(dirname):
+            kind = facts.get('type', '').lower()
+            if kind in ('cdir', 'pdir') or name in ('.', '..'):
+                continue
+            size = int(facts['size']) if facts.get('size', '').isdigit() else None
+            entries.append(RemoteEntry(name, kind == 'dir', size, parse_mlsd_time(facts.get('modify')),
+                                       kind.startswith('os.unix=slink') or kind.startswith('os.unix=symlink')))
+        return entries
+    entries = []
+    for name in ftpobj.listdir(dirname):
+        path = ftpobj.path.join(dirname, name)
+        st = ftpobj.lstat(path)
+        is_link = stat.S_ISLNK(st.st_mode)
+        entries.append(RemoteEntry(name, ftpobj.path.isdir(path), st.st_size, st.st_mtime, is_link))
+    return entries
+
+
+class DirectoryFrontier(object):
+    """ Thread-safe frontier of remote directories still to be LISTed, shared by every crawl worker.
+
+        get() blocks while the frontier is empty but other workers are still LISTing (and so may
+        discover more dirs), and returns None once the whole tree has been crawled. Otherwise it returns
+        (dirname, mtime), with the dir's mtime as seen in its parent's listing, or None if unknown.
+        With a CrawlCheckpoint, the frontier is persisted as it goes and restored from it on resume.
+        Dirs excluded by 'dir_filter' or deeper than 'max_depth' are never queued, so never LISTed.
+        Dirs that turned out not to be LISTable are collected in 'denied' as (dirname, error message).
+    """
+    def __init__(self, top="/", checkpoint=None, dir_filter=None, max_depth=None, target=None):
+        self._pending = deque()
+        self.target = target
+        self._cond = threading.Condition()
+        self.checkpoint = checkpoint
+        self.dir_filter = dir_filter
+        self.max_depth = max_depth
+        self.in_flight = 0
+        self.discovered = 0
+        self.done = 0
+        self.pruned = 0
+        self.denied = []
+        if checkpoint is not None:
+            self.discovered, self.done = checkpoint.counts()
+            if self.discovered:
+                # Resuming, anything not marked done (including dirs in flight when we died) gets LISTed again
+                self._pending.extend((dirname, None) for dirname in checkpoint.pending_dirs())
+                return
+        self.put(top)
+
+    def put(self, dirname, mtime=None):
+        if self.dir_filter is not None and self.dir_filter.excluded(dirname):
+            logger.debug("Pruning excluded dir: %s", dirname)
+            with self._cond:
+                self.pruned += 1
+            return
+        if self.max_depth is not None and remote_depth(dirname) > self.max_depth:
+            logger.warning("Not descending past max depth {}: {}".format(self.max_depth, dirname))
+            with self._cond:
+                self.pruned += 1
+            return
+        # Re-LISTing a dir on resume rediscovers subdirs the checkpoint already has queued
+        if self.checkpoint is not None and not self.checkpoint.add_dir(dirname):
+            return
+        with self._cond:
+            self._pending.append((dirname, mtime))
+            self.discovered += 1
+            self._cond.notify()
+
+    def get(self):
+        with self._cond:
+            while not self._pending and self.in_flight:
+                self._cond.wait()
+            if not self._pending:
+                return None
+            self.in_flight += 1
+            return self._pending.popleft()
+
+    def qsize(self):
+        """ Number of dirs waiting to be LISTed. """
+        return len(self._pending)
+
+    def task_done(self):
+        with self._cond:
+            self.in_flight -= 1
+            self.done += 1
+            print("\r[*] {}Crawled {} / {} discovered directories".format(
+                self.target + ": " if self.target else "", self.done, self.discovered), end='')
+            self._cond.notify_all()
+
+    def requeue(self, dirname, mtime=None):
+        """ Hand back a dir that a worker pulled but couldn't LIST, for another worker to try. """
+        with self._cond:
+            self._pending.append((dirname, mtime))
+            # task_done() is about to count it as done, so count it as discovered again too
+            self.discovered += 1
+            self._cond.notify()
+
+    def deny(self, dirname, error):
+        """ Record a dir the server refused to LIST, typically a 550 permission denied. """
+        # ftputil appends a "Debugging info" line to its errors, keep just the message
+        message = (str(error) or type(error).__name__).splitlines()[0]
+        # Logged, not warned: with no log handler set up a warning would go to the console as well, on top of
+        # the summary generate_denied_file() prints and the denied dirs file itself
+        logger.info("Skipping dir that can't be listed: {}: {}".format(dirname, message))
+        with self._cond:
+            self.denied.append((dirname, message))
+
+    def complete(self, dirname):
+        """ Mark a dir as fully handled, once its subdirs are in the frontier and its matches recorded. """
+        if self.checkpoint is not None:
+            self.checkpoint.complete_dir(dirname)
+
+
+def walk_ftpserver(session, frontier, cache=None, max_entries=None, metrics=None):
+    """ Single-pass, breadth-first walk of the FTP server yielding (dirname, subdirs, files) like ftp.walk(),
+        except that 'files' is a list of RemoteEntry so callers also get each file's size and mtime.
+
+        Every directory is LISTed exactly once, and progress is reported as directories done out of
+        directories discovered so far, so no separate counting pass over the server is needed.
+        Several FTPSessions can walk the same frontier at once, each LISTing the directories it pulls.
+        As with os.walk(), callers may prune the 'subdirs' list in-place to skip descending into them.
+        With a ListingCache, unchanged dirs are served from the cache instead of being LISTed.
+        Dirs with more than 'max_entries' entries only have that many of them crawled.
+        Dirs that can't be LISTed for good (e.g. 550 permission denied) are skipped and recorded in
+        the frontier's 'denied' list. With CrawlMetrics, every dir and LIST is counted and timed.
+    """
+    while True:
+        item = frontier.get()
+        if item is None:
+            return
+        dirname, mtime = item
+        try:
+            entries = cache.reuse(dirname, mtime) if cache is not None else None
+            if entries is None:
+                try:
+                    entries = session.call(list_remote_dir, dirname)
+                    if metrics is not None:
+                        metrics.observe_list(session.latency)
+                except (ftplib.error_perm, ftputil.error.PermanentError) as e:
+                    frontier.deny(dirname, e)
+                    frontier.complete(dirname)
+                    continue
+                except (ftplib.all_errors + (ftputil.error.FTPError,)):
+                    # Out of retries, so this session is done for, but another one may still get the dir
+                    frontier.requeue(dirname, mtime)
+                    raise
+                if cache is not None:
+                    cache.update(dirname, mtime, entries)
+            if max_entries and len(entries) > max_entries:
+                logger.warning("Only crawling {} of {} entries in {}".format(max_entries, len(entries), dirname))
+                print("\n[WARN] Only crawling {} of {} entries in {}".format(max_entries, len(entries), dirname))
+                entries = entries[:max_entries]
+            subdirs = [e.name for e in entries if e.is_dir]
+            files = [e for e in entries if not e.is_dir]
+            if metrics is not None:
+                metrics.add_dir(files=len(files))
+            yield dirname, subdirs, files
+            by_name = {e.name: e for e in entries}
+            for sub in subdirs:
+                # Same as ftp.walk(), don't descend into symlinked dirs so we can't loop forever
+                if not by_name[sub].is_link:
+                    frontier.put(posixpath.join(dirname, sub), by_name[sub].mtime)
+            frontier.complete(dirname)
+        finally:
+            frontier.task_done()
+
+
+def open_ftp_host(target, username, password, port=21, include_hidden=True, timeout=None, connect_timeout=None):
+    """ Open a logged-in ftputil.FTPHost built on MyFTPSession, see there for the timeouts. """
+    # ftputil hands every argument but session_factory on to MyFTPSession, for its child sessions too
+    ftp = ftputil.FTPHost(target, username, password, port=port, timeout=timeout, connect_timeout=connect_timeout,
+                          session_factory=MyFTPSession)
+    if include_hidden:
+        # Try to enable showing hidden files/dirs also - only if FTP server supports it
+        ftp.use_list_a_option = True
+    return ftp
+
+
+def is_permanent_error(error):
+    """ Whether an FTP error is a 5xx reply, which no amount of retrying or reconnecting will change. """
+    return isinstance(error, (ftplib.error_perm, ftputil.error.PermanentError))
+
 
+class FTPSession(object):
+    """ A logged-in FTPHost that reconnects and logs back in by itself when its connection drops.
+
+        with FTPSession(target, username, password, port=2121) as session:
+            entries = session.call(list_remote_dir, "/")        # list_remote_dir(session.host, "/")
+
+        Transient errors (4xx replies, timeouts, dropped connections) are retried with exponential
+        backoff, over a fresh connection unless the error left the current one usable. 5xx errors
+        are raised straight away, as are errors that outlast 'retries'. Connecting in the first place
+        isn't retried, so dead hosts still fail fast.
+
+        retries             - Attempts after the first before giving up on a call (Default: 3)
+        backoff             - Seconds to wait before the first retry, doubling for each one after (Default: 1)
+        max_backoff         - Cap on the wait between retries (Default: 60)
+        keepalive           - Seconds the control connection may sit idle during a transfer before a NOOP (Default: 60)
+        throttle            - Optional AdaptiveThrottle pacing every call, and told how each one went
+        metrics             - Optional CrawlMetrics that every failed call is counted in
+
+        'latency' is how long the last successful call took, not counting retries or throttling.
+    """
+    def __init__(self, target, username, password, port=21, include_hidden=True, timeout=None,
+                 connect_timeout=None, retries=3, backoff=1.0, max_backoff=60.0, keepalive=60.0, throttle=None,
+                 metrics=None):
+        self.target = target
+        self.username = username
+        self.password = password
+        self.port = port
+        self.include_hidden = include_hidden
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.keepalive = keepalive
+        self.throttle = throttle
+        self.metrics = metrics
+        self.latency = None
+        self.reconnects = 0
+        self.host = None
+        self._last_command = monotonic()
+        self._connect()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _connect(self):
+        self.host = open_ftp_host(self.target, self.username, self.password, port=self.port,
+                                  include_hidden=self.include_hidden, timeout=self.timeout,
+                                  connect_timeout=self.connect_timeout)
+        self._last_command = monotonic()
+
+    def close(self):
+        if self.host is not None:
+            try:
+                self.host.close()
+            except (ftplib.all_errors + (ftputil.error.FTPError,)):
+                # Already dead, which is usually why we're closing it
+                pass
+            self.host = None
+
+    def call(self, func, *args, timed=True, **kwargs):
+        """ Return func(self.host, *args, **kwargs), retrying it on transient errors.
+
+            timed           - Feed the call's duration back to the throttle, False for transfers whose
+                              duration depends on the file's size, where only errors say anything
+        """
+        attempt = 0
+        while True:
+            try:
+                if self.host is None:
+                    self._connect()
+                    self.reconnects += 1
+                    logger.info("{}: Reconnected to FTP server".format(self.target))
+                if self.throttle is not None:
+                    sleep(self.throttle.reserve())
+                started = monotonic()
+                result = func(self.host, *args, **kwargs)
+            except (ftplib.all_errors + (ftputil.error.FTPError,)) as e:
+                if self.metrics is not None:
+                    self.metrics.error(e)
+                if self.throttle is not None and is_overload_error(e):
+                    self.throttle.backoff()
+                if is_permanent_error(e) or attempt >= self.retries:
+                    raise
+                wait = min(self.max_backoff, self.backoff * 2 ** attempt) * uniform(0.5, 1.0)
+                attempt += 1
+                logger.warning("{}: {}, retrying in {:.1f}s ({}/{})".format(
+                    self.target, (str(e) or type(e).__name__).splitlines()[0], wait, attempt, self.retries))
+                # A 4xx reply other than 421 ("closing control connection") leaves the session usable
+                if not (isinstance(e, (ftplib.error_temp, ftputil.error.TemporaryError))
+                        and not str(e).startswith('421')):
+                    self.close()
+                sleep(wait)
+                continue
+            self._last_command = monotonic()
+            self.latency = self._last_command - started
+            if self.throttle is not None and timed:
+                self.throttle.ok(self.latency)
+            return result
+
+    def keep_alive(self):
+        """ Send a NOOP if the control connection has been idle for 'keepalive' seconds, e.g. during a long transfer.
+
+            The transfer itself runs over one of ftputil's child sessions, so the control connection of the
+            main session would otherwise sit idle long enough for servers to drop it.
+        """
+        if self.host is None or monotonic() - self._last_command < self.keepalive:
+            return
+        self._last_command = monotonic()
+        try:
+            self.host._session.voidcmd("NOOP")
+        except ftplib.all_errors as e:
+            # Already gone, the next call() will have to reconnect
+            logger.debug("%s: Keepalive NOOP failed: %s", self.target, e)
+
+
+class LocalFileError(Exception):
+    """ A download couldn't be written locally (disk full, no output dir...), which no retry is going to fix.
+
+        ftputil's file objects report a dropped data connection as a plain OSError too, so the local
+        side's OSErrors are raised as this instead, which FTPSession.call() doesn't retry.
+    """
+
+
+def open_local_file(path, mode):
+    """ open() a local file to download into, raising a LocalFileError if it can't be. """
+    try:
+        return open(path, mode)
+    except OSError as e:
+        raise LocalFileError(e) from e
+
+
+def copy_remote_file(src, dst, callback=None):
+    """ Copy an open remote file into a local file-like object, raising a LocalFileError if writing it fails. """
+    while True:
+        chunk = src.read(65536)
+        if not chunk:
+            return
+        try:
+            dst.write(chunk)
+        except OSError as e:
+            raise LocalFileError(e) from e
+        if callback:
+            callback(chunk)
+
+
+def resume_remote_file_download(ftpobj, download_file, dest_file, callback=None):
+    """ Continue a partial download by appending from a REST offset of the local file's current size. """
+    offset = dest_file.stat().st_size
+    remote_size = ftpobj.path.getsize(download_file)
+    logger.debug("Resuming %s at offset %s of %s", download_file, offset, remote_size)
+    if offset >= remote_size:
+        return
+    with ftpobj.open(download_file, 'rb', rest=offset) as src, open_local_file(dest_file, 'ab') as dst:
+        copy_remote_file(src, dst, callback=callback)
 
-def get_total_filecount(ftpobj):
-    logger.debug('Started count function')
-    cnt = 0
-    # For some reason, this is only resulting in a total count of 15, which is not even close to correct
-    #cnt = sum([len(files) for (dirname, subdirs, files) in ftpobj.walk('/')])
-    for (dirname, subdirs, files) in ftpobj.walk('/'):
-        cnt += len(files)
-    logger.debug('Finished count function, with total at: {}'.format(cnt))
-    return cnt
 
+def read_remote_range(ftpobj, remote_file, max_bytes, offset=0):
+    """ Read at most 'max_bytes' of a remote file from 'offset' (sent as a REST), without fetching the rest of it.
 
-def download_remote_file_helper(ftpobj, download_file, output_dir):
-    """ Use an existing FTP connection object and download a provided remote file. """
+        Closing the data connection early cuts the transfer off server-side, and ftputil swallows the
+        426 "transfer aborted" reply that follows.
+    """
+    data = bytearray()
+    with ftpobj.open(remote_file, 'rb', rest=offset or None) as fh:
+        while len(data) < max_bytes:
+            chunk = fh.read(min(65536, max_bytes - len(data)))
+            if not chunk:
+                break
+            data.extend(chunk)
+    return bytes(data)
+
+
+def list_remote_archive(ftpobj, remote_file, lister):
+    """ Fetch the byte ranges an ftp_archive lister asks for, one REST + RETR each, and return its members. """
+    while True:
+        next_range = lister.next_range()
+        if next_range is None:
+            break
+        offset, max_bytes = next_range
+        received = 0
+        with ftpobj.open(remote_file, 'rb', rest=offset or None) as fh:
+            while not lister.stop and (max_bytes is None or received < max_bytes):
+                chunk = fh.read(65536 if max_bytes is None else min(65536, max_bytes - received))
+                if not chunk:
+                    break
+                received += len(chunk)
+                lister.write(chunk)
+        lister.end()
+    if lister.truncated:
+        logger.warning("Only listed the first {} members of {}".format(len(lister.members), remote_file))
+    return lister.members
+
+
+def store_remote_file(ftpobj, download_file, writer, callback=None):
+    """ Download a remote file into a DownloadStore writer, continuing from its offset if it was resumed. """
+    if writer.offset and writer.offset >= ftpobj.path.getsize(download_file):
+        return
+    with ftpobj.open(download_file, 'rb', rest=writer.offset or None) as src:
+        copy_remote_file(src, writer, callback=callback)
+
+
+def download_remote_file_helper(ftpobj, download_file, output_dir, callback=None, resume=False):
+    """ Use an existing FTP connection object and download a provided remote file.
+
+        callback            - Optional callable passed each chunk as it arrives
+        resume              - Continue from the end of an existing partial local file instead of starting over
+    """
     dest_file = output_dir / Path(download_file).name
-    logger.debug("var output_dir: {}".format(output_dir))
-    logger.debug("var download_file: {}".format(download_file))
-    logger.debug("var dest_file: {}".format(dest_file))
-    if dest_file:
-        ftpobj.download(download_file, dest_file)
+    logger.debug("var output_dir: %s", output_dir)
+    logger.debug("var download_file: %s", download_file)
+    logger.debug("var dest_file: %s", dest_file)
+    if dest_file and resume and dest_file.is_file():
+        resume_remote_file_download(ftpobj, download_file, dest_file, callback=callback)
+        logger.info("File has been downloaded: {}".format(str(download_file)))
+        print("[*] File has been downloaded: {}".format(str(download_file)))
+    elif dest_file:
+        with ftpobj.open(download_file, 'rb') as src, open_local_file(dest_file, 'wb') as dst:
+            copy_remote_file(src, dst, callback=callback)
         logger.info("File has been downloaded: {}".format(str(download_file)))
         print("[*] File has been downloaded: {}".format(str(download_file)))
-        logger.debug("Finished ftpobj.download() operation")
     else:
         logger.debug("var dest_file is empty, something went wrong (e.g. dest_file was a dir not a file)")
     return
 
 
-def download_remote_file(target, username, password, download_file, output_dir):
+class BandwidthLimiter(object):
+    """ Thread-safe cap on bytes/sec shared by every download connection to one host.
+
+        Each consumed chunk books the next slice of transfer time, and the caller sleeps off
+        whatever it got ahead of the rate by. A rate of None or 0 means unlimited.
+    """
+    def __init__(self, rate=None):
+        self.rate = rate
+        self._lock = threading.Lock()
+        self._next = monotonic()
+
+    def consume(self, nbytes):
+        if not self.rate:
+            return
+        with self._lock:
+            now = monotonic()
+            self._next = max(self._next, now) + nbytes / self.rate
+            wait = self._next - now
+        if wait > 0:
+            sleep(wait)
+
+
+class DownloadPipeline(object):
+    """ Bounded queue of remote files to download, drained by its own FTP sessions in parallel with the crawl.
+
+        pipeline = DownloadPipeline(target, username, password, output_dir, connections=2)
+        pipeline.start()
+        pipeline.put(remote_path, size=size, mtime=mtime)       # blocks only while the queue is full
+        pipeline.peek(remote_path)      # with a ScanPool, just scan the file's first 'peek_bytes'
+        pipeline.put_archive(remote_path, size)     # with 'on_archive', list the archive's members
+        pipeline.close()                # waits for the queue to drain
+        pipeline.report()
+
+        With a CrawlCheckpoint, queued downloads are recorded until finished so a resumed crawl can
+        pick them back up. With an AdaptiveThrottle (shared with the crawl), each RETR is paced by it.
+        Each download session is an FTPSession, so a dropped connection is reconnected and the
+        interrupted file continued from where it was cut off. With a ScanPool, downloaded files are
+        scanned for secrets, and peeked ones only have their first 'peek_bytes' fetched and scanned.
+        Archives queued with put_archive() have their members listed with at most 'archive_max' bytes
+        fetched, and handed to on_archive(remote_path, members). With a DownloadStore, files go into
+        it instead of straight into 'output_dir', and aren't downloaded at all if it already has them.
+        With CrawlMetrics, bytes, downloads and errors are counted in it as they happen.
+    """
+    def __init__(self, target, username, password, output_dir, port=21, connections=2, max_queued=1000,
+                 max_rate=None, include_hidden=True, checkpoint=None, timeout=None, connect_timeout=None,
+                 throttle=None, retries=3, scanner=None, findings=None, peek_bytes=None, on_archive=None,
+                 archive_max=None, store=None, metrics=None):
+        self.target = target
+        self.username = username
+        self.password = password
+        self.output_dir = output_dir
+        self.port = port
+        self.connections = connections
+        self.include_hidden = include_hidden
+        self.checkpoint = checkpoint
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.limiter = BandwidthLimiter(max_rate)
+        self.throttle = throttle
+        self.retries = retries
+        self.scanner = scanner
+        self.findings = findings
+        self.peek_bytes = peek_bytes
+        self.on_archive = on_archive
+        self.archive_max = archive_max
+        self.store = store
+        self.metrics = metrics
+        self.files = 0
+        self.bytes = 0
+        self.failed = 0
+        self.started = None
+        self.elapsed = 0
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._closed = threading.Event()
+        self._aborted = False
+        self._lock = threading.Lock()
+        self._alive = 0
+        self._threads = []
+
+    def start(self):
+        self.started = monotonic()
+        self._alive = self.connections
+        self._threads = [threading.Thread(target=profiled(self._worker), daemon=True)
+                         for _ in range(self.connections)]
+        for t in self._threads:
+            t.start()
+
+    def put(self, remote_path, resume=False, size=None, mtime=None):
+        """ Queue a remote file for download, giving up on it if every download session has died.
+
+            resume          - The file was partially downloaded by an earlier run, continue it with REST
+            size, mtime     - As listed, so the store can tell whether it already has the file
+        """
+        # A dir re-LISTed on resume finds files already downloaded, or already re-queued to resume
+        if self.checkpoint is not None and not self.checkpoint.add_download(remote_path) and not resume:
+            return
+        self._enqueue('download', remote_path, (resume, size, mtime))
+
+    def peek(self, remote_path):
+        """ Queue the first 'peek_bytes' of a remote file to be fetched and scanned, rather than downloaded. """
+        if self.scanner is not None and self.peek_bytes:
+            self._enqueue('peek', remote_path, None)
+
+    def put_archive(self, remote_path, size):
+        """ Queue a remote archive to have its members listed, see ftp_archive. """
+        if self.on_archive is not None:
+            self._enqueue('archive', remote_path, size)
+
+    def qsize(self):
+        """ Number of downloads, peeks and archive listings waiting for a session. """
+        return self._queue.qsize()
+
+    def full(self):
+        """ Whether queuing anything more would have to wait for a session to make room. """
+        return self._alive > 0 and self._queue.full()
+
+    def _enqueue(self, kind, remote_path, arg):
+        while True:
+            try:
+                # With every session dead nothing is going to make room, so don't wait for it
+                self._queue.put((kind, remote_path, arg), block=self._alive > 0, timeout=1)
+                return
+            except queue.Full:
+                if not self._alive:
+                    with self._lock:
+                        self.failed += 1
+                    logger.error("No download sessions left, dropping: {}".format(remote_path))
+                    return
+
+    def close(self):
+        """ Stop accepting work and wait for the workers to drain what's already queued. """
+        self._closed.set()
+        if not self._aborted:
+            for t in self._threads:
+                t.join()
+        # Anything left over means every session died before getting to it
+        with self._lock:
+            self.failed += self._queue.qsize()
+        self.elapsed = monotonic() - self.started
+
+    def abort(self):
+        """ Drop everything still queued, leaving it pending in the checkpoint for a resumed crawl. """
+        self._aborted = True
+        self._closed.set()
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                return
+
+    def _worker(self):
+        try:
+            with FTPSession(self.target, self.username, self.password, port=self.port,
+                            include_hidden=self.include_hidden, timeout=self.timeout,
+                            connect_timeout=self.connect_timeout, retries=self.retries,
+                            throttle=self.throttle, metrics=self.metrics) as session:
+                while True:
+                    try:
+                        kind, remote_path, arg = self._queue.get(timeout=0.5)
+                    except queue.Empty:
+                        if self._closed.is_set():
+                            return
+                        continue
+                    if kind == 'peek':
+                        self._peek(session, remote_path)
+                    elif kind == 'archive':
+                        self._list_archive(session, remote_path, arg)
+                    else:
+                        self._download(session, remote_path, *arg)
+        except (ftplib.all_errors + (ftputil.error.FTPError,)) as e:
+            logger.error("Download worker failed: {}".format(e))
+            print("\n[ERR] Download worker failed: {}".format(e))
+        finally:
+            with self._lock:
+                self._alive -= 1
+
+    def _download(self, session, remote_path, resume=False, size=None, mtime=None):
+        if self.store is not None:
+            local_file = self.store.lookup(self.target, remote_path, size, mtime)
+            if local_file is not None:
+                if self.checkpoint is not None:
+                    self.checkpoint.complete_download(remote_path)
+                # Not downloaded this time, but still scanned like one that was
+                if self.scanner is not None:
+                    self.scanner.scan_file(local_file, remote_path, self.findings)
+                return
+        local_file = self.output_dir / Path(remote_path).name
+        received = [0]
+        # A retry after a dropped connection continues from whatever the failed attempt got down
+        resume = [resume]
+
+        def on_chunk(chunk):
+            received[0] += len(chunk)
+            if self.metrics is not None:
+                self.metrics.add_bytes(len(chunk))
+            self.limiter.consume(len(chunk))
+            session.keep_alive()
+
+        def fetch(ftp):
+            try:
+                if self.store is None:
+                    download_remote_file_helper(ftp, remote_path, self.output_dir, callback=on_chunk,
+                                                resume=resume[0])
+                    return None
+                try:
+                    writer = self.store.open(self.target, remote_path, size=size, mtime=mtime, resume=resume[0])
+                except OSError as e:
+                    raise LocalFileError(e) from e
+                try:
+                    store_remote_file(ftp, remote_path, writer, callback=on_chunk)
+                finally:
+                    try:
+                        writer.close()
+                    except OSError as e:
+                        # Flushing what's left is still a local write
+                        raise LocalFileError(e) from e
+                logger.info("File has been downloaded: {}".format(remote_path))
+                print("[*] File has been downloaded: {}".format(remote_path))
+                return writer
+            finally:
+                resume[0] = True
+
+        try:
+            writer = session.call(fetch, timed=False)
+            if writer is not None:
+                try:
+                    local_file = self.store.commit(writer)
+                except OSError as e:
+                    raise LocalFileError(e) from e
+        except ftputil.error.PermanentError as e:
+            # Typically a 550 permission denied, the session itself is still fine
+            logger.error("Failed to download {}: {}".format(remote_path, e))
+            with self._lock:
+                self.failed += 1
+            return
+        except LocalFileError as e:
+            # Couldn't file it away locally (disk full, a remote path clashing with a local dir...)
+            logger.error("Failed to store {}: {}".format(remote_path, e))
+            print("\n[ERR] Failed to store {}: {}".format(remote_path, e))
+            with self._lock:
+                self.failed += 1
+            return
+        except (ftplib.all_errors + (ftputil.error.FTPError,)) as e:
+            # Out of retries; anything local was raised as a LocalFileError, so any OSError here is the connection
+            logger.error("Failed to download {}: {}".format(remote_path, e))
+            print("\n[ERR] Failed to download {}: {}".format(remote_path, e))
+            with self._lock:
+                self.failed += 1
+            return
+        if self.checkpoint is not None:
+            self.checkpoint.complete_download(remote_path)
+        with self._lock:
+            self.files += 1
+            self.bytes += received[0]
+        if self.metrics is not None:
+            self.metrics.add_download()
+        if self.scanner is not None:
+            self.scanner.scan_file(local_file, remote_path, self.findings)
+
+    def _peek(self, session, remote_path):
+        try:
+            data = session.call(read_remote_range, remote_path, self.peek_bytes, timed=False)
+        except (ftplib.all_errors + (ftputil.error.FTPError,)) as e:
+            # Denied, or out of retries; either way only this file is skipped, the session carries on
+            logger.error("Failed to read {}: {}".format(remote_path, e))
+            return
+        self.scanner.scan_bytes(data, remote_path, self.findings)
+
+    def _list_archive(self, session, remote_path, size):
+        def fetch(ftp):
+            # A fresh lister per attempt, since a retry starts over
+            lister = archive_lister(remote_path, size=size or ftp.path.getsize(remote_path),
+                                    max_bytes=self.archive_max)
+            return list_remote_archive(ftp, remote_path, lister) if lister is not None else []
+
+        try:
+            members = session.call(fetch, timed=False)
+        except (ftplib.all_errors + (ftputil.error.FTPError, ArchiveError)) as e:
+            # Denied, out of retries or not a readable archive; only this one is skipped, the session carries on
+            logger.error("Failed to list archive {}: {}".format(remote_path, e))
+            return
+        self.on_archive(remote_path, members)
+
+    def report(self):
+        """ Print and log the totals transferred and overall throughput. """
+        rate = self.bytes / self.elapsed if self.elapsed else 0
+        summary = "Downloaded {} files ({} bytes) in {:.1f}s at {:.1f} KB/s, {} failed".format(
+            self.files, self.bytes, self.elapsed, rate / 1024, self.failed)
+        print("[*] {}".format(summary))
+        logger.info(summary)
+
+
+def download_remote_file(target, username, password, download_file, output_dir, port=21):
     """ Download a remote file from FTP server to our local system as a fully standalone function for one-off's.
 
         download_file - full remote path of the file you wish to download
         output_dir    - the local destination directory in which to save the file
 
     """
-    #with ftputil.FTPHost(target, username, password, session_factory=MyFTPSession) as ftp_host:
-    with ftputil.FTPHost(target, username, password) as ftp:
+    with open_ftp_host(target, username, password, port=port) as ftp:
         print("[*] Connected to FTP Server. Attempting to retrieve specified file for download")
         # May need to enable hidden for this to always work
         # Note, if download_file is a dir for some reason, then dest_file will be empty here
         dest_file = output_dir / Path(download_file).name
-        logger.debug("var output_dir: {}".format(output_dir))
-        logger.debug("var download_file: {}".format(download_file))
-        logger.debug("var dest_file: {}".format(dest_file))
+        logger.debug("var output_dir: %s", output_dir)
+        logger.debug("var download_file: %s", download_file)
+        logger.debug("var dest_file: %s", dest_file)
         if dest_file:
             ftp.download(download_file, dest_file)
             logger.debug("Finished ftp.download operation")
@@ -141,73 +867,781 @@ def download_remote_file(target, username, password, download_file, output_dir):
     return
 
 
-def generate_listing_file(input_list, listing_file):
-    """ Process and input list and write it to a file. """
-    if not input_list:
+def listing_file_path(output_dir, target, fmt='jsonl'):
+    return output_dir / ("FTP_Files_listing_" + target + "_" + strftime('%Y%m%d') + "." + fmt)
+
+
+def denied_file_path(output_dir, target):
+    return output_dir / ("FTP_denied_dirs_" + target + "_" + strftime('%Y%m%d') + ".txt")
+
+
+def findings_file_path(output_dir, target):
+    return output_dir / ("FTP_secrets_" + target + "_" + strftime('%Y%m%d') + ".jsonl")
+
+
+class ListingWriter(object):
+    """ Thread-safe writer streaming matched files to the listing file as the crawl finds them.
+
+        fmt                 - 'jsonl' or 'csv' for path, size, mtime and match reason, or 'txt' for just paths
+        append              - Add to an existing listing, e.g. when resuming a crawl, instead of replacing it
+        index               - Optional IndexWriter every listed file is also added to
+
+        A dir can be handed over twice, e.g. when the async crawler re-LISTs a dir after losing its
+        connection part way through it, so written dirs are remembered in a set to drop the repeat.
+        That keeps memory to one string per dir rather than one per file.
+    """
+    def __init__(self, listing_file, fmt='jsonl', append=False, index=None):
+        self.listing_file = listing_file
+        self.fmt = fmt
+        self.append = append
+        self.index = index
+        self.count = 0
+        self._dirs = set()
+        self._lock = threading.Lock()
+        is_new = not append or not Path(listing_file).is_file() or Path(listing_file).stat().st_size == 0
+        self._fh = open(listing_file, 'a' if append else 'w', newline='')
+        self._csv = None
+        if fmt == 'csv':
+            self._csv = csv.writer(self._fh)
+            if is_new:
+                self._csv.writerow(('path', 'size', 'mtime', 'reason'))
+
+    def write_dir(self, dirname, records, is_new=None):
+        """ Write the (path, size, mtime, reason) records for one dir, unless that dir was already written.
+
+            is_new          - Optional check dropping records already listed, e.g. CrawlCheckpoint.add_match
+
+            Every record is still indexed, as a resumed crawl's first run may have listed files it never got to
+            index; indexing a file again just updates it in place. Returns the records that were written.
+        """
+        if self.index is not None:
+            self.index.add(records)
+        if is_new is not None:
+            records = [r for r in records if is_new(r[0])]
+        with self._lock:
+            if dirname in self._dirs:
+                return []
+            self._dirs.add(dirname)
+            for (path, size, mtime, reason) in records:
+                if self._csv is not None:
+                    self._csv.writerow((path, size, mtime, reason))
+                elif self.fmt == 'jsonl':
+                    self._fh.write(json.dumps({'path': path, 'size': size, 'mtime': mtime, 'reason': reason}) + "\n")
+                else:
+                    self._fh.write(path + "\n")
+                self.count += 1
+        return records
+
+    def close(self):
+        with self._lock:
+            self._fh.close()
+        if not self.count and not self.append:
+            # Don't leave empty listings behind, e.g. for every dead host of a batch
+            Path(self.listing_file).unlink()
+        if not self.count:
+            print("[*] No {}matching files were found".format("further " if self.append else ""))
+        else:
+            print("[*] {} {}files are listed in saved file for review: {}".format(
+                self.count, "more " if self.append else "", self.listing_file))
+        logger.info("Listed {} files in {}".format(self.count, self.listing_file))
+
+
+def generate_changes_file(changes, changes_file):
+    """ Write the new (+), changed (~) and removed (-) files found by an incremental crawl to a file. """
+    counts = {kind: sum(1 for (k, path) in changes if k == kind) for kind in '+~-'}
+    print("[*] Since the last crawl: {} new, {} changed, {} removed files".format(counts['+'], counts['~'], counts['-']))
+    logger.info("Since the last crawl: {} new, {} changed, {} removed files".format(
+        counts['+'], counts['~'], counts['-']))
+    if not changes:
+        return
+    with open(changes_file, 'w') as fl:
+        for (kind, path) in sorted(changes, key=lambda c: c[1]):
+            fl.write("{} {}\n".format(kind, path))
+    print("[*] List of changed files since the last crawl are in saved file for review: {}".format(changes_file))
+    return
+
+
+def generate_denied_file(denied, denied_file):
+    """ Write the dirs a crawl had to skip because the server refused to LIST them (e.g. 550) to a file. """
+    if not denied:
         return
-    print("[*] Generating the listing file for your review")
-    logger.info("Generating the listing file for your review")
-    with open(listing_file, 'w') as fl:
-        for line in input_list:
-            fl.write(str(line) + "\n")
+    with open(denied_file, 'w') as fl:
+        for (dirname, message) in sorted(denied):
+            fl.write("{}\t{}\n".format(dirname, message))
+    print("[*] Skipped {} directories that couldn't be listed, see saved file for review: {}".format(
+        len(denied), denied_file))
+    logger.info("Skipped {} directories that couldn't be listed".format(len(denied)))
     return
 
 
-def crawl_ftpserver_with_report(target, username, password, output_dir, all_files=False, include_hidden=True):
-    """ Crawl the FTP server's entire contents and output full list of files to a text file for review.
+def match_files(dirname, files, all_files=False):
+    """ Pattern match the file names of one remote directory, see FileMatcher.match_dir(). """
+    return FILE_MATCHER.match_dir(dirname, files, all_files=all_files)
+
+
+def match_archive_members(archive_path, members, all_files=False):
+    """ Pattern match an archive's members like the files of remote dirs inside it.
+
+        Returns records like those of the listing file, for paths like 'archive.zip!/path/inside'.
+    """
+    by_dir = {}
+    for m in members:
+        member_dir, _, name = m.name.rpartition('/')
+        by_dir.setdefault(member_dir, {})[name] = m
+    records = []
+    for member_dir, by_name in by_dir.items():
+        dirname = archive_path + '!/' + member_dir if member_dir else archive_path + '!'
+        found, _ = match_files(dirname, list(by_name), all_files=all_files)
+        records.extend((dirname + '/' + name, by_name[name].size, by_name[name].mtime, reason)
+                       for (name, reason) in found)
+    return records
+
+
+def peek_files(found, downloads, sizes):
+    """ Names of the matched files worth scanning the start of: SCAN_EXTENSIONS ones that aren't empty or downloaded.
+
+        sizes               - {name: size} of the dir's files, with None for unknown sizes
+    """
+    downloads = set(downloads)
+    return [name for (name, reason) in found
+            if name not in downloads and sizes[name] != 0 and name.lower().endswith(SCAN_EXTENSIONS)]
+
+
+def crawl_ftpserver_with_report(target, username, password, output_dir, all_files=False, include_hidden=True,
+                                workers=1, port=21, download_workers=2, download_rate=None, checkpoint=None,
+                                cache=None, max_depth=None, max_entries=None, listing=None, timeout=None,
+                                connect_timeout=None, throttle=None, retries=3, denied_file=None, scanner=None,
+                                findings=None, scan_remote=None, archive_max=None, store=None, metrics=None):
+    """ Crawl the FTP server's entire contents, streaming the list of matching files to 'listing' for review.
+
+        Returns {'dirs': n, 'files': n, 'matches': n, 'denied': n} counted over this run.
 
         all_files           - Toggle on listing ALL files in the saved list instead of just pattern matches, often useful
         include_hidden      - If FTP server supports it, enable view/access of hidden dirs/files (Default: True)
+        workers             - Number of logged-in FTP sessions LISTing directories in parallel (Default: 1)
+        port                - FTP server port (Default: 21)
+        download_workers    - Number of separate FTP sessions downloading files of interest (Default: 2)
+        download_rate       - Max bytes/sec across all download sessions, None for unlimited (Default: None)
+        checkpoint          - Optional CrawlCheckpoint to persist progress to, and resume from if it has any
+        cache               - Optional ListingCache for an incremental re-crawl, its 'changes' are filled in
+        max_depth           - Don't descend into dirs more than this many levels below '/', None for unlimited
+        max_entries         - Only crawl this many entries of any one dir, None for unlimited
+        listing             - ListingWriter that matches are written to as they are found
+        timeout             - Seconds to wait on any FTP command or transfer, None to wait forever
+        connect_timeout     - Seconds to wait for connect and login, so dead hosts fail fast
+        throttle            - Optional AdaptiveThrottle pacing every LIST and RETR sent to this server
+        retries             - Times to retry a LIST or RETR that failed on a dropped connection or 4xx, see FTPSession
+        denied_file         - Optional file to write the dirs that couldn't be LISTed (e.g. 550) to
+        scanner             - Optional ScanPool to scan downloaded files for secrets, into 'findings'
+        findings            - FindingsWriter that the scanner's findings for this server are written to
+        scan_remote         - Also scan the first this many bytes of listed SCAN_EXTENSIONS files not downloaded
+        archive_max         - List the members of listed archives too, fetching at most this many bytes of each
+        store               - Optional DownloadStore to download into, skipping files it already has
+        metrics             - CrawlMetrics to instrument the crawl with, reported at the end (Default: a new one)
     """
-    with ftputil.FTPHost(target, username, password) as ftp:
-        logger.info("Connected to FTP server successfully and now have an ftp session object")
-        print("[*] Connected to FTP Server")
-        total = get_total_filecount(ftp)
-        i = 1
-        matches = []
-        if include_hidden:
-            # Try to enable showing hidden files/dirs also - only if FTP server supports it
-            ftp.use_list_a_option = True
-        for (dirname, subdirs, files) in ftp.walk("/"):
-            logger.debug("walk vars: dirname: {} - subdirs: {} - files: {}".format(dirname, subdirs, files))
-            i += 1
-            #print("\r[*] Crawled {} of {} Files".format(i, total), end='')
-            print("[*] Crawled {} Files".format(i), end='\r')
-            if dirname in EXCLUDE_DIRS:
+    metrics = metrics or CrawlMetrics(target)
+    frontier = DirectoryFrontier("/", checkpoint=checkpoint, dir_filter=DIR_FILTER, max_depth=max_depth,
+                                 target=target)
+    crawled = {'dirs': 0, 'files': 0, 'matches': 0}
+    errors = []
+    lock = threading.Lock()
+    # A resumed crawl re-LISTs the dirs that were in flight, don't list their files twice
+    is_new = checkpoint.add_match if checkpoint is not None else None
+
+    def list_archive_members(archive_path, members):
+        # Called from the download sessions, once an archive's members have been listed
+        records = match_archive_members(archive_path, members, all_files=all_files)
+        if listing is not None:
+            records = listing.write_dir(archive_path + '!', records, is_new=is_new)
+        elif is_new is not None:
+            records = [r for r in records if is_new(r[0])]
+        with lock:
+            crawled['matches'] += len(records)
+    downloads = DownloadPipeline(target, username, password, output_dir, port=port, connections=download_workers,
+                                 max_rate=download_rate, include_hidden=include_hidden, checkpoint=checkpoint,
+                                 timeout=timeout, connect_timeout=connect_timeout, throttle=throttle,
+                                 retries=retries, scanner=scanner, findings=findings, peek_bytes=scan_remote,
+                                 on_archive=list_archive_members if archive_max else None, archive_max=archive_max,
+                                 store=store, metrics=metrics)
+    metrics.gauge('frontier', frontier.qsize)
+    metrics.gauge('listing', lambda: frontier.in_flight)
+    metrics.gauge('downloads', downloads.qsize)
+
+    def crawl_worker():
+        with FTPSession(target, username, password, port=port, include_hidden=include_hidden, timeout=timeout,
+                        connect_timeout=connect_timeout, retries=retries, throttle=throttle,
+                        metrics=metrics) as session:
+            logger.info("Connected to FTP server successfully and now have an ftp session object")
+            for (dirname, subdirs, files) in walk_ftpserver(session, frontier, cache=cache, max_entries=max_entries,
+                                                            metrics=metrics):
+                # Lazy args, so the (possibly huge) lists are only formatted when debug logging is on
+                logger.debug("walk vars: dirname: %s - subdirs: %s - files: %s", dirname, subdirs, files)
+                found, to_download = match_files(dirname, [e.name for e in files], all_files=all_files)
+                by_name = {e.name: e for e in files}
+                records = [(posixpath.join(dirname, name), by_name[name].size, by_name[name].mtime, reason)
+                           for (name, reason) in found]
+                if listing is not None:
+                    records = listing.write_dir(dirname, records, is_new=is_new)
+                elif is_new is not None:
+                    records = [r for r in records if is_new(r[0])]
+                with lock:
+                    crawled['dirs'] += 1
+                    crawled['files'] += len(files)
+                    crawled['matches'] += len(records)
+                # Regardless, of our reporting mode above, still queue up files of interest for download
+                for name in to_download:
+                    full_filename = posixpath.join(dirname, name)
+                    print("\n[*] Found a matching file of interest for download: {}".format(full_filename))
+                    downloads.put(full_filename, size=by_name[name].size, mtime=by_name[name].mtime)
+                if scan_remote:
+                    for name in peek_files(found, to_download, {e.name: e.size for e in files}):
+                        downloads.peek(posixpath.join(dirname, name))
+                if archive_max:
+                    # Every archive is looked inside, not just those whose own name matched
+                    for name in by_name:
+                        if is_archive(name) and by_name[name].size != 0:
+                            downloads.put_archive(posixpath.join(dirname, name), by_name[name].size)
+
+    def run_crawl_worker():
+        # Threaded workers log and drop out on failure, the rest carry on draining the frontier
+        try:
+            crawl_worker()
+        except (ftplib.all_errors + (ftputil.error.FTPError,)) as e:
+            logger.error("{}: Crawl worker failed: {}".format(target, e))
+            print("\n[ERR] {}: Crawl worker failed: {}".format(target, e))
+            errors.append(e)
+
+    print("[*] Connecting to FTP Server with {} session(s)".format(workers))
+    downloads.start()
+    if checkpoint is not None:
+        for remote_path in checkpoint.pending_downloads():
+            downloads.put(remote_path, resume=True)
+    try:
+        if workers <= 1:
+            crawl_worker()
+        else:
+            threads = [threading.Thread(target=profiled(run_crawl_worker), daemon=True) for _ in range(workers)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            if len(errors) == workers:
+                # Not one session got going, so treat it like the single session case and fail the crawl
+                raise errors[0]
+    except KeyboardInterrupt:
+        print("\n[*] Interrupted, progress so far is saved and can be picked back up with --resume")
+        downloads.abort()
+        raise
+    finally:
+        print()
+        # Let the download sessions finish off whatever the crawl queued up
+        downloads.close()
+        if checkpoint is not None:
+            checkpoint.close()
+        if cache is not None:
+            cache.close()
+    downloads.report()
+    metrics.finish()
+    metrics.report()
+    # -- end of crawl
+    print("[*] Crawled {} files across {} directories".format(crawled['files'], crawled['dirs']))
+    logger.info("Crawled {} files across {} directories".format(crawled['files'], crawled['dirs']))
+    if frontier.pruned:
+        print("[*] Skipped {} excluded or too deep directory trees".format(frontier.pruned))
+        logger.info("Skipped {} excluded or too deep directory trees".format(frontier.pruned))
+    if cache is not None:
+        print("[*] Reused {} unchanged directory listings from the cache".format(cache.reused))
+        logger.info("Reused {} unchanged directory listings from the cache".format(cache.reused))
+    if throttle is not None and throttle.backoffs:
+        print("[*] Server asked us to slow down {} time(s), finished at {:.1f} requests/sec".format(
+            throttle.backoffs, throttle.rate))
+        logger.info("Server asked us to slow down {} time(s), finished at {:.1f} requests/sec".format(
+            throttle.backoffs, throttle.rate))
+    crawled['denied'] = len(frontier.denied)
+    if denied_file is not None:
+        generate_denied_file(frontier.denied, denied_file)
+    return crawled
+
+
+def expand_targets(values):
+    """ Expand target specs (host names, IPs or CIDR ranges like 10.0.0.0/24) into a de-duplicated list of hosts.
+
+        Blank values and '#' comments are skipped, so the lines of a targets file can be passed straight in.
+    """
+    targets = []
+    for value in values:
+        value = value.split('#', 1)[0].strip()
+        if not value:
+            continue
+        try:
+            network = ipaddress.ip_network(value, strict=False)
+        except ValueError:
+            # Not an IP or a range, so a host name
+            targets.append(value)
+            continue
+        targets.extend(str(host) for host in (list(network.hosts()) or list(network)))
+    return list(dict.fromkeys(targets))
+
+
+def run_batch(targets, crawl_one, max_hosts):
+    """ Crawl every target with crawl_one(target) on up to 'max_hosts' threads, returning {target: stats}.
+
+        Each thread moves on to the next target as soon as it's done with one, so a slow server only
+        ever holds up its own slot. A crawl that fails gets its error recorded in its stats rather
+        than stopping the batch, and every stats dict gets the 'seconds' its crawl took.
+    """
+    pending = deque(targets)
+    results = {}
+    lock = threading.Lock()
+
+    def batch_worker():
+        while True:
+            with lock:
+                if not pending:
+                    return
+                target = pending.popleft()
+            started = monotonic()
+            try:
+                stats = crawl_one(target)
+                stats['error'] = None
+            except (ftplib.all_errors + (ftputil.error.FTPError,)) as e:
+                logger.error("{}: Crawl failed: {}".format(target, e))
+                print("\n[ERR] {}: Crawl failed: {}".format(target, e))
+                # ftputil appends a "Debugging info" line to its errors, keep just the message
+                stats = {'dirs': 0, 'files': 0, 'matches': 0, 'denied': 0, 'error': (str(e) or type(e).__name__).splitlines()[0]}
+            stats['seconds'] = monotonic() - started
+            with lock:
+                results[target] = stats
+
+    # Daemon threads, so a Ctrl-C doesn't have to wait for every crawl in progress to finish
+    threads = [threading.Thread(target=profiled(batch_worker), daemon=True)
+               for _ in range(min(max_hosts, len(targets)))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def generate_batch_summary(results, summary_file):
+    """ Write the per-host stats of a batch crawl to a CSV file, and print the totals across all hosts. """
+    failed = [t for t, stats in results.items() if stats.get('error')]
+    totals = {key: sum(stats[key] for stats in results.values()) for key in ('dirs', 'files', 'matches')}
+    with open(summary_file, 'w', newline='') as fl:
+        writer = csv.writer(fl)
+        writer.writerow(('target', 'status', 'dirs', 'files', 'matches', 'denied', 'seconds', 'error'))
+        for target, stats in results.items():
+            writer.writerow((target, 'failed' if stats.get('error') else 'ok', stats['dirs'], stats['files'],
+                             stats['matches'], stats['denied'], round(stats['seconds'], 1), stats.get('error') or ''))
+    summary = "Crawled {} of {} hosts ({} failed): {} files across {} directories, {} listed".format(
+        len(results) - len(failed), len(results), len(failed), totals['files'], totals['dirs'], totals['matches'])
+    print("[*] {}".format(summary))
+    logger.info(summary)
+    print("[*] Per-host summary of the batch is in saved file for review: {}".format(summary_file))
+    return
+
+
+# ==========================[ ASYNC CRAWLER ]========================== #
+
+async def open_async_client(target, username, password, port=21, include_hidden=True, timeout=30,
+                            connect_timeout=None):
+    """ Connect and log in a single AsyncFTPClient control connection. """
+    client = AsyncFTPClient(target, port=port, timeout=timeout, connect_timeout=connect_timeout)
+    client.use_list_a_option = include_hidden
+    await client.connect()
+    await client.login(username, password)
+    return client
+
+
+async def throttled_request(throttle, func, *args):
+    """ Await one FTP request func(*args), paced by an optional AdaptiveThrottle that is told how it went. """
+    if throttle is None:
+        return await func(*args)
+    await asyncio.sleep(throttle.reserve())
+    started = monotonic()
+    try:
+        result = await func(*args)
+    except (AsyncFTPError, OSError, asyncio.TimeoutError) as e:
+        if is_overload_error(e):
+            throttle.backoff()
+        raise
+    throttle.ok(monotonic() - started)
+    return result
+
+
+async def crawl_ftpserver_async(target, username, password, output_dir, global_limit, all_files=False,
+                                include_hidden=True, port=21, per_host=4, download_workers=2, download_rate=None,
+                                max_depth=None, max_entries=None, listing=None, timeout=30, connect_timeout=None,
+                                throttle=None, retries=3, denied_file=None, scanner=None, findings=None,
+                                scan_remote=None, archive_max=None, store=None, metrics=None):
+    """ Crawl one FTP server over 'per_host' asyncio control connections sharing a directory frontier.
+
+        Returns {'dirs': n, 'files': n, 'matches': n, 'denied': n, 'error': str or None} for this crawl.
+
+        global_limit        - asyncio.Semaphore capping LISTs in flight across every host
+        per_host            - Number of control connections (so concurrent LISTs) opened to this server
+        download_workers    - Number of separate FTP sessions downloading files of interest (Default: 2)
+        download_rate       - Cap on download bandwidth in bytes/sec, None for unlimited
+        max_depth           - Don't descend into dirs more than this many levels below '/', None for unlimited
+        max_entries         - Only crawl this many entries of any one dir, None for unlimited
+        throttle            - Optional AdaptiveThrottle pacing every LIST and RETR sent to this server
+        retries             - Times to reconnect a lost connection, and to retry a LIST answered with a 4xx
+        denied_file         - Optional file to write the dirs that couldn't be LISTed (e.g. 550) to
+        scanner             - Optional ScanPool to scan downloaded files for secrets, into 'findings'
+        scan_remote         - Also scan the first this many bytes of listed SCAN_EXTENSIONS files not downloaded
+        archive_max         - List the members of listed archives too, fetching at most this many bytes of each
+        store               - Optional DownloadStore to download into, skipping files it already has
+        metrics             - CrawlMetrics to instrument the crawl with, reported at the end (Default: a new one)
+
+        Downloads, peeks and archive listings go through a DownloadPipeline, as with the threaded crawler,
+        so the control connections only ever LIST.
+    """
+    metrics = metrics or CrawlMetrics(target)
+    frontier = asyncio.Queue()
+    frontier.put_nowait("/")
+    metrics.gauge('frontier', frontier.qsize)
+    crawled = {'dirs': 0, 'files': 0, 'matches': 0, 'denied': 0, 'error': None}
+    denied = []
+    # Failed LISTs of each dir, to give up on it after 'retries'
+    tries = {}
+    last_error = [None]
+    # Archive members are listed from the download sessions' threads
+    lock = threading.Lock()
+
+    def list_archive_members(archive_path, members):
+        records = match_archive_members(archive_path, members, all_files=all_files)
+        if listing is not None:
+            listing.write_dir(archive_path + '!', records)
+        with lock:
+            crawled['matches'] += len(records)
+    downloads = DownloadPipeline(target, username, password, output_dir, port=port, connections=download_workers,
+                                 max_rate=download_rate, include_hidden=include_hidden, timeout=timeout,
+                                 connect_timeout=connect_timeout, throttle=throttle, retries=retries,
+                                 scanner=scanner, findings=findings, peek_bytes=scan_remote,
+                                 on_archive=list_archive_members if archive_max else None, archive_max=archive_max,
+                                 store=store, metrics=metrics)
+    metrics.gauge('downloads', downloads.qsize)
+
+    async def queue_download(put, *args, **kwargs):
+        # The pipeline's put() blocks while its queue is full, so wait for room here instead of stalling the loop
+        while downloads.full():
+            await asyncio.sleep(0.1)
+        put(*args, **kwargs)
+
+    async def reconnect(i):
+        """ Replace connection 'i' after losing it, backing off exponentially, False once out of retries. """
+        clients[i].close()
+        for attempt in range(retries):
+            await asyncio.sleep(min(60, 2 ** attempt) * uniform(0.5, 1.0))
+            try:
+                clients[i] = await open_async_client(target, username, password, port=port,
+                                                     include_hidden=include_hidden, timeout=timeout,
+                                                     connect_timeout=connect_timeout)
+            except (AsyncFTPError, OSError, asyncio.TimeoutError) as e:
+                logger.warning("{}: Reconnect {}/{} failed: {}".format(target, attempt + 1, retries, e))
                 continue
-            if files:
-                for f in files:
-                    #logger.debug("f var: {}".format(f))
-                    full_filename = Path(ftp.path.join(dirname, f))
-                    if all_files:
-                        # Instead of iter'ing all files, I really could just extend the files list right here
-                        #matches.extend([os.path.join(dirname, x) for x in files])
-                        matches.append(full_filename)
+            logger.info("{}: Reconnected to FTP server".format(target))
+            return True
+        return False
+
+    async def timed_list(client, dirname):
+        started = monotonic()
+        entries = await client.list_dir(dirname)
+        metrics.observe_list(monotonic() - started)
+        return entries
+
+    async def crawl_dir(dirname, entries):
+        """ Record, match and queue the downloads of one LISTed dir, then queue its subdirs. """
+        if max_entries and len(entries) > max_entries:
+            logger.warning("{}: Only crawling {} of {} entries in {}".format(
+                target, max_entries, len(entries), dirname))
+            entries = entries[:max_entries]
+        subdirs = [name for (name, is_dir, size, mtime) in entries if is_dir]
+        files = {name: (size, mtime) for (name, is_dir, size, mtime) in entries if not is_dir}
+        crawled['dirs'] += 1
+        crawled['files'] += len(files)
+        metrics.add_dir(files=len(files))
+        print("\r[*] {}: Crawled {} / {} discovered directories".format(
+            target, crawled['dirs'], crawled['dirs'] + frontier.qsize()), end='')
+        found, to_download = match_files(dirname, files, all_files=all_files)
+        if listing is not None:
+            listing.write_dir(dirname, [(posixpath.join(dirname, name),) + files[name] + (reason,)
+                                        for (name, reason) in found])
+        with lock:
+            crawled['matches'] += len(found)
+        # Fetched over the download pipeline's own sessions, so this connection gets on with LISTing
+        for name in to_download:
+            full_filename = posixpath.join(dirname, name)
+            print("\n[*] Found a matching file of interest for download: {}".format(full_filename))
+            await queue_download(downloads.put, full_filename, size=files[name][0], mtime=files[name][1])
+        if scan_remote:
+            for name in peek_files(found, to_download, {n: size for n, (size, mtime) in files.items()}):
+                await queue_download(downloads.peek, posixpath.join(dirname, name))
+        if archive_max:
+            # Every archive is looked inside, not just those whose own name matched
+            for name in files:
+                if is_archive(name) and files[name][0] != 0:
+                    await queue_download(downloads.put_archive, posixpath.join(dirname, name), files[name][0])
+        # Only once the dir is done with, so nothing that goes wrong above has its subtree crawled twice
+        for sub in subdirs:
+            path = posixpath.join(dirname, sub)
+            # Prune excluded and too deep subtrees here, so they're never LISTed
+            if DIR_FILTER.excluded(path) or (max_depth is not None and remote_depth(path) > max_depth):
+                logger.debug("%s: Pruning dir: %s", target, path)
+                continue
+            frontier.put_nowait(path)
+
+    async def crawl_worker(i):
+        while True:
+            dirname = await frontier.get()
+            lost = False
+            try:
+                try:
+                    async with global_limit:
+                        entries = await throttled_request(throttle, timed_list, clients[i], dirname)
+                except (AsyncFTPError, OSError, asyncio.TimeoutError) as e:
+                    metrics.error(e)
+                    # A 421 means the server is closing the connection, so it's as good as lost
+                    lost = not isinstance(e, AsyncFTPError) or e.code == '421'
+                    message = (e.message if isinstance(e, AsyncFTPError) else str(e) or type(e).__name__)
+                    message = message.splitlines()[0]
+                    if lost:
+                        logger.error("{}: Connection lost while on {}: {}".format(target, dirname, message))
+                        last_error[0] = message
+                    tries[dirname] = tries.get(dirname, 0) + 1
+                    if (lost or e.code[0] == '4') and tries[dirname] <= retries:
+                        # Transient, e.g. 450 busy or a dropped connection, so give it another go once it's back
+                        # round the queue (for another connection, if this one is gone)
+                        frontier.put_nowait(dirname)
                     else:
-                        # -- pattern matching --
-                        suf = full_filename.suffixes
-                        if len(suf) > 1:
-                            # File is a multi-extension (e.g. ".tar.gz") and requires more code for an accurate match
-                            real_suffix = '.'.join([x.lower() for x in suf])
-                        elif len(suf) == 1:
-                            real_suffix = full_filename.suffix.lower()
-                        else:
-                            logger.debug("File with no extension: {}".format(full_filename))
-                        
-                        # Approach: Add matches to list for all extensions as well as exact filenames, 
-                        # but also download matched filenames
-                        if real_suffix in INTERESTING_EXTENSIONS:
-                            if f not in EXCLUDE_FILES and 'thumbcache_' not in f:
-                                matches.append(full_filename)
-                    # Regardless, of our reporting mode above, still check and download files of interest
-                    if f in INTERESTING_FILENAMES:
-                        if full_filename not in matches: matches.append(full_filename)
-                        print("\n[*] Found a matching file of interest for download: {}".format(full_filename))
-                        download_remote_file_helper(ftp, full_filename, output_dir)
-                        sleep(delay(max=2))
-        print()
-        # -- end of loop
-    return matches
+                        # Typically a 550 permission denied, or a dir we keep losing the connection on (e.g. one
+                        # big enough to time out every LIST); skip it but remember it
+                        logger.info("{}: Skipping dir that can't be listed: {}: {}".format(target, dirname, message))
+                        denied.append((dirname, message))
+                else:
+                    await crawl_dir(dirname, entries)
+            finally:
+                frontier.task_done()
+            if lost and not await reconnect(i):
+                return
+
+    results = await asyncio.gather(
+        *[open_async_client(target, username, password, port=port, include_hidden=include_hidden, timeout=timeout,
+                            connect_timeout=connect_timeout)
+          for _ in range(per_host)], return_exceptions=True)
+    clients = [c for c in results if isinstance(c, AsyncFTPClient)]
+    if not clients:
+        print("[ERR] {}: Unable to connect to FTP server: {}".format(target, results[0]))
+        logger.error("{}: Unable to connect to FTP server: {}".format(target, results[0]))
+        crawled['error'] = str(results[0]) or type(results[0]).__name__
+        return crawled
+    logger.info("{}: Connected {} async session(s)".format(target, len(clients)))
+    downloads.start()
+    workers = [asyncio.ensure_future(crawl_worker(i)) for i in range(len(clients))]
+    finished = asyncio.ensure_future(frontier.join())
+    try:
+        # Stop either when the frontier drains, or when every connection has dropped out
+        pending = set(workers)
+        while not finished.done() and pending:
+            done, pending = await asyncio.wait(pending | {finished}, return_when=asyncio.FIRST_COMPLETED)
+            pending.discard(finished)
+        # Workers only fail on something local, e.g. the listing file can't be written
+        errors = [t.exception() for t in workers if t.done() and not t.cancelled() and t.exception() is not None]
+        for e in errors:
+            logger.error("{}: Crawl worker failed: {}".format(target, e))
+            print("\n[ERR] {}: Crawl worker failed: {}".format(target, e))
+        if not finished.done():
+            # Every connection dropped out with dirs still left to crawl, so the crawl is incomplete
+            if errors:
+                crawled['error'] = str(errors[0]) or type(errors[0]).__name__
+            else:
+                crawled['error'] = "Lost every connection with {} dirs left to crawl: {}".format(
+                    frontier.qsize(), last_error[0])
+            logger.error("{}: Crawl stopped early: {}".format(target, crawled['error']))
+            print("\n[ERR] {}: Crawl stopped early: {}".format(target, crawled['error']))
+    except (asyncio.CancelledError, KeyboardInterrupt):
+        # Interrupted, so don't wait on downloads that were only queued
+        downloads.abort()
+        raise
+    finally:
+        for task in workers + [finished]:
+            task.cancel()
+        await asyncio.gather(*[c.quit() for c in clients], return_exceptions=True)
+        # Let the download sessions finish off whatever the crawl queued up, off the event loop
+        await asyncio.get_event_loop().run_in_executor(None, downloads.close)
+    print()
+    downloads.report()
+    print("[*] {}: Crawled {} files across {} directories".format(target, crawled['files'], crawled['dirs']))
+    logger.info("{}: Crawled {} files across {} directories".format(target, crawled['files'], crawled['dirs']))
+    metrics.finish()
+    metrics.report()
+    if throttle is not None and throttle.backoffs:
+        logger.info("{}: Server asked us to slow down {} time(s), finished at {:.1f} requests/sec".format(
+            target, throttle.backoffs, throttle.rate))
+    crawled['denied'] = len(denied)
+    if denied_file is not None:
+        generate_denied_file(denied, denied_file)
+    return crawled
+
+
+async def crawl_ftpservers_async(targets, username, password, output_dir, all_files=False, include_hidden=True,
+                                 port=21, per_host=4, download_workers=2, download_rate=None, max_in_flight=100,
+                                 max_depth=None, max_entries=None, listing_format='jsonl', max_hosts=None, timeout=30, connect_timeout=None,
+                                 rate=None, max_rate=None, jitter=None, retries=3, scanner=None, scan_remote=None,
+                                 archive_max=None, store=None, reporter=None, index=None):
+    """ Crawl many FTP servers at once from a single event loop, returning {target: stats}.
+
+        Each server's matches are streamed to its own listing file in 'output_dir', as are the dirs it
+        refused to LIST to its own denied dirs file, and its stats are
+        those of crawl_ftpserver_async() plus the 'seconds' it took.
+
+        per_host            - Max concurrent LISTs (control connections) per server
+        download_workers    - Download sessions per server, see crawl_ftpserver_async()
+        download_rate       - Cap on each server's download bandwidth in bytes/sec, None for unlimited
+        max_in_flight       - Max concurrent LISTs across all servers
+        listing_format      - Listing file format, see ListingWriter
+        max_hosts           - Max servers being crawled at once, None for all of them
+        rate                - Requests/sec each server starts out at, adapting up to 'max_rate' or down
+                              from there, see AdaptiveThrottle; None to not throttle
+        jitter              - Add a random 0..jitter seconds before every request
+        retries             - Times to reconnect a lost connection, see crawl_ftpserver_async()
+        scanner             - Optional ScanPool to scan for secrets with, into a findings file per server
+        scan_remote         - See crawl_ftpserver_async()
+        archive_max         - See crawl_ftpserver_async()
+        store               - Optional DownloadStore shared by every server, see crawl_ftpserver_async()
+        reporter            - Optional StatsReporter to write each server's periodic stats lines to
+        index               - Optional CrawlIndex every server's listed files are added to
+    """
+    global_limit = asyncio.Semaphore(max_in_flight)
+    host_limit = asyncio.Semaphore(max_hosts or len(targets) or 1)
+
+    async def crawl_one(target):
+        # The listing is only opened once it's this host's turn, so hundreds of queued hosts don't hold files open
+        async with host_limit:
+            started = monotonic()
+            indexed = index.begin(target) if index is not None else None
+            listing = ListingWriter(listing_file_path(output_dir, target, listing_format), fmt=listing_format,
+                                    index=indexed)
+            findings = FindingsWriter(findings_file_path(output_dir, target)) if scanner is not None else None
+            metrics = CrawlMetrics(target)
+            if reporter is not None:
+                reporter.add(metrics)
+            try:
+                stats = await crawl_ftpserver_async(target, username, password, output_dir, global_limit,
+                                                    all_files=all_files, include_hidden=include_hidden, port=port,
+                                                    per_host=per_host, download_workers=download_workers,
+                                                    download_rate=download_rate, max_depth=max_depth,
+                                                    max_entries=max_entries,
+                                                    listing=listing, timeout=timeout,
+                                                    connect_timeout=connect_timeout,
+                                                    throttle=AdaptiveThrottle(rate, max_rate=max_rate,
+                                                                              jitter=jitter),
+                                                    retries=retries,
+                                                    denied_file=denied_file_path(output_dir, target),
+                                                    scanner=scanner, findings=findings, scan_remote=scan_remote,
+                                                    archive_max=archive_max, store=store, metrics=metrics)
+                if indexed is not None:
+                    # Waits for the index writer to catch up, so off the event loop too
+                    await asyncio.get_event_loop().run_in_executor(None, indexed.close)
+            finally:
+                listing.close()
+                if reporter is not None:
+                    reporter.remove(metrics)
+                if findings is not None:
+                    # Waits on scans still running in the pool, so off the event loop
+                    await asyncio.get_event_loop().run_in_executor(None, findings.close)
+            stats['seconds'] = monotonic() - started
+            return stats
+
+    results = await asyncio.gather(*[crawl_one(t) for t in targets])
+    return dict(zip(targets, results))
+
+
+# ==========================[ SEARCH ]========================== #
+
+def parse_size(value):
+    """ argparse type for sizes in bytes, with an optional K, M or G suffix (e.g. '512K'). """
+    units = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+    value = value.strip().upper().rstrip('B')
+    try:
+        if value and value[-1] in units:
+            return int(float(value[:-1]) * units[value[-1]])
+        return int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError("invalid size: {!r}, e.g. 4096, 512K or 10M".format(value))
+
+
+def parse_date(value):
+    """ argparse type for 'YYYY-MM-DD' or 'YYYY-MM-DD HH:MM' local times, as epoch seconds. """
+    for fmt in ('%Y-%m-%d %H:%M', '%Y-%m-%d'):
+        try:
+            return mktime(strptime(value, fmt))
+        except ValueError:
+            pass
+    raise argparse.ArgumentTypeError("invalid date: {!r}, e.g. 2026-10-17 or '2026-10-17 13:30'".format(value))
+
+
+def print_search_results(rows, fmt='table'):
+    """ Print (host, path, size, mtime, reason) rows from CrawlIndex.search() to stdout. """
+    if fmt == 'jsonl':
+        for (host, path, size, mtime, reason) in rows:
+            print(json.dumps({'host': host, 'path': path, 'size': size, 'mtime': mtime, 'reason': reason}))
+    elif fmt == 'csv':
+        writer = csv.writer(sys.stdout)
+        writer.writerow(('host', 'path', 'size', 'mtime', 'reason'))
+        writer.writerows(rows)
+    else:
+        width = max([len(r[0]) for r in rows] + [4])
+        for (host, path, size, mtime, reason) in rows:
+            print("{:<{}}  {:>12}  {:<16}  {}".format(host, width, size if size is not None else '-',
+                                                     strftime('%Y-%m-%d %H:%M', localtime(mtime))
+                                                     if mtime is not None else '-', path))
+
+
+def search_main(argv):
+    """ The 'search' subcommand: query the crawl index of an output dir, without touching any server. """
+    parser = argparse.ArgumentParser(prog="ftp_crawler.py search",
+                                     description="Search the files listed by earlier crawls, offline")
+    parser.add_argument("pattern", nargs='?',
+                        help="Glob or substring of file names, or of full paths if it has a '/' (case-insensitive)")
+    parser.add_argument('-t', "--target", dest='target',
+                        help="Only these hosts, a comma-separated list of them and CIDR ranges")
+    parser.add_argument("-e", "--ext", dest='ext',
+                        help="Only these extensions, comma-separated (e.g. kdbx,ps1,tar.gz)")
+    parser.add_argument("--min-size", dest='min_size', type=parse_size, metavar='SIZE',
+                        help="Only files of at least SIZE bytes, K/M/G suffixes allowed")
+    parser.add_argument("--max-size", dest='max_size', type=parse_size, metavar='SIZE',
+                        help="Only files of at most SIZE bytes, K/M/G suffixes allowed")
+    parser.add_argument("-n", "--new", dest='new', action='store_true',
+                        help="Only files that were new in each host's last crawl")
+    parser.add_argument("--since", dest='since', type=parse_date, metavar='DATE',
+                        help="Only files first seen by a crawl started on or after DATE (YYYY-MM-DD [HH:MM])")
+    parser.add_argument("--limit", dest='limit', type=int, default=1000, metavar='N',
+                        help="Show at most this many files (default: 1000, 0 for all)")
+    parser.add_argument("--format", dest='search_format', choices=('table', 'jsonl', 'csv'), default='table',
+                        help="Output format (default: table)")
+    parser.add_argument("-o", "--output-dir", dest='output',
+                        help="Output directory of the crawls to search (default: ./saved/)")
+    args = parser.parse_args(argv)
+
+    index_file = (Path(args.output) if args.output else SAVE_DIR) / "FTP_crawl_index.db"
+    if not index_file.is_file():
+        print("[ERR] No crawl index found, crawl a target with this output dir first: {}".format(index_file))
+        sys.exit(1)
+    index = CrawlIndex(index_file)
+    started = perf_counter()
+    try:
+        rows = index.search(args.pattern, hosts=expand_targets(args.target.split(',')) if args.target else None,
+                            extensions=args.ext.split(',') if args.ext else None, min_size=args.min_size,
+                            max_size=args.max_size, new=args.new, since=args.since, limit=args.limit or None)
+    finally:
+        index.close()
+    elapsed = perf_counter() - started
+    print_search_results(rows, args.search_format)
+    if args.search_format == 'table':
+        print("[*] {} files found in {:.0f}ms{}".format(
+            len(rows), elapsed * 1000, " (stopped at --limit {})".format(args.limit) if len(rows) == args.limit else ""))
+    return
 
 
 def crawl_ftpserver(target, username, password, output_dir, include_hidden=True):
@@ -222,15 +1656,15 @@ def crawl_ftpserver(target, username, password, output_dir, include_hidden=True)
         for (dirname, subdirs, files) in ftp.walk("/"):
             #d = ftp.getcwd()
             if DEBUG:print("[DBG] dirname var: {}".format(dirname))
-            logger.debug("dirname var: {}".format(dirname))
+            logger.debug("dirname var: %s", dirname)
             ftp.chdir(dirname)
             if subdirs:
                 if DEBUG:print("[DBG] subdirs var: {}".format(subdirs))
-                logger.debug("subdirs var: {}".format(subdirs))
+                logger.debug("subdirs var: %s", subdirs)
                 for sub in subdirs:
                     try:
                         if DEBUG:print("[DBG] Attempting to cd into subdir 'sub': {}".format(sub))
-                        logger.debug("Attempting to cd into subdir 'sub': {}".format(sub))
+                        logger.debug("Attempting to cd into subdir 'sub': %s", sub)
                         ftp.chdir(sub)
                     except ftputil.error.PermanentError as e:
                         # This is typically a 550 permission denied error, just skip this dir
@@ -245,11 +1679,11 @@ def crawl_ftpserver(target, username, password, output_dir, include_hidden=True)
                     else:
                         print()
                     if DEBUG:print("[DBG] files var: {}".format(files))
-                    logger.debug("files var: {}".format(files))
+                    logger.debug("files var: %s", files)
                     for f in files:
                         #if f.startswith(SEARCH_FILE):
                         if DEBUG:print("[DBG] f var: {}".format(f))
-                        logger.debug("f var: {}".format(f))
+                        logger.debug("f var: %s", f)
                         (directory, fname) = os.path.split(f)
                         if fname in INTERESTING_FILES:
                             print("[*] Downloading matching file: {}".format(fname))
@@ -268,7 +1702,7 @@ def crawl_ftpserver(target, username, password, output_dir, include_hidden=True)
                     #ftp.chdir(ftp.pardir)
                     ftp.chdir("..")
                     if DEBUG:print("[DBG] CD'ed up, CWD: {}".format(ftp.getcwd()))
-                    logger.debug("CD'ed up, CWD: {}".format(ftp.getcwd()))
+                    logger.debug("CD'ed up, CWD: %s", ftp.getcwd())
                     sleep(delay(max=2))
             else:
                 # No subdirs, so just enumerate files in this main 'dirname' directory
@@ -278,7 +1712,7 @@ def crawl_ftpserver(target, username, password, output_dir, include_hidden=True)
                 print("---------------")
                 for f in files:
                     if DEBUG:print("[DBG] f var: {}".format(f))
-                    logger.debug("f var: {}".format(f))
+                    logger.debug("f var: %s", f)
                     #(directory, fname) = os.path.split(f)
                     full_filename = ftp.path.join(dirname, f)
                     if f in INTERESTING_FILES:
@@ -298,7 +1732,7 @@ def crawl_ftpserver(target, username, password, output_dir, include_hidden=True)
                         matches.append(full_filename)
             print("------------------------------\n\n")
             if DEBUG:print("[DBG] CWD is: {}".format(ftp.getcwd()))
-            logger.debug("CWD is: {}".format(ftp.getcwd()))
+            logger.debug("CWD is: %s", ftp.getcwd())
             sleep(delay(max=2))
         ftp.chdir("..")
         sleep(delay(max=2))
@@ -314,6 +1748,10 @@ def crawl_ftpserver(target, username, password, output_dir, include_hidden=True)
 
 
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] == 'search':
+        # Offline queries of the crawl index, nothing to connect to
+        search_main(sys.argv[2:])
+        return
     print("[*] FTP Crawler is now launching...")
     if DEBUG:
         logger.setLevel(logging.DEBUG)
@@ -334,34 +1772,95 @@ def main():
         logger.addHandler(ch)
     logger.debug('Logger initialized')
 
-    parser = argparse.ArgumentParser(description="FTP crawler for files of interest to review or download")
-    parser.add_argument('-t', "--target", dest='target', help='IP/URL of FTP server target')
+    parser = argparse.ArgumentParser(description="FTP crawler for files of interest to review or download",
+                                     epilog="Search what earlier crawls listed with: ftp_crawler.py search -h")
+    parser.add_argument('-t', "--target", dest='target',
+                        help='IP/URL of FTP server target, or a comma-separated list of them and CIDR ranges')
+    parser.add_argument("-T", "--targets-file", dest='targets_file',
+                        help="File of targets (IPs, host names or CIDR ranges), one per line")
     parser.add_argument("-u", "--user", dest='user', default="anonymous", help="Auth username (default: anonymous)")
     parser.add_argument("-p", "--pass", dest='password', default="anonymous", help="Auth password (default: anonymous)")
+    parser.add_argument("--port", dest='port', type=int, default=21, help="FTP server port (default: 21)")
 
     parser.add_argument('-a', '--all-files', dest='all_files', action='store_true',
                         help='Toggle listing all files instead of only matched patterns')
     parser.add_argument("-f", "--download-file", dest='dl_file', help="Specify a single remote file to download (full path) and skip full crawl")
     parser.add_argument("-o", "--output-dir", dest='output',
                         help="Specify output directory for saving downloaded files")
+    parser.add_argument("-w", "--workers", dest='workers', type=int, default=1,
+                        help="Number of FTP sessions crawling directories in parallel (default: 1)")
+    parser.add_argument("--download-workers", dest='download_workers', type=int, default=2,
+                        help="Number of FTP sessions downloading files of interest during the crawl (default: 2)")
+    parser.add_argument("--download-rate", dest='download_rate', type=int,
+                        help="Cap download bandwidth to the target at this many KB/s (default: unlimited)")
+    parser.add_argument("--rate", dest='rate', type=float, default=50,
+                        help="Requests/sec to start each target at, adapting to how it responds (default: 50, 0 for unlimited)")
+    parser.add_argument("--max-rate", dest='max_rate', type=float, default=500,
+                        help="Requests/sec a responsive target can be sped up to (default: 500)")
+    parser.add_argument("--stealth", dest='stealth', type=float, metavar='SECS',
+                        help="Add a random 0..SECS second delay before every request (default: off)")
+    parser.add_argument("--resume", dest='resume', action='store_true',
+                        help="Resume an interrupted crawl of the target from its checkpoint in the output dir")
+    parser.add_argument("-i", "--incremental", dest='incremental', action='store_true',
+                        help="Only re-LIST dirs changed since the last --incremental crawl and report what changed")
+    parser.add_argument("--max-depth", dest='max_depth', type=int, default=64,
+                        help="Don't descend into dirs more than this many levels deep (default: 64)")
+    parser.add_argument("--max-entries", dest='max_entries', type=int, default=0,
+                        help="Only crawl this many entries of any one dir (default: 0, unlimited)")
+    parser.add_argument("--format", dest='listing_format', choices=('jsonl', 'csv', 'txt'), default='jsonl',
+                        help="Listing file format, jsonl/csv include size, mtime and match reason (default: jsonl)")
+    parser.add_argument("--max-connections", dest='max_connections', type=int, default=64,
+                        help="Max FTP sessions open across all targets, which caps how many are crawled at once (default: 64)")
+    parser.add_argument("--connect-timeout", dest='connect_timeout', type=float, default=10,
+                        help="Seconds to wait for connect and login, so dead hosts fail fast (default: 10)")
+    parser.add_argument("--timeout", dest='timeout', type=float,
+                        help="Seconds to wait on any later FTP command or transfer (default: none, 30 with --async)")
+    parser.add_argument("--retries", dest='retries', type=int, default=3,
+                        help="Times to reconnect and retry after a dropped connection, timeout or 4xx reply (default: 3)")
+    parser.add_argument("--scan", dest='scan', action='store_true',
+                        help="Scan downloaded files for secrets (private keys, passwords, connection strings...)")
+    parser.add_argument("--scan-remote", dest='scan_remote', type=int, default=0, metavar='KB',
+                        help="Also scan the first KB of listed text files that aren't downloaded, implies --scan (default: 0, off)")
+    parser.add_argument("--scan-max", dest='scan_max', type=int, default=4096, metavar='KB',
+                        help="Never scan more than this many KB of any one file (default: 4096)")
+    parser.add_argument("--scan-workers", dest='scan_workers', type=int,
+                        help="Number of scanner processes (default: one per CPU)")
+    parser.add_argument("--archives", dest='archives', action='store_true',
+                        help="List and pattern match the members of listed zip/tar archives, without downloading them")
+    parser.add_argument("--archive-max", dest='archive_max', type=int, default=64, metavar='MB',
+                        help="Never fetch more than this many MB of an archive to list it (default: 64)")
+    parser.add_argument("--stats", dest='stats', type=float, default=0, metavar='SECS',
+                        help="Every SECS seconds, append a JSON line of each crawl's metrics to FTP_stats_<date>.jsonl")
+    parser.add_argument("--profile", dest='profile', metavar='FILE',
+                        help="Run under cProfile, saving the stats to FILE and printing the top functions")
+    parser.add_argument("--async", dest='use_async', action='store_true',
+                        help="Use the asyncio crawler, with --workers connections per host")
+    parser.add_argument("--max-in-flight", dest='max_in_flight', type=int, default=100,
+                        help="With --async, max concurrent LISTs overall (default: 100)")
 
     parser.add_argument('--version', action='version', version='%(prog)s 1.0')
     parser.add_argument("-d", "--debug", action="store_true",
                         help="Display error information")
     args = parser.parse_args()
 
-    if not args.target:
+    targets = expand_targets(args.target.split(',') if args.target else [])
+    if args.targets_file:
+        with open(args.targets_file) as fl:
+            targets = expand_targets(targets + fl.read().splitlines())
+    if not targets:
         parser.print_help()
         sys.exit(1)
+    if (args.resume or args.incremental) and args.use_async:
+        parser.error("--resume and --incremental are only supported by the default (non --async) crawler")
+    if args.dl_file and len(targets) > 1:
+        parser.error("--download-file takes a single target")
     
     if args.output:
         output_dir = Path(args.output)
     else:
         output_dir = SAVE_DIR
-    logger.debug("var output_dir: {}".format(output_dir))
-
-    ftp_target = args.target
-    logger.debug("var ftp_target: {}".format(ftp_target))
+    logger.debug("var output_dir: %s", output_dir)
+    logger.debug("var targets: %s", targets)
 
     if not output_dir.is_dir():
         print("[*] Output directory doesn't exist, so creating it first")
@@ -374,23 +1873,117 @@ def main():
         print("[ERR] Failed to create save directory, fix and try again")
         sys.exit(1)
     
-    LISTING_FILE_NAME = "FTP_Files_listing_" + ftp_target + "_" + strftime('%Y%m%d') + ".txt"
-    LISTING_FILE = output_dir / LISTING_FILE_NAME
+    CACHE_FILE = output_dir / "FTP_listing_cache.db"
+    SUMMARY_FILE = output_dir / ("FTP_batch_summary_" + strftime('%Y%m%d_%H%M%S') + ".csv")
+    STATS_FILE = output_dir / ("FTP_stats_" + strftime('%Y%m%d_%H%M%S') + ".jsonl")
+    INDEX_FILE = output_dir / "FTP_crawl_index.db"
 
     u = args.user if args.user else "anonymous"
     p = args.password if args.password else "anonymous"
+    download_rate = args.download_rate * 1024 if args.download_rate else None
+    scan_remote = args.scan_remote * 1024 if args.scan_remote else None
+    archive_max = args.archive_max * 1024 * 1024 if args.archives else None
+    scanner = None
+    if (args.scan or args.scan_remote) and not args.dl_file:
+        # One pool of scanner processes shared by every target
+        scanner = ScanPool(SECRET_PATTERNS, max_bytes=args.scan_max * 1024, workers=args.scan_workers)
+    # One store shared by every target, so a file mirrored across hosts is only downloaded once
+    store = DownloadStore(output_dir) if not args.dl_file else None
+    index = CrawlIndex(INDEX_FILE) if not args.dl_file else None
+    reporter = StatsReporter(STATS_FILE, interval=args.stats) if args.stats else None
+    profiler = enable_profiling(args.profile) if args.profile else None
 
-    if args.dl_file:
-        download_remote_file(ftp_target, u, p, args.dl_file, output_dir)
-    else:
-        if args.all_files:
-            results = crawl_ftpserver_with_report(ftp_target, u, p, output_dir, all_files=True)
+    def crawl_target(ftp_target):
+        """ Crawl one target with the command line options, each into its own listing/checkpoint files. """
+        LISTING_FILE = listing_file_path(output_dir, ftp_target, args.listing_format)
+        CHECKPOINT_FILE = output_dir / ("FTP_crawl_state_" + ftp_target + ".db")
+        CHANGES_FILE = output_dir / ("FTP_Files_changes_" + ftp_target + "_" + strftime('%Y%m%d') + ".txt")
+        DENIED_FILE = denied_file_path(output_dir, ftp_target)
+        FINDINGS_FILE = findings_file_path(output_dir, ftp_target)
+        if args.resume and not CHECKPOINT_FILE.is_file():
+            print("[*] {}: No checkpoint found for this target, starting a fresh crawl".format(ftp_target))
+        elif args.resume:
+            print("[*] {}: Resuming crawl from checkpoint: {}".format(ftp_target, CHECKPOINT_FILE))
+        checkpoint = CrawlCheckpoint(CHECKPOINT_FILE, resume=args.resume)
+        cache = ListingCache(CACHE_FILE, "{}:{}".format(ftp_target, args.port)) if args.incremental else None
+        # A resumed crawl adds to the listing it had already written
+        # Left unfinished if the crawl is interrupted, so a --resume carries on the same crawl in the index
+        indexed = index.begin(ftp_target, resume=args.resume)
+        listing = ListingWriter(LISTING_FILE, fmt=args.listing_format, append=args.resume, index=indexed)
+        findings = FindingsWriter(FINDINGS_FILE) if scanner is not None else None
+        metrics = CrawlMetrics(ftp_target)
+        if reporter is not None:
+            reporter.add(metrics)
+        try:
+            stats = crawl_ftpserver_with_report(ftp_target, u, p, output_dir, all_files=args.all_files,
+                                                workers=args.workers, port=args.port,
+                                                download_workers=args.download_workers,
+                                                download_rate=download_rate, checkpoint=checkpoint, cache=cache,
+                                                max_depth=args.max_depth, max_entries=args.max_entries or None,
+                                                listing=listing, timeout=args.timeout,
+                                                connect_timeout=args.connect_timeout,
+                                                throttle=AdaptiveThrottle(args.rate, max_rate=args.max_rate,
+                                                                          jitter=args.stealth),
+                                                retries=args.retries, denied_file=DENIED_FILE, scanner=scanner,
+                                                findings=findings, scan_remote=scan_remote, archive_max=archive_max,
+                                                store=store, metrics=metrics)
+            indexed.close()
+        finally:
+            listing.close()
+            if reporter is not None:
+                reporter.remove(metrics)
+            if findings is not None:
+                findings.close()
+        if cache is not None and not cache.first_crawl:
+            generate_changes_file(cache.changes, CHANGES_FILE)
+        return stats
+
+    try:
+        if args.dl_file:
+            download_remote_file(targets[0], u, p, args.dl_file, output_dir, port=args.port)
+        elif args.use_async:
+            results = asyncio.run(crawl_ftpservers_async(
+                targets, u, p, output_dir, all_files=args.all_files, port=args.port,
+                per_host=args.workers, download_workers=args.download_workers, download_rate=download_rate,
+                max_in_flight=args.max_in_flight, max_depth=args.max_depth, max_entries=args.max_entries or None,
+                listing_format=args.listing_format,
+                max_hosts=max(1, args.max_connections // (args.workers + args.download_workers)),
+                timeout=args.timeout or 30,
+                connect_timeout=args.connect_timeout, rate=args.rate, max_rate=args.max_rate, jitter=args.stealth,
+                retries=args.retries, scanner=scanner, scan_remote=scan_remote, archive_max=archive_max,
+                store=store, reporter=reporter, index=index))
+            print("[*] Finished crawling FTP server(s)")
+            if len(targets) > 1:
+                generate_batch_summary(results, SUMMARY_FILE)
+        elif len(targets) == 1:
+            # A single target runs in the main thread, so a Ctrl-C gets to checkpoint it on the way out
+            crawl_target(targets[0])
+            print("[*] Finished crawling FTP server")
         else:
-            results = crawl_ftpserver_with_report(ftp_target, u, p, output_dir)
-        print("[*] Finished crawling FTP server")
-        generate_listing_file(results, LISTING_FILE)
-        # This assumes that we ran crawl_ftpserver_with_report() and saved file list
-        print("[*] List of all files on FTP server are in saved file for review: {}".format(output_dir / LISTING_FILE))
+            # Each host uses --workers crawl sessions plus --download-workers download sessions
+            max_hosts = max(1, args.max_connections // (args.workers + args.download_workers))
+            print("[*] Crawling {} targets, {} at a time".format(len(targets), max_hosts))
+            results = run_batch(targets, crawl_target, max_hosts)
+            print("[*] Finished crawling FTP servers")
+            generate_batch_summary(results, SUMMARY_FILE)
+    finally:
+        # Also on a Ctrl-C or crash, so what was already listed isn't lost from the index writer's queue
+        # or the store's uncommitted manifest, and a --resume carries on from there
+        if store is not None:
+            store.close()
+        if index is not None:
+            index.close()
+    if scanner is not None:
+        scanner.close()
+    if store is not None:
+        store.report()
+    if index is not None:
+        print("[*] Listed files were added to the crawl index, query it with 'ftp_crawler.py search': {}".format(
+            INDEX_FILE))
+    if reporter is not None:
+        reporter.close()
+    if profiler is not None:
+        profiler.close()
     logger.debug('Program end')
     return
 
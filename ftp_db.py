@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ==============================================================================
+# File:         ftp_db.py
+# Author:       Cashiuus
+# Created:      17-Oct-2026     -     Revised:
+#
+# Depends:      n/a
+# Compat:       3.7+
+#
+#-[ Usage ]---------------------------------------------------------------------
+#
+#   What the crawl's SQLite databases (checkpoint, listing cache, download store
+#   and crawl index) have in common: one connection shared by every worker under
+#   a lock, with writes committed in batches rather than one at a time.
+#
+#       class ListingCache(SQLiteDB):
+#           def __init__(self, db_file, host, commit_interval=2.0):
+#               SQLiteDB.__init__(self, db_file, SCHEMA, commit_interval)
+#
+# ==============================================================================
+import sqlite3
+import threading
+from time import monotonic
+
+
+class SQLiteDB(object):
+    """ Thread-safe SQLite database, its writes committed every 'commit_interval' seconds and on close().
+
+        db_file             - Database file, created if it doesn't exist
+        schema              - SQL script run once connected, e.g. to create any missing tables
+        commit_interval     - Seconds between commits, so a crash loses at most that much (Default: 2.0)
+    """
+    def __init__(self, db_file, schema, commit_interval=2.0):
+        self.db_file = db_file
+        self.commit_interval = commit_interval
+        self._lock = threading.Lock()
+        self._last_commit = monotonic()
+        self._conn = sqlite3.connect(str(db_file), check_same_thread=False)
+        self._conn.executescript(schema)
+        self._conn.commit()
+
+    def _maybe_commit(self):
+        # Called with the lock held; one commit per write would make large crawls disk-bound
+        if monotonic() - self._last_commit >= self.commit_interval:
+            self._commit()
+
+    def _commit(self):
+        # Called with the lock held
+        self._conn.commit()
+        self._last_commit = monotonic()
+
+    def close(self):
+        """ Commit and close the database. Anything written after that is quietly ignored. """
+        with self._lock:
+            if self._conn is not None:
+                self._conn.commit()
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ==============================================================================
+# File:         ftp_index.py
+# Author:       Cashiuus
+# Created:      17-Oct-2026     -     Revised:
+#
+# Depends:      n/a
+# Compat:       3.7+ (SQLite 3.24+, and 3.34+ for the trigram search index)
+#
+#-[ Usage ]---------------------------------------------------------------------
+#
+#   Queryable index of every file the crawls listed, on every host, so finding
+#   something afterwards doesn't take another crawl or grepping listing files.
+#   Each crawl adds what it lists (all files with --all-files, else its matches)
+#   to FTP_crawl_index.db in the output dir, with the size, mtime, match reason
+#   and the crawl each file was first and last seen in:
+#
+#       index = CrawlIndex(output_dir / "FTP_crawl_index.db")
+#       writer = index.begin("10.10.1.20")
+#       writer.add(records)             # (path, size, mtime, reason) records, as in the listing file
+#       writer.close()
+#       rows = index.search("*.kdbx", min_size=1024, new=True)
+#       index.close()
+#
+#   Dir paths are stored once in their own table rather than with every file,
+#   and file names get a trigram full-text index, so globs and substrings
+#   anywhere in a name take milliseconds over millions of files. The full-text
+#   index is filled in bulk as each crawl finishes, as doing it row by row
+#   would make the crawl itself several times slower to index.
+#
+# ==============================================================================
+import json
+import logging
+import queue
+import re
+import sqlite3
+import threading
+from time import time
+
+from ftp_db import SQLiteDB
+from ftp_metrics import profiled
+
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS crawls (id INTEGER PRIMARY KEY, host TEXT NOT NULL, started REAL NOT NULL, finished REAL,
+                                   first_file INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS dirs (id INTEGER PRIMARY KEY, host TEXT NOT NULL, path TEXT NOT NULL, UNIQUE (host, path));
+CREATE TABLE IF NOT EXISTS files (id INTEGER PRIMARY KEY, dir INTEGER NOT NULL, name TEXT NOT NULL, ext TEXT,
+                                  size INTEGER, mtime REAL, reason TEXT, first_crawl INTEGER, last_crawl INTEGER,
+                                  UNIQUE (dir, name));
+CREATE INDEX IF NOT EXISTS files_by_ext ON files (ext);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value);
+"""
+# Names only, rows are never deleted or renamed so an external content table is safe
+NAMES_SCHEMA = "CREATE VIRTUAL TABLE IF NOT EXISTS names USING fts5(name, content='files', content_rowid='id', " \
+               "tokenize='trigram', detail='none')"
+UPSERT_FILE = """
+INSERT INTO files (dir, name, ext, size, mtime, reason, first_crawl, last_crawl) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (dir, name) DO UPDATE SET size = excluded.size, mtime = excluded.mtime, reason = excluded.reason,
+                                      last_crawl = excluded.last_crawl
+"""
+# The shortest run of plain characters the trigram index can look up
+MIN_LITERAL = 3
+
+
+def file_ext(name):
+    """ Lowercase extension of a file name without its dot, '' if it has none. """
+    (stem, dot, ext) = name.rpartition('.')
+    return ext.lower() if dot and stem else ''
+
+
+def glob_pattern(pattern):
+    """ Turn a search pattern into (glob, whole_path), the lowercase SQLite GLOB and whether it's matched on paths.
+
+        A pattern with a '/' is matched against the full path, anywhere below the root unless
+        it starts with '/'. Any other pattern is matched against file names, as a substring if
+        it has no wildcards ('*', '?' or '[...]'). As in fnmatch, '*' also matches across '/'.
+    """
+    pattern = pattern.lower()
+    if '/' in pattern:
+        if not pattern.startswith(('/', '*')):
+            pattern = '*/' + pattern
+        return (pattern, True)
+    if not any(c in pattern for c in '*?['):
+        pattern = '*' + pattern + '*'
+    return (pattern, False)
+
+
+def glob_ext(glob):
+    """ The extension every match of a glob ends in, e.g. 'log' for '*.log', else None. """
+    match = re.search(r'\.([^*?\[\]/.]+)$', glob)
+    return match.group(1) if match else None
+
+
+def longest_literal(glob):
+    """ Longest run of plain characters in a glob, which every match has to contain. """
+    # '%' and '_' are split on too, they'd be wildcards in the LIKE it's looked up with
+    return max(re.split(r'\[[^\]]*\]?|[*?/%_]', glob), key=len)
+
+
+class IndexWriter(object):
+    """ Adds one crawl's listed files to the index, see CrawlIndex.begin(). """
+    def __init__(self, index, host, crawl_id):
+        self.index = index
+        self.host = host
+        self.crawl_id = crawl_id
+        self.count = 0
+
+    def add(self, records):
+        """ Queue (path, size, mtime, reason) records to be indexed, e.g. one dir's worth as written to the listing. """
+        self.index.put('add', self.host, self.crawl_id, records)
+        self.count += len(records)
+
+    def close(self):
+        """ Mark the crawl finished, once everything it added has been indexed. """
+        done = threading.Event()
+        self.index.put('finish', self.host, self.crawl_id, done)
+        # Not for ever, should the writer die before it gets to it
+        while not done.wait(1) and self.index.writer_alive():
+            pass
+        logger.info("Indexed {} files of {} in {}".format(self.count, self.host, self.index.db_file))
+
+
+class CrawlIndex(SQLiteDB):
+    """ Thread-safe SQLite index of the files listed by every crawl, shared by every target of a run.
+
+        db_file             - Index database, added to by each run using the same output dir
+        max_queued          - Dirs' worth of records that can wait for the writer before IndexWriter.add() blocks
+
+        Records are written by one background thread, so the crawl workers that list them only have to
+        queue them; SQLite lets go of the GIL while it works, so indexing mostly overlaps the crawl.
+    """
+    def __init__(self, db_file, commit_interval=2.0, max_queued=1000):
+        SQLiteDB.__init__(self, db_file, SCHEMA, commit_interval)
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._thread = None
+        try:
+            self._conn.execute(NAMES_SCHEMA)
+            self.fts = True
+        except sqlite3.OperationalError as e:
+            # No FTS5 or no trigram tokenizer in this SQLite build, searches just scan instead
+            logger.info("No full-text index of names, searches will scan: {}".format(e))
+            self.fts = False
+        with self._lock:
+            # Catches up after a crawl that was killed before it could index its names
+            self._index_names()
+        self._conn.commit()
+
+    def _index_names(self):
+        """ Add the names of files indexed since last time to the full-text index, in one go. Called with the lock held. """
+        if not self.fts:
+            return
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'names_indexed'").fetchone()
+        indexed = row[0] if row is not None else 0
+        last = self._conn.execute("SELECT max(id) FROM files").fetchone()[0] or 0
+        if last > indexed:
+            self._conn.execute("INSERT INTO names (rowid, name) SELECT id, name FROM files WHERE id > ?", (indexed,))
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('names_indexed', ?)", (last,))
+
+    def begin(self, host, resume=False):
+        """ Start indexing a crawl of 'host', returning the IndexWriter to add its files with.
+
+            resume          - Carry on the host's last crawl if it never finished, as with --resume
+        """
+        with self._lock:
+            row = None
+            if resume:
+                row = self._conn.execute("SELECT id FROM crawls WHERE host = ? AND finished IS NULL "
+                                         "AND id = (SELECT max(id) FROM crawls WHERE host = ?)",
+                                         (host, host)).fetchone()
+            if row is not None:
+                crawl_id = row[0]
+            else:
+                # Files are never deleted, so any file this crawl is the first to see gets a higher id than this
+                first_file = self._conn.execute("SELECT max(id) FROM files").fetchone()[0] or 0
+                crawl_id = self._conn.execute("INSERT INTO crawls (host, started, first_file) VALUES (?, ?, ?)",
+                                              (host, time(), first_file)).lastrowid
+            self._conn.commit()
+            if self._thread is None:
+                self._thread = threading.Thread(target=profiled(self._writer), daemon=True)
+                self._thread.start()
+        return IndexWriter(self, host, crawl_id)
+
+    def put(self, kind, host, crawl_id, arg):
+        """ Queue an 'add' of records or the 'finish' of a crawl for the writer, blocking while the queue is full.
+            Once the writer has died, nothing is queued, and a 'finish' is set straight away.
+        """
+        while self.writer_alive():
+            try:
+                self._queue.put((kind, host, crawl_id, arg), timeout=1)
+                return
+            except queue.Full:
+                pass
+        if kind == 'finish':
+            arg.set()
+
+    def writer_alive(self):
+        """ Whether the writer thread is still there to index what's queued. """
+        return self._thread is not None and self._thread.is_alive()
+
+    def _add(self, host, crawl_id, records):
+        """ Index (path, size, mtime, reason) records, quietly ignored once closed. Called with the lock held. """
+        if self._conn is None:
+            return
+        by_dir = {}
+        for (path, size, mtime, reason) in records:
+            (dirname, _, name) = path.rpartition('/')
+            by_dir.setdefault(dirname, []).append((name, size, mtime, reason))
+        for (dirname, files) in by_dir.items():
+            self._conn.execute("INSERT OR IGNORE INTO dirs (host, path) VALUES (?, ?)", (host, dirname))
+            dir_id = self._conn.execute("SELECT id FROM dirs WHERE host = ? AND path = ?", (host, dirname)).fetchone()[0]
+            self._conn.executemany(UPSERT_FILE, [(dir_id, name, file_ext(name), size, mtime, reason, crawl_id, crawl_id)
+                                                 for (name, size, mtime, reason) in files])
+        self._maybe_commit()
+
+    def _finish(self, crawl_id):
+        # Called with the lock held
+        if self._conn is None:
+            return
+        self._conn.execute("UPDATE crawls SET finished = ? WHERE id = ?", (time(), crawl_id))
+        self._index_names()
+        self._commit()
+
+    def _writer(self):
+        try:
+            while True:
+                (kind, host, crawl_id, arg) = self._queue.get()
+                if kind == 'stop':
+                    return
+                try:
+                    with self._lock:
+                        if kind == 'finish':
+                            self._finish(crawl_id)
+                        else:
+                            self._add(host, crawl_id, arg)
+                except sqlite3.Error as e:
+                    # e.g. a full disk; the listing file still has everything, so never worth failing the crawl over
+                    logger.error("Failed to index files of {}: {}".format(host, e))
+                finally:
+                    if kind == 'finish':
+                        arg.set()
+        except Exception as e:
+            logger.error("Index writer failed, nothing more will be indexed: {!r}".format(e))
+            # Let go of any crawl still waiting on its 'finish'
+            while True:
+                try:
+                    (kind, _, _, arg) = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if kind == 'finish':
+                    arg.set()
+
+    def _new_files(self, where, params):
+        """ Restrict a search to files first seen in each host's last crawl, compared with the crawl before it. """
+        # The crawls since the last finished one before each host's latest, hosts crawled only once have nothing
+        # to compare with. Crawl ids are per host, so one IN on them is enough to tell the files apart by.
+        crawls = self._conn.execute(
+            "SELECT c.id, c.first_file FROM crawls c JOIN (SELECT b.host, max(b.id) AS baseline FROM crawls b "
+            "WHERE b.finished IS NOT NULL AND b.id < (SELECT max(id) FROM crawls WHERE host = b.host) "
+            "GROUP BY b.host) USING (host) WHERE c.id > baseline").fetchall()
+        if not crawls:
+            return False
+        self._first_seen(where, params, min(c[1] for c in crawls))
+        where.append("f.first_crawl IN ({})".format(", ".join('?' * len(crawls))))
+        params.extend(c[0] for c in crawls)
+        return True
+
+    def _first_seen(self, where, params, first_file):
+        # Files first seen after a crawl started are all above its 'first_file', so a range of ids finds them
+        where.append("f.id > ?")
+        params.append(first_file)
+
+    def search(self, pattern=None, hosts=None, extensions=None, min_size=None, max_size=None, new=False,
+               since=None, limit=None):
+        """ Find indexed files, returning (host, path, size, mtime, reason) rows sorted by host and path.
+
+            pattern         - Glob or substring of file names, or of full paths if it has a '/', see glob_pattern()
+            hosts           - Only these hosts
+            extensions      - Only files with one of these extensions, e.g. ['kdbx', '.tar.gz']
+            min_size        - Only files at least this many bytes
+            max_size        - Only files at most this many bytes
+            new             - Only files that were new in each host's last crawl
+            since           - Only files first seen by a crawl started at or after this epoch time
+            limit           - Return at most this many rows
+        """
+        where, params = [], []
+        # New files are few, so when asked for they're looked up by their range of ids and the other indexes are
+        # left out of it ('+' makes a column unindexable); the planner has no way to tell a crawl added only a few
+        by_crawl = new or since is not None
+        ext_column = "+f.ext" if by_crawl else "f.ext"
+        if pattern:
+            (glob, whole_path) = glob_pattern(pattern)
+            literal = longest_literal(glob)
+            ext = glob_ext(glob)
+            if ext is not None:
+                # Streams from the extension index, where a trigram lookup of something as common as '.log'
+                # would have to gather every match before the LIMIT could cut it short
+                where.append(ext_column + " = ?")
+                params.append(ext)
+            elif self.fts and not by_crawl and len(literal) >= MIN_LITERAL:
+                # Narrow it down through the indexes first, the GLOB below then only checks the candidates
+                names = "f.id IN (SELECT rowid FROM names WHERE name LIKE ?)"
+                if whole_path:
+                    where.append("(f.dir IN (SELECT id FROM dirs WHERE path LIKE ?) OR {})".format(names))
+                    params.append('%' + literal + '%')
+                else:
+                    where.append(names)
+                params.append('%' + literal + '%')
+            where.append("lower(d.path || '/' || f.name) GLOB ?" if whole_path else "lower(f.name) GLOB ?")
+            params.append(glob)
+        if hosts:
+            # One JSON parameter rather than one per host, a CIDR range can be more than SQLite takes
+            where.append("f.dir IN (SELECT id FROM dirs WHERE host IN (SELECT value FROM json_each(?)))")
+            params.append(json.dumps(list(hosts)))
+        if extensions:
+            exts = [e.lower().lstrip('.') for e in extensions]
+            single = [e for e in exts if '.' not in e]
+            terms = [ext_column + " IN ({})".format(", ".join('?' * len(single)))] if single else []
+            params.extend(single)
+            for e in exts:
+                if '.' in e:
+                    # e.g. tar.gz, only the last part is stored as the extension
+                    terms.append("({} = ? AND lower(f.name) GLOB ?)".format(ext_column))
+                    params.extend((e.rpartition('.')[2], '*.' + e))
+            where.append("(" + " OR ".join(terms) + ")")
+        if min_size is not None:
+            where.append("f.size >= ?")
+            params.append(min_size)
+        if max_size is not None:
+            where.append("f.size <= ?")
+            params.append(max_size)
+        with self._lock:
+            if new and not self._new_files(where, params):
+                return []
+            if since is not None:
+                row = self._conn.execute("SELECT min(id), min(first_file) FROM crawls WHERE started >= ?",
+                                         (since,)).fetchone()
+                if row[0] is None:
+                    return []
+                self._first_seen(where, params, row[1])
+                where.append("f.first_crawl >= ?")
+                params.append(row[0])
+            # CROSS JOIN keeps files as the outer loop, every condition is on it and each dir is then one lookup
+            sql = "SELECT d.host, d.path || '/' || f.name, f.size, f.mtime, f.reason FROM files f " \
+                  "CROSS JOIN dirs d ON d.id = f.dir"
+            if where:
+                sql += " WHERE " + " AND ".join(where)
+            if limit:
+                # Sorting every match of a broad search just to show the first few would cost more than the search
+                sql += " LIMIT ?"
+                params.append(limit)
+            rows = self._conn.execute(sql, params).fetchall()
+        rows.sort(key=lambda r: (r[0], r[1]))
+        return rows
+
+    def close(self):
+        """ Index whatever is still queued and close the database. """
+        if self._thread is not None:
+            self.put('stop', None, None, None)
+            self._thread.join()
+        with self._lock:
+            if self._conn is not None:
+                self._index_names()
+        SQLiteDB.close(self)
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ==============================================================================
+# File:         ftp_match.py
+# Author:       Cashiuus
+# Created:      17-Oct-2026     -     Revised:
+#
+# Depends:      n/a
+# Compat:       3.7+
+#
+#-[ Usage ]---------------------------------------------------------------------
+#
+#   File name matching for the crawler, compiled once from the pattern lists in
+#   config.py and then applied to a whole directory's file list at a time.
+#
+#       matcher = FileMatcher(INTERESTING_EXTENSIONS, INTERESTING_FILENAMES,
+#                             EXCLUDE_FILES, EXCLUDE_PATTERNS, APPDATA)
+#       matches, downloads = matcher.match_dir("/some/dir", ["a.zip", "web.config"])
+#       # matches == [('a.zip', 'extension'), ('web.config', 'filename')], downloads == ['web.config']
+#
+#   All comparisons are case-insensitive, since most of what we're after lives on
+#   Windows hosts (e.g. NTUSER.DAT vs ntuser.dat).
+#
+#   See benchmarks/bench_match.py for the per-million-filename cost.
+#
+# ==============================================================================
+import fnmatch
+import re
+
+
+class FileMatcher(object):
+    """ Pre-compiled matcher for the file names of one remote directory at a time.
+
+        extensions          - Interesting extensions, including multi-part ones like '.tar.gz'
+        filenames           - Exact names that are both listed and downloaded
+        exclude_files       - Exact names never listed for their extension alone
+        exclude_patterns    - Globs (e.g. 'thumbcache_*') never listed for their extension alone
+        path_rules          - Path fragments (e.g. 'AppData/Roaming/Microsoft/Protect') that mark everything
+                              beneath them, or that one file, as interesting wherever they appear in a path
+    """
+    def __init__(self, extensions=(), filenames=(), exclude_files=(), exclude_patterns=(), path_rules=()):
+        # Extensions are indexed by their last dotted part, so a name costs one dict lookup and,
+        # only on a hit, an endswith() against the few full suffixes ending in that part (e.g. '.tar.gz')
+        self._ext_index = {}
+        for ext in extensions:
+            ext = ext.lower()
+            self._ext_index.setdefault(ext[ext.rfind('.'):], []).append(ext)
+        self._ext_index = {k: tuple(v) for k, v in self._ext_index.items()}
+        self._filenames = frozenset(name.lower() for name in filenames)
+        self._exclude_files = frozenset(name.lower() for name in exclude_files)
+        self._exclude_regex = None
+        if exclude_patterns:
+            self._exclude_regex = re.compile('|'.join(fnmatch.translate(p.lower()) for p in exclude_patterns))
+        self._path_regex = None
+        self._path_rule_names = frozenset()
+        rules = [r.strip('/').lower() for r in path_rules if r.strip('/')]
+        if rules:
+            self._path_regex = re.compile('(?:^|/)(?:{})(?:/|$)'.format('|'.join(re.escape(r) for r in rules)))
+            # Rules naming a single file can only match when the file name is the rule's last part
+            self._path_rule_names = frozenset(r.rsplit('/', 1)[-1] for r in rules)
+
+    def has_interesting_extension(self, lname):
+        """ Whether an already lower-cased file name ends in one of the interesting extensions. """
+        dot = lname.rfind('.')
+        if dot <= 0:
+            return False
+        candidates = self._ext_index.get(lname[dot:])
+        return candidates is not None and lname.endswith(candidates)
+
+    def is_excluded(self, lname):
+        if lname in self._exclude_files:
+            return True
+        return self._exclude_regex is not None and self._exclude_regex.match(lname) is not None
+
+    def match_dir(self, dirname, files, all_files=False):
+        """ Pattern match the file names of one remote directory.
+
+            Returns (matches, downloads): 'matches' is a list of (name, reason) where reason is one of
+            'filename', 'path', 'extension' or 'all', and 'downloads' is a list of names, which are
+            always in 'matches' too.
+        """
+        matches = []
+        downloads = []
+        ldir = dirname.lower()
+        # Path rules naming a dir are checked once for the whole directory rather than per file
+        dir_matched = self._path_regex is not None and self._path_regex.search(ldir) is not None
+        for f in files:
+            lname = f.lower()
+            if lname in self._filenames:
+                matches.append((f, 'filename'))
+                downloads.append(f)
+            elif dir_matched:
+                matches.append((f, 'path'))
+            elif self.has_interesting_extension(lname) and not self.is_excluded(lname):
+                matches.append((f, 'extension'))
+            elif lname in self._path_rule_names and self._path_regex.search(ldir + '/' + lname):
+                matches.append((f, 'path'))
+            elif all_files:
+                matches.append((f, 'all'))
+        return matches, downloads
+
+
+def remote_depth(dirname):
+    """ Number of path components below '/', so '/' is 0 and '/a/b' is 2. """
+    return len([part for part in dirname.split('/') if part])
+
+
+class DirFilter(object):
+    """ Pre-compiled EXCLUDE_DIRS rules, deciding whether a remote dir and its whole subtree are skipped.
+
+        '/abs/path'         - That dir and everything below it
+        'rel/path'          - That path wherever it appears in the tree, e.g. under any user profile
+        '*/glob/*'          - Glob against the full dir path, where '*' also spans '/', relative globs
+                              like 'rel/*/path' can start anywhere in the path
+    """
+    def __init__(self, rules=()):
+        parts = []
+        for rule in rules:
+            rule = rule.lower().rstrip('/')
+            if not rule:
+                continue
+            if any(c in rule for c in '*?['):
+                # Relative globs can start anywhere in the path, and a matched dir takes its subtree with it
+                anchor = '^' if rule.startswith(('/', '*')) else '(?:^|/)'
+                parts.append(anchor + '(?:{}|{})'.format(fnmatch.translate(rule), fnmatch.translate(rule + '/*')))
+            elif rule.startswith('/'):
+                parts.append('^' + re.escape(rule) + '(?:/|$)')
+            else:
+                parts.append('(?:^|/)' + re.escape(rule) + '(?:/|$)')
+        self._regex = re.compile('|'.join('(?:{})'.format(p) for p in parts)) if parts else None
+
+    def excluded(self, dirname):
+        return self._regex is not None and self._regex.search(dirname.lower()) is not None
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ==============================================================================
+# File:         ftp_metrics.py
+# Author:       Cashiuus
+# Created:      17-Oct-2026     -     Revised:
+#
+# Depends:      n/a
+# Compat:       3.7+
+#
+#-[ Usage ]---------------------------------------------------------------------
+#
+#   Crawl instrumentation: per-target counters (dirs/sec, files/sec, bytes
+#   downloaded), a LIST latency histogram, errors by FTP reply code and the
+#   depth of the crawl's queues, all cheap enough to leave on for every run.
+#
+#       metrics = CrawlMetrics("10.10.1.20")
+#       metrics.gauge('frontier', lambda: len(pending))     # sampled when reported
+#       metrics.observe_list(seconds)                       # after each LIST
+#       metrics.add_dir(files=len(files))
+#       metrics.error(e)                                    # counted by reply code, e.g. '550'
+#       metrics.report()                                    # end-of-run summary
+#
+#   StatsReporter appends a JSON line per crawl in progress to a stats file every
+#   few seconds (--stats), and enable_profiling() runs the crawl under cProfile,
+#   including the threads started through profiled() (--profile).
+#
+# ==============================================================================
+import cProfile
+import json
+import logging
+import pstats
+import sys
+import threading
+from collections import Counter
+from time import monotonic, strftime
+
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the LIST latency histogram buckets, anything slower goes in '+inf'
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def error_code(error):
+    """ The FTP reply code behind an error ('550', '421'...), else the name of its exception type ('timeout'...). """
+    first = error
+    while error is not None:
+        code = getattr(error, 'code', None) or str(error)[:3]
+        if isinstance(code, str) and len(code) == 3 and code.isdigit():
+            return code
+        error = error.__cause__
+    return type(first).__name__
+
+
+class CrawlMetrics(object):
+    """ Thread-safe metrics of one target's crawl, updated by its crawl and download workers. """
+    def __init__(self, target):
+        self.target = target
+        self.started = monotonic()
+        self.finished = None
+        self.dirs = 0
+        self.files = 0
+        self.downloads = 0
+        self.bytes = 0
+        self.errors = Counter()
+        self.lists = 0
+        self._list_total = 0.0
+        self._list_max = 0.0
+        self._buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self._gauges = {}
+        self._lock = threading.Lock()
+
+    def gauge(self, name, func):
+        """ Register a queue depth (or any other level) to be sampled by calling func() whenever reported. """
+        self._gauges[name] = func
+
+    def observe_list(self, seconds):
+        with self._lock:
+            self.lists += 1
+            self._list_total += seconds
+            self._list_max = max(self._list_max, seconds)
+            for (i, bound) in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    self._buckets[i] += 1
+                    break
+            else:
+                self._buckets[-1] += 1
+
+    def add_dir(self, files=0):
+        with self._lock:
+            self.dirs += 1
+            self.files += files
+
+    def add_bytes(self, nbytes):
+        with self._lock:
+            self.bytes += nbytes
+
+    def add_download(self):
+        with self._lock:
+            self.downloads += 1
+
+    def error(self, error):
+        """ Count a failed request by its reply code, see error_code(). """
+        with self._lock:
+            self.errors[error_code(error)] += 1
+
+    def finish(self):
+        self.finished = monotonic()
+
+    def percentile(self, fraction):
+        """ Approximate LIST latency percentile, as the upper bound of the bucket it falls in. """
+        with self._lock:
+            wanted = fraction * self.lists
+            seen = 0
+            for (i, count) in enumerate(self._buckets[:-1]):
+                seen += count
+                if count and seen >= wanted:
+                    return LATENCY_BUCKETS[i]
+            return self._list_max
+
+    def snapshot(self):
+        """ All metrics as a dict, ready to be dumped as JSON. """
+        elapsed = (self.finished or monotonic()) - self.started
+        queues = {}
+        for (name, func) in self._gauges.items():
+            try:
+                queues[name] = func()
+            except Exception as e:
+                # A gauge of something already torn down, never worth failing a crawl over
+                logger.debug("Gauge %s failed: %s", name, e)
+        p50, p95 = self.percentile(0.5), self.percentile(0.95)
+        with self._lock:
+            buckets = dict(zip([str(b) for b in LATENCY_BUCKETS] + ['+inf'], self._buckets))
+            return {
+                'target': self.target,
+                'elapsed': round(elapsed, 1),
+                'dirs': self.dirs,
+                'dirs_per_sec': round(self.dirs / elapsed, 2) if elapsed else 0,
+                'files': self.files,
+                'files_per_sec': round(self.files / elapsed, 2) if elapsed else 0,
+                'downloads': self.downloads,
+                'bytes': self.bytes,
+                'list_latency': {'count': self.lists,
+                                 'mean': round(self._list_total / self.lists, 4) if self.lists else None,
+                                 'p50': p50 if self.lists else None, 'p95': p95 if self.lists else None,
+                                 'max': round(self._list_max, 4), 'buckets': buckets},
+                'errors': dict(self.errors),
+                'queues': queues,
+            }
+
+    def report(self):
+        """ Print and log the end-of-run summary. """
+        s = self.snapshot()
+        summary = "{}: {} dirs/sec, {} files/sec, {} bytes downloaded in {}s".format(
+            self.target, s['dirs_per_sec'], s['files_per_sec'], s['bytes'], s['elapsed'])
+        print("[*] {}".format(summary))
+        logger.info(summary)
+        if self.lists:
+            latency = "{}: LIST latency over {} LISTs: mean {:.0f}ms, p50 <= {:.0f}ms, p95 <= {:.0f}ms, max {:.0f}ms".format(
+                self.target, self.lists, s['list_latency']['mean'] * 1000, s['list_latency']['p50'] * 1000,
+                s['list_latency']['p95'] * 1000, s['list_latency']['max'] * 1000)
+            print("[*] {}".format(latency))
+            logger.info(latency)
+        if self.errors:
+            errors = "{}: Errors by reply code: {}".format(
+                self.target, ", ".join("{} x{}".format(code, n) for (code, n) in self.errors.most_common()))
+            print("[*] {}".format(errors))
+            logger.info(errors)
+
+
+class StatsReporter(object):
+    """ Background thread appending a JSON line of every crawl in progress to 'stats_file' each 'interval' seconds.
+
+        A crawl's final line, with "final": true, is written when it's removed.
+    """
+    def __init__(self, stats_file, interval=10.0):
+        self.stats_file = stats_file
+        self.interval = interval
+        self._metrics = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._fh = open(stats_file, 'a')
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def add(self, metrics):
+        with self._lock:
+            self._metrics.append(metrics)
+
+    def remove(self, metrics):
+        with self._lock:
+            if metrics in self._metrics:
+                self._metrics.remove(metrics)
+            self._write(metrics, final=True)
+
+    def _write(self, metrics, final=False):
+        # Called with the lock held
+        line = metrics.snapshot()
+        line['time'] = strftime('%Y-%m-%dT%H:%M:%S')
+        line['final'] = final
+        self._fh.write(json.dumps(line) + "\n")
+        self._fh.flush()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                for metrics in self._metrics:
+                    self._write(metrics)
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+        with self._lock:
+            self._fh.close()
+        print("[*] Crawl stats were written to: {}".format(self.stats_file))
+
+
+# The cProfile hook, None unless enable_profiling() was called
+_profiler = None
+# Python 3.12+ allows only one profiler to be enabled at a time, across every thread
+PER_THREAD_PROFILES = sys.version_info < (3, 12)
+
+
+class Profiler(object):
+    """ cProfile of the calling thread plus every thread started through profiled(), merged into one stats file.
+        On Python 3.12+, only the calling thread.
+    """
+    def __init__(self, stats_file):
+        self.stats_file = stats_file
+        self._profiles = []
+        self._lock = threading.Lock()
+        self._main = cProfile.Profile()
+        self._main.enable()
+
+    def wrap(self, func):
+        if not PER_THREAD_PROFILES:
+            return func
+
+        def run(*args, **kwargs):
+            profile = cProfile.Profile()
+            profile.enable()
+            with self._lock:
+                self._profiles.append(profile)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profile.disable()
+        return run
+
+    def close(self, top=25):
+        """ Save the merged stats for pstats/snakeviz and print the 'top' functions by cumulative time. """
+        self._main.disable()
+        with self._lock:
+            stats = pstats.Stats(self._main, *self._profiles)
+        stats.dump_stats(str(self.stats_file))
+        print("[*] Profile saved to: {}".format(self.stats_file))
+        stats.sort_stats('cumulative').print_stats(top)
+
+
+def enable_profiling(stats_file):
+    """ Start profiling the calling thread, and any thread started through profiled() from now on. """
+    global _profiler
+    _profiler = Profiler(stats_file)
+    return _profiler
+
+
+def profiled(func):
+    """ Wrap a thread's target so it's profiled too when profiling is enabled, otherwise return it unchanged. """
+    return _profiler.wrap(func) if _profiler is not None else func
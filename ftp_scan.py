@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ==============================================================================
+# File:         ftp_scan.py
+# Author:       Cashiuus
+# Created:      17-Oct-2026     -     Revised:
+#
+# Depends:      n/a
+# Compat:       3.7+
+#
+#-[ Usage ]---------------------------------------------------------------------
+#
+#   Content triage for the crawler: streams file contents through the compiled
+#   SECRET_PATTERNS detectors from config.py (private keys, connection strings,
+#   passwords in .ini/.conf/.ps1, ...) a chunk at a time, never holding a whole
+#   file in memory, and never reading more than 'max_bytes' of it.
+#
+#   Scans run in a process pool so the regex work never holds up the network-bound
+#   crawl and download threads (or the asyncio event loop):
+#
+#       pool = ScanPool(SECRET_PATTERNS, max_bytes=4 * 1024 * 1024)
+#       findings = FindingsWriter(output_dir / "FTP_secrets_10.10.1.20.jsonl")
+#       pool.scan_file(local_file, remote_path, findings)       # a downloaded file
+#       pool.scan_bytes(head, remote_path, findings)            # the first N KB of a remote one
+#       findings.close()                                        # waits for its scans to finish
+#       pool.close()
+#
+# ==============================================================================
+import json
+import logging
+import multiprocessing
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+
+logger = logging.getLogger(__name__)
+
+SCAN_CHUNK = 65536
+# Longer than any one match, so a secret split across two chunks is still found whole
+SCAN_OVERLAP = 1024
+# Matched text is cut to this many characters in the findings file
+MAX_MATCH_TEXT = 200
+
+
+class SecretScanner(object):
+    """ All detectors compiled into one bytes regex, so each chunk is scanned in a single pass.
+
+        patterns            - Sequence of (name, regex) where name is an identifier and regex is a str pattern
+                              without named groups of its own, matched case-insensitively
+        max_bytes           - Stop scanning a file after this many bytes, None for no limit
+    """
+    def __init__(self, patterns, max_bytes=None):
+        self.max_bytes = max_bytes
+        self._regex = re.compile(
+            '|'.join('(?P<{}>{})'.format(name, regex) for (name, regex) in patterns).encode('ascii'),
+            re.IGNORECASE | re.MULTILINE)
+
+    def scan_chunks(self, chunks):
+        """ Scan an iterable of byte chunks, returning [(detector name, offset, matched text)]. """
+        findings = []
+        buf = b''
+        pos = 0             # File offset of buf[0]
+        reported = 0        # File offset up to which matches have already been reported
+        consumed = 0
+        for chunk in chunks:
+            if self.max_bytes is not None and consumed + len(chunk) >= self.max_bytes:
+                chunk = chunk[:self.max_bytes - consumed]
+                buf, pos, reported = self._scan(buf + chunk, pos, reported, findings, final=True)
+                return findings
+            consumed += len(chunk)
+            buf, pos, reported = self._scan(buf + chunk, pos, reported, findings, final=False)
+        self._scan(buf, pos, reported, findings, final=True)
+        return findings
+
+    def _scan(self, buf, pos, reported, findings, final):
+        # Keep the last SCAN_OVERLAP bytes for the next pass, along with any match that runs into them,
+        # since it may carry on into the next chunk
+        keep_from = max(0, len(buf) - SCAN_OVERLAP)
+        for m in self._regex.finditer(buf):
+            if pos + m.start() < reported:
+                continue
+            if not final and m.end() > keep_from:
+                keep_from = min(keep_from, m.start())
+                break
+            findings.append((m.lastgroup, pos + m.start(), m.group().decode('latin-1')[:MAX_MATCH_TEXT]))
+            reported = pos + m.end()
+        return buf[keep_from:], pos + keep_from, reported
+
+    def scan_file(self, path):
+        with open(path, 'rb') as fh:
+            return self.scan_chunks(iter(lambda: fh.read(SCAN_CHUNK), b''))
+
+    def scan_bytes(self, data):
+        return self.scan_chunks(data[i:i + SCAN_CHUNK] for i in range(0, len(data), SCAN_CHUNK))
+
+
+# Each pool process compiles its own scanner once, rather than having it pickled over with every job
+_scanner = None
+
+
+def _init_worker(patterns, max_bytes):
+    global _scanner
+    _scanner = SecretScanner(patterns, max_bytes=max_bytes)
+
+
+def _scan_file(path):
+    return _scanner.scan_file(path)
+
+
+def _scan_bytes(data):
+    return _scanner.scan_bytes(data)
+
+
+class FindingsWriter(object):
+    """ Thread-safe writer of one target's scan findings to a JSON lines file, one line per finding.
+
+        close() waits for every scan still running for this writer, then prints the count. As with
+        the listing file, nothing is left behind if there were no findings.
+    """
+    def __init__(self, findings_file):
+        self.findings_file = findings_file
+        self.count = 0
+        self.scanned = 0
+        self.errors = 0
+        self._pending = 0
+        self._fh = None
+        self._cond = threading.Condition()
+
+    def add_pending(self):
+        """ Note a scan has been submitted whose results will come to write() or write_error(). """
+        with self._cond:
+            self._pending += 1
+
+    def write(self, remote_path, local_file, findings):
+        with self._cond:
+            self.scanned += 1
+            if findings and self._fh is None:
+                self._fh = open(self.findings_file, 'w')
+            for (detector, offset, text) in findings:
+                self._fh.write(json.dumps({'path': remote_path, 'file': local_file, 'detector': detector,
+                                           'offset': offset, 'match': text}) + "\n")
+                self.count += 1
+            if findings:
+                self._fh.flush()
+            # Printed before the scan counts as done, so close() can't print its summary ahead of it
+            for detector in sorted(set(f[0] for f in findings)):
+                print("\n[!] Possible secret ({}) in: {}".format(detector, remote_path))
+                logger.info("Possible secret ({}) in: {}".format(detector, remote_path))
+            self._pending -= 1
+            self._cond.notify_all()
+
+    def write_error(self, remote_path, error):
+        logger.error("Failed to scan {}: {}".format(remote_path, error))
+        with self._cond:
+            self.errors += 1
+            self._pending -= 1
+            self._cond.notify_all()
+
+    def close(self):
+        with self._cond:
+            while self._pending:
+                self._cond.wait()
+            if self._fh is not None:
+                self._fh.close()
+        print("[*] Scanned {} files, {} possible secrets found".format(self.scanned, self.count))
+        logger.info("Scanned {} files, {} possible secrets found".format(self.scanned, self.count))
+        if self.count:
+            print("[*] Possible secrets are in saved file for review: {}".format(self.findings_file))
+
+
+class ScanPool(object):
+    """ Process pool running SecretScanner over files and byte strings, handing the results to a FindingsWriter.
+
+        patterns            - Detectors, see SecretScanner
+        max_bytes           - Never scan more than this many bytes of any one file, None for no limit
+        workers             - Number of scanner processes (Default: one per CPU)
+
+        Submitting never blocks, so it's safe from crawl threads and the asyncio event loop alike.
+        One pool can be shared by every target of a batch crawl.
+    """
+    def __init__(self, patterns, max_bytes=None, workers=None):
+        self.max_bytes = max_bytes
+        # Spawned rather than forked, since forking a process that already runs crawl threads can deadlock
+        self._executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                             initializer=_init_worker, initargs=(tuple(patterns), max_bytes))
+
+    def _submit(self, func, arg, remote_path, local_file, findings):
+        findings.add_pending()
+        future = self._executor.submit(func, arg)
+
+        def done(f):
+            error = f.exception()
+            if error is not None:
+                findings.write_error(remote_path, error)
+            else:
+                findings.write(remote_path, local_file, f.result())
+        future.add_done_callback(done)
+
+    def scan_file(self, local_file, remote_path, findings):
+        """ Scan a downloaded file, recording findings against its remote path. """
+        self._submit(_scan_file, str(local_file), remote_path, str(local_file), findings)
+
+    def scan_bytes(self, data, remote_path, findings):
+        """ Scan the bytes read from a remote file, e.g. just its first few KB. """
+        self._submit(_scan_bytes, data, remote_path, None, findings)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ==============================================================================
+# File:         ftp_store.py
+# Author:       Cashiuus
+# Created:      17-Oct-2026     -     Revised:
+#
+# Depends:      n/a
+# Compat:       3.7+
+#
+#-[ Usage ]---------------------------------------------------------------------
+#
+#   Content-addressed store for downloaded files. Every download is hashed
+#   (SHA-256) as it's written, and kept once under store/<hash[:2]>/<hash> in
+#   the output dir no matter how many paths or hosts it was found at. The remote
+#   layout is rebuilt under files/<target>/<remote path> from hard links to those
+#   blobs, so two web.config files from different dirs no longer overwrite each
+#   other, and a file mirrored across hosts only takes up disk space once.
+#
+#   The manifest (FTP_download_store.db) maps each host + remote path to its blob,
+#   with the size and mtime it had when downloaded. A file at the same host and
+#   path whose size and mtime still match is linked into place from the store
+#   rather than downloaded again. Anything else is downloaded; only its hash can
+#   tell whether it's a copy of something already stored:
+#
+#       store = DownloadStore(output_dir)
+#       local_file = store.lookup(target, remote_path, size, mtime)     # None, it has to be downloaded
+#       writer = store.open(target, remote_path, size, mtime)
+#       ... writer.write(chunk) for each chunk of the transfer ...
+#       writer.close()
+#       local_file = store.commit(writer)
+#       store.close()
+#
+#   NOTE: Hard links share their contents, editing one copy edits all of them.
+#
+# ==============================================================================
+import hashlib
+import logging
+import os
+import posixpath
+import shutil
+from time import time
+
+from ftp_db import SQLiteDB
+
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (sha256 TEXT PRIMARY KEY, size INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS files (host TEXT, path TEXT, name TEXT, size INTEGER, mtime REAL, sha256 TEXT NOT NULL,
+                                  stored REAL, PRIMARY KEY (host, path));
+"""
+HASH_CHUNK = 65536
+
+
+class StoreWriter(object):
+    """ File-like object one download is written to, hashed on its way into the store's partial dir.
+
+        A partial download is kept under a name derived from its host + path, so a 'resume'd
+        writer carries on from where an interrupted one stopped; its first 'offset' bytes are
+        re-read to bring the hash up to date, and the transfer only has to fetch the rest.
+    """
+    def __init__(self, partial_file, host, remote_path, size=None, mtime=None, resume=False):
+        self.partial_file = partial_file
+        self.host = host
+        self.remote_path = remote_path
+        self.size = size
+        self.mtime = mtime
+        self.offset = 0
+        self._hash = hashlib.sha256()
+        if resume and partial_file.is_file():
+            with open(partial_file, 'rb') as fh:
+                for chunk in iter(lambda: fh.read(HASH_CHUNK), b''):
+                    self._hash.update(chunk)
+                    self.offset += len(chunk)
+            self._fh = open(partial_file, 'ab')
+        else:
+            self._fh = open(partial_file, 'wb')
+
+    def write(self, chunk):
+        self._hash.update(chunk)
+        self._fh.write(chunk)
+        return len(chunk)
+
+    def close(self):
+        self._fh.close()
+
+    def hexdigest(self):
+        return self._hash.hexdigest()
+
+
+class DownloadStore(SQLiteDB):
+    """ Thread-safe content-addressed store of downloads, shared by every target of a crawl.
+
+        output_dir          - The store's blobs, layout and manifest all go under here
+    """
+    def __init__(self, output_dir, commit_interval=2.0):
+        self.blob_dir = output_dir / "store"
+        self.partial_dir = self.blob_dir / "partial"
+        self.files_dir = output_dir / "files"
+        self.stored = 0         # New blobs
+        self.linked = 0         # Downloads whose contents were already stored
+        self.skipped = 0        # Files not downloaded at all since their size + mtime matched
+        self.saved_bytes = 0
+        os.makedirs(self.partial_dir, exist_ok=True)
+        SQLiteDB.__init__(self, output_dir / "FTP_download_store.db", SCHEMA, commit_interval)
+
+    def blob_path(self, digest):
+        return self.blob_dir / digest[:2] / digest
+
+    def local_path(self, host, remote_path):
+        """ Where a remote file lives in the files/ layout; '..' and the like are dropped, never followed. """
+        parts = [p for p in remote_path.split('/') if p not in ('', '.', '..')]
+        return self.files_dir.joinpath(host.replace(':', '_'), *parts)
+
+    def _link(self, blob, host, remote_path):
+        local_file = self.local_path(host, remote_path)
+        local_file.parent.mkdir(parents=True, exist_ok=True)
+        if local_file.is_file():
+            if os.path.samefile(blob, local_file):
+                return local_file
+            local_file.unlink()
+        try:
+            os.link(blob, local_file)
+        except OSError:
+            # e.g. a filesystem without hard links, a copy is the best we can do there
+            shutil.copyfile(blob, local_file)
+        return local_file
+
+    def _record(self, host, remote_path, size, mtime, digest):
+        self._conn.execute("INSERT OR REPLACE INTO files (host, path, name, size, mtime, sha256, stored) "
+                           "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                           (host, remote_path, posixpath.basename(remote_path), size, mtime, digest, time()))
+        self._maybe_commit()
+
+    def lookup(self, host, remote_path, size, mtime):
+        """ Link a remote file into place from the store if it's already there, returning its local path.
+
+            Returns None when it has to be downloaded: it's new, its size or mtime changed, or
+            either is unknown (e.g. a LIST format whose dates couldn't be parsed). Only the same
+            host and path counts; a same-named file elsewhere with the same size and mtime can
+            still hold different contents, so copies are left to commit() to find by hash.
+        """
+        if size is None or mtime is None:
+            return None
+        with self._lock:
+            if self._conn is None:
+                return None
+            row = self._conn.execute("SELECT sha256 FROM files WHERE host = ? AND path = ? AND size = ? AND mtime = ?",
+                                     (host, remote_path, size, mtime)).fetchone()
+            if row is None or not self.blob_path(row[0]).is_file():
+                return None
+            local_file = self._link(self.blob_path(row[0]), host, remote_path)
+            self._record(host, remote_path, size, mtime, row[0])
+            self.skipped += 1
+            self.saved_bytes += size
+        logger.debug("Already in the store, not downloading: %s", remote_path)
+        return local_file
+
+    def open(self, host, remote_path, size=None, mtime=None, resume=False):
+        """ Return a StoreWriter to download a remote file into, see commit(). """
+        key = hashlib.sha1("{}\0{}".format(host, remote_path).encode('utf-8', 'surrogateescape')).hexdigest()
+        return StoreWriter(self.partial_dir / key, host, remote_path, size=size, mtime=mtime, resume=resume)
+
+    def commit(self, writer):
+        """ File a finished (and closed) download away under its hash, returning its path in the files/ layout. """
+        digest = writer.hexdigest()
+        blob = self.blob_path(digest)
+        size = writer.partial_file.stat().st_size
+        with self._lock:
+            if blob.is_file():
+                writer.partial_file.unlink()
+                self.linked += 1
+                self.saved_bytes += size
+            else:
+                blob.parent.mkdir(exist_ok=True)
+                os.replace(writer.partial_file, blob)
+                self.stored += 1
+            local_file = self._link(blob, writer.host, writer.remote_path)
+            if self._conn is not None:
+                self._conn.execute("INSERT OR IGNORE INTO blobs (sha256, size) VALUES (?, ?)", (digest, size))
+                # The size and mtime from the listing, which is what lookup() gets to compare against next time
+                self._record(writer.host, writer.remote_path, writer.size if writer.size is not None else size,
+                             writer.mtime, digest)
+        return local_file
+
+    def report(self):
+        """ Print and log what the store saved this run. """
+        summary = "Stored {} new files, {} duplicates hard-linked, {} unchanged files not re-downloaded " \
+                  "({} bytes saved)".format(self.stored, self.linked, self.skipped, self.saved_bytes)
+        print("[*] {}".format(summary))
+        logger.info(summary)
+        if self.stored or self.linked or self.skipped:
+            print("[*] Downloaded files are laid out by target and remote path under: {}".format(self.files_dir))
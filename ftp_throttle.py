@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ==============================================================================
+# File:         ftp_throttle.py
+# Author:       Cashiuus
+# Created:      17-Oct-2026     -     Revised:
+#
+# Depends:      n/a
+# Compat:       3.7+
+#
+#-[ Usage ]---------------------------------------------------------------------
+#
+#   Per-host adaptive request throttle, replacing the fixed random sleep() the
+#   crawlers used to take after every download. It's a token bucket whose rate
+#   creeps up while the server keeps answering quickly, and is cut back when it
+#   starts answering 421/450-style "slow down" replies, timing out, or getting
+#   noticeably slower than usual (AIMD, like TCP congestion control).
+#
+#       throttle = AdaptiveThrottle(rate=50, max_rate=500)
+#       sleep(throttle.reserve())           # or: await asyncio.sleep(throttle.reserve())
+#       ... send the request, timing it ...
+#       throttle.ok(latency)                # or: throttle.backoff() if is_overload_error(e)
+#
+#   Random per-request jitter (stealth mode) is opt-in via 'jitter'.
+#
+# ==============================================================================
+import asyncio
+import logging
+import socket
+import threading
+from random import uniform
+from time import monotonic
+
+
+logger = logging.getLogger(__name__)
+
+# Reply codes where the server is overloaded or rate limiting us, rather than refusing outright
+BACKOFF_REPLY_CODES = ('421', '425', '426', '450')
+
+
+def is_overload_error(error):
+    """ Whether an FTP error (or whatever caused it) is a timeout or one of the BACKOFF_REPLY_CODES. """
+    while error is not None:
+        if isinstance(error, (socket.timeout, asyncio.TimeoutError, TimeoutError)):
+            return True
+        if str(error)[:3] in BACKOFF_REPLY_CODES:
+            return True
+        error = error.__cause__
+    return False
+
+
+class AdaptiveThrottle(object):
+    """ Thread-safe token bucket limiting the request rate to one host, tuned by how the host responds.
+
+        rate                - Requests/sec to start at, 0 or None to not throttle at all
+        max_rate            - Ceiling the rate can climb to while responses stay fast (Default: 10x 'rate')
+        min_rate            - Floor the rate can be cut back to (Default: 0.5/sec)
+        jitter              - Add a random 0..jitter seconds to every wait, to look less like a crawler
+    """
+    def __init__(self, rate=50, max_rate=None, min_rate=0.5, jitter=None):
+        self.rate = rate
+        self.max_rate = max_rate or (rate or 0) * 10
+        self.min_rate = min(min_rate, rate) if rate else min_rate
+        self.jitter = jitter
+        self.backoffs = 0
+        self._step = (rate or 0) * 0.05
+        self._latency = None
+        self._tokens = 1.0
+        self._last = monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """ Take a token for one request, returning the seconds the caller has to wait before sending it. """
+        wait = 0
+        if self.rate:
+            with self._lock:
+                now = monotonic()
+                # Up to a second's worth of requests can go out in a burst
+                self._tokens = min(max(self.rate, 1.0), self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                self._tokens -= 1
+                if self._tokens < 0:
+                    # Tokens go negative so concurrent callers queue up behind each other
+                    wait = -self._tokens / self.rate
+        if self.jitter:
+            wait += uniform(0, self.jitter)
+        return wait
+
+    def ok(self, latency):
+        """ Record a successful request, speeding up unless it was much slower than usual. """
+        if not self.rate:
+            return
+        with self._lock:
+            if self._latency is not None and latency > 2 * self._latency:
+                self.rate = max(self.min_rate, self.rate * 0.8)
+            else:
+                self.rate = min(self.max_rate, self.rate + self._step)
+            # Moving average of recent latency, the baseline that "much slower" is judged against
+            self._latency = latency if self._latency is None else 0.8 * self._latency + 0.2 * latency
+
+    def backoff(self):
+        """ Record an overload reply or timeout, halving the request rate. """
+        if not self.rate:
+            return
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.backoffs += 1
+            # Forget banked tokens too, along with any due for the time the failed request took,
+            # or a burst would go straight back out
+            self._tokens = min(self._tokens, 0)
+            self._last = monotonic()
+            logger.info("Server is struggling, backing off to {:.1f} requests/sec".format(self.rate))
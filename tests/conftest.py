@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ==============================================================================
+# File:         conftest.py
+# Author:       Cashiuus
+# Created:      17-Oct-2026     -     Revised:
+#
+# Depends:      pyftpdlib, pytest (requirements-dev.txt)
+# Compat:       3.7+
+#
+#-[ Usage ]---------------------------------------------------------------------
+#
+#   Fixtures for the end-to-end tests, which crawl benchmarks/bench_server.py's
+#   synthetic trees served from a thread of the test process:
+#
+#       python3 -m pip install -r requirements-dev.txt
+#       python3 -m pytest -q
+#
+# ==============================================================================
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_DIR))
+sys.path.insert(0, str(REPO_DIR / "benchmarks"))
+from bench_server import make_server
+
+
+class LocalServers(object):
+    """ bench_server.py FTP servers over SyntheticTrees, each served from its own thread until stopped. """
+    def __init__(self):
+        self._stops = {}
+        self._threads = []
+
+    def start(self, tree):
+        """ Serve 'tree' on a free local port, returning the port. """
+        server = make_server(tree, port=0)
+        stop = threading.Event()
+
+        def run():
+            # Polled rather than served forever, so the server can be told to stop from another thread
+            while not stop.is_set():
+                server.serve_forever(timeout=0.05, blocking=False, handle_exit=False)
+            server.close_all()
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        port = server.address[1]
+        self._stops[port] = stop
+        self._threads.append(thread)
+        return port
+
+    def stop(self, port):
+        """ Stop the server on 'port' from taking any more connections, and drop the ones it has. """
+        self._stops[port].set()
+
+    def close(self):
+        for stop in self._stops.values():
+            stop.set()
+        for thread in self._threads:
+            thread.join()
+
+
+@pytest.fixture
+def ftp_server():
+    """ LocalServers to start() trees with, all stopped once the test ends. """
+    servers = LocalServers()
+    yield servers
+    servers.close()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ==============================================================================
+# File:         helpers.py
+# Author:       Cashiuus
+# Created:      17-Oct-2026     -     Revised:
+#
+# Depends:      pytest (requirements-dev.txt)
+# Compat:       3.7+
+#
+#-[ Usage ]---------------------------------------------------------------------
+#
+#   Shared by the end-to-end tests: run ftp_crawler.py's main() against a
+#   bench_server.py tree, then read back the listing, crawl index and download
+#   store it leaves in the output dir.
+#
+#       from helpers import TREE, crawl, listed
+#
+# ==============================================================================
+import json
+import sys
+
+import ftp_crawler
+from ftp_index import CrawlIndex
+
+
+# Small enough to crawl in a second or two, with matches and downloads in every profile
+TREE = dict(shape='profiles', users=4, files=3)
+
+
+def crawl(monkeypatch, port, output_dir, *args, target='127.0.0.1'):
+    """ Run ftp_crawler.py against the local server as if from the command line, unthrottled. """
+    monkeypatch.setattr(sys, 'argv', ['ftp_crawler.py', '-t', target, '--port', str(port), '-o', str(output_dir),
+                                      '--rate', '0'] + list(args))
+    ftp_crawler.main()
+
+
+def listed(output_dir):
+    """ Every path in the output dir's jsonl listings, repeats and all. """
+    paths = []
+    for listing_file in output_dir.glob("FTP_Files_listing_*.jsonl"):
+        with open(listing_file) as fl:
+            paths.extend(json.loads(line)['path'] for line in fl)
+    return paths
+
+
+def indexed(output_dir):
+    """ Every path in the output dir's crawl index. """
+    index = CrawlIndex(output_dir / "FTP_crawl_index.db")
+    try:
+        return [row[1] for row in index.search()]
+    finally:
+        index.close()
+
+
+def downloaded(output_dir, host='127.0.0.1'):
+    """ {remote path: local file} of what the store laid out for 'host'. """
+    host_dir = output_dir / "files" / host
+    return {'/' + p.relative_to(host_dir).as_posix(): p for p in host_dir.rglob('*') if p.is_file()}
+
+
+def check_downloads(tree, files):
+    # bench_server fills a file with its own path, over and over
+    assert files
+    for (remote_path, local_file) in files.items():
+        data = local_file.read_bytes()
+        assert len(data) == tree.file_stats(remote_path)[0]
+        assert data.startswith((remote_path + "\n").encode())
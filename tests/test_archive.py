@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ==============================================================================
+# File:         test_archive.py
+# Author:       Cashiuus
+# Created:      17-Oct-2026     -     Revised:
+#
+# Depends:      pytest (requirements-dev.txt)
+# Compat:       3.7+
+#
+#-[ Usage ]---------------------------------------------------------------------
+#
+#   ftp_archive's zip and tar listers, driven by list_remote_archive() over
+#   archives built in memory, counting the bytes each listing had to fetch.
+#
+#       python3 -m pytest -q tests/test_archive.py
+#
+# ==============================================================================
+import io
+import os
+import struct
+import tarfile
+import zipfile
+
+import pytest
+
+from ftp_archive import (ZIP64_EOCD, ZIP64_LOCATOR, ZIP_EOCD, ZIP_TAIL, ArchiveError, ZipLister, archive_lister,
+                         dos_time)
+from ftp_crawler import list_remote_archive
+
+
+MTIME = 1700000000
+
+
+class BytesHost(object):
+    """ Stands in for an ftputil FTPHost serving one file from memory, recording each REST offset and byte read. """
+    def __init__(self, data):
+        self.data = data
+        self.rests = []
+        self.received = 0
+
+    def open(self, remote_file, mode, rest=None):
+        host = self
+        self.rests.append(rest or 0)
+
+        class Transfer(io.BytesIO):
+            def read(self, n=-1):
+                chunk = io.BytesIO.read(self, n)
+                host.received += len(chunk)
+                return chunk
+        return Transfer(self.data[rest or 0:])
+
+
+def list_archive(name, data, max_bytes=None):
+    """ List an archive the way the crawler does, returning (members, host, lister). """
+    host = BytesHost(data)
+    lister = archive_lister(name, size=len(data), max_bytes=max_bytes)
+    return list_remote_archive(host, name, lister), host, lister
+
+
+def make_zip(files):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, 'w') as zf:
+        for (name, data) in files:
+            zf.writestr(zipfile.ZipInfo(name, date_time=(2023, 11, 14, 22, 13, 20)), data)
+    return buf.getvalue()
+
+
+def test_small_zip():
+    data = make_zip([('inetpub/web.config', b'<configuration/>'), ('inetpub/', b''), ('notes.txt', b'x' * 1000)])
+    (members, host, lister) = list_archive('site.zip', data)
+    assert [(m.name, m.size) for m in members] == [('inetpub/web.config', 16), ('notes.txt', 1000)]
+    assert members[0].mtime == dos_time(((2023 - 1980) << 9) | (11 << 5) | 14, (22 << 11) | (13 << 5) | 10)
+    # Small enough that the directory came along with the tail, in one transfer
+    assert host.rests == [0] and not lister.truncated
+
+
+def test_zip_directory_fetched_on_its_own():
+    files = [('dir{:04}/'.format(i) + 'n' * 100, os.urandom(2048)) for i in range(1000)]
+    data = make_zip(files)
+    (members, host, lister) = list_archive('backup.zip', data)
+    assert [m.name for m in members] == [name for (name, _) in files]
+    # The tail, then the central directory before it, never the members themselves
+    assert len(host.rests) == 2 and host.rests[0] == len(data) - ZIP_TAIL
+    assert host.received < len(data) // 4
+
+
+def test_zip64_records():
+    data = make_zip([('a.txt', b'a'), ('b/c.txt', b'bc')])
+    pos = data.rfind(ZIP_EOCD)
+    (entries, cd_size, cd_offset) = struct.unpack('<10xH2I2x', data[pos:pos + 22])
+    # The same directory, found through the zip64 end of central directory record and its locator
+    eocd64 = struct.pack('<4sQ2H2I4Q', ZIP64_EOCD, 44, 45, 45, 0, 0, entries, entries, cd_size, cd_offset)
+    locator = struct.pack('<4sIQI', ZIP64_LOCATOR, 0, pos, 1)
+    eocd = struct.pack('<4s4H2IH', ZIP_EOCD, 0, 0, 0xFFFF, 0xFFFF, 0xFFFFFFFF, 0xFFFFFFFF, 0)
+    (members, _, _) = list_archive('big.zip', data[:pos] + eocd64 + locator + eocd)
+    assert [(m.name, m.size) for m in members] == [('a.txt', 1), ('b/c.txt', 2)]
+    # And a member over 4GB has its real size in a zip64 extra field
+    extra = struct.pack('<2H', 0x9901, 4) + b'\0' * 4 + struct.pack('<2HQ', 0x0001, 8, 5 * 2 ** 32)
+    assert ZipLister._zip64_size(extra, 0xFFFFFFFF) == 5 * 2 ** 32
+
+
+def test_not_a_zip():
+    with pytest.raises(ArchiveError):
+        list_archive('fake.zip', b'MZ' + b'\0' * 4096)
+
+
+def make_tar(files, mode='w'):
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode=mode, format=tarfile.GNU_FORMAT) as tf:
+        for (name, size) in files:
+            info = tarfile.TarInfo(name)
+            info.size = size
+            info.mtime = MTIME
+            tf.addfile(info, io.BytesIO(b'\0' * size))
+    return buf.getvalue()
+
+
+TAR_FILES = [('etc/shadow', 1200), ('var/backups/db.sql', 3 * 1024 * 1024), ('home/' + 'x' * 150 + '/id_rsa', 1679),
+             ('var/backups/site.bak', 2 * 1024 * 1024), ('etc/passwd', 900)]
+
+
+def test_tar_skips_big_members():
+    data = make_tar(TAR_FILES)
+    (members, host, lister) = list_archive('backup.tar', data)
+    # Long GNU names too
+    assert [(m.name, m.size, m.mtime) for m in members] == [(n, s, MTIME) for (n, s) in TAR_FILES]
+    # REST past each big member to its next header, so only the small ones come over the wire
+    assert len(host.rests) == 3
+    assert host.received < 1024 * 1024
+    assert not lister.truncated
+
+
+def test_compressed_tar_is_read_through():
+    data = make_tar(TAR_FILES, mode='w:gz')
+    (members, host, _) = list_archive('backup.tar.gz', data)
+    assert [m.name for m in members] == [n for (n, _) in TAR_FILES]
+    assert host.rests == [0]
+
+
+def test_pax_names():
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode='w', format=tarfile.PAX_FORMAT) as tf:
+        info = tarfile.TarInfo('srv/' + 'ü' * 120 + '/.env')
+        info.size = 10
+        tf.addfile(info, io.BytesIO(b'\0' * 10))
+    (members, _, _) = list_archive('backup.tar', buf.getvalue())
+    assert [m.name for m in members] == ['srv/' + 'ü' * 120 + '/.env']
+
+
+def test_tar_max_bytes():
+    data = make_tar([('a/{:03}.txt'.format(i), 4096) for i in range(200)], mode='w:gz')
+    (members, host, lister) = list_archive('logs.tgz', data, max_bytes=1024)
+    assert lister.truncated
+    assert host.received <= 1024
+    assert len(members) < 200
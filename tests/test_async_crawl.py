@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ==============================================================================
+# File:         test_async_crawl.py
+# Author:       Cashiuus
+# Created:      17-Oct-2026     -     Revised:
+#
+# Depends:      pyftpdlib, pytest (requirements-dev.txt)
+# Compat:       3.7+
+#
+#-[ Usage ]---------------------------------------------------------------------
+#
+#   How crawl_ftpserver_async() copes with connections dropped part way through
+#   a crawl of a bench_server.py tree.
+#
+#       python3 -m pytest -q tests/test_async_crawl.py
+#
+# ==============================================================================
+import asyncio
+import json
+
+from bench_server import SyntheticTree
+from ftp_crawler import ListingWriter, crawl_ftpserver_async
+
+
+TREE = dict(shape='profiles', users=4, files=3)
+DROPPED_DIR = '/Users/user001/Documents'
+
+
+class DroppingTree(SyntheticTree):
+    """ Drops the connection (pyftpdlib closes it on an unexpected error) the first 'drops' times DROPPED_DIR is
+        LISTed, calling on_drop() each time.
+    """
+    def __init__(self, drops, on_drop=None, **tree_args):
+        SyntheticTree.__init__(self, **tree_args)
+        self.drops = drops
+        self.dropped = 0
+        self.on_drop = on_drop
+
+    def listdir(self, path):
+        if path == DROPPED_DIR and self.dropped < self.drops:
+            self.dropped += 1
+            if self.on_drop is not None:
+                self.on_drop()
+            raise RuntimeError("Dropping the connection")
+        return SyntheticTree.listdir(self, path)
+
+
+def crawl(port, output_dir, retries=1):
+    """ Crawl the local server, returning (stats, listed paths). """
+    listing = ListingWriter(output_dir / "listing.jsonl")
+    try:
+        stats = asyncio.run(crawl_ftpserver_async('127.0.0.1', 'anonymous', 'anonymous', output_dir,
+                                                  asyncio.Semaphore(10), port=port, per_host=2, listing=listing,
+                                                  retries=retries, denied_file=output_dir / "denied.txt"))
+    finally:
+        listing.close()
+    with open(output_dir / "listing.jsonl") as fl:
+        return stats, [json.loads(line)['path'] for line in fl]
+
+
+def test_dropped_dir_is_listed_once(ftp_server, tmp_path):
+    (tmp_path / "whole").mkdir()
+    (_, expected) = crawl(ftp_server.start(SyntheticTree(**TREE)), tmp_path / "whole")
+    tree = DroppingTree(1, **TREE)
+    (stats, paths) = crawl(ftp_server.start(tree), tmp_path)
+    assert tree.dropped == 1
+    assert stats['error'] is None
+    # LISTed again on another connection, without anything being crawled twice
+    assert sorted(paths) == sorted(expected)
+    assert stats['matches'] == len(expected)
+
+
+def test_dir_that_keeps_dropping_is_skipped(ftp_server, tmp_path):
+    tree = DroppingTree(100, **TREE)
+    (stats, paths) = crawl(ftp_server.start(tree), tmp_path, retries=1)
+    # Tried once, retried once, then given up on rather than re-queued forever
+    assert tree.dropped == 2
+    assert stats['error'] is None
+    assert stats['denied'] == 1
+    assert DROPPED_DIR in (tmp_path / "denied.txt").read_text()
+    assert paths and not any(p.startswith(DROPPED_DIR + '/') for p in paths)
+
+
+def test_crawl_cut_short_is_an_error(ftp_server, tmp_path):
+    ports = []
+    # The server goes away for good, so there's nothing to reconnect to
+    tree = DroppingTree(1, on_drop=lambda: ftp_server.stop(ports[0]), **TREE)
+    ports.append(ftp_server.start(tree))
+    (stats, paths) = crawl(ports[0], tmp_path, retries=1)
+    assert stats['error'] and stats['error'].startswith("Lost every connection")
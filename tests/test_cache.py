@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ==============================================================================
+# File:         test_cache.py
+# Author:       Cashiuus
+# Created:      17-Oct-2026     -     Revised:
+#
+# Depends:      pytest (requirements-dev.txt)
+# Compat:       3.7+
+#
+#-[ Usage ]---------------------------------------------------------------------
+#
+#   ListingCache's reuse of unchanged listings and its diff of what changed
+#   between one crawl of a host and the next.
+#
+#       python3 -m pytest -q tests/test_cache.py
+#
+# ==============================================================================
+from ftp_cache import ListingCache, RemoteEntry
+
+
+HOST = "10.10.1.20:21"
+
+
+def f(name, size=100, mtime=1000.0):
+    return RemoteEntry(name, False, size, mtime, False)
+
+
+def d(name, mtime=1000.0):
+    return RemoteEntry(name, True, None, mtime, False)
+
+
+def crawl(db_file, listings, host=HOST):
+    """ One crawl updating the cache with {dir: (mtime, entries)}, returning the closed cache. """
+    cache = ListingCache(db_file, host)
+    for (dirname, (mtime, entries)) in listings.items():
+        cache.update(dirname, mtime, entries)
+    cache.close()
+    return cache
+
+
+FIRST = {
+    '/': (1.0, [d('backups'), d('www'), f('readme.txt')]),
+    '/backups': (2.0, [d('old'), f('db.sql', 5000), f('site.zip', 900)]),
+    '/backups/old': (3.0, [f('2019.sql'), f('2020.sql')]),
+    '/www': (4.0, [f('web.config'), f('index.html')]),
+}
+
+
+def test_first_crawl_has_no_changes(tmp_path):
+    cache = crawl(tmp_path / "cache.db", FIRST)
+    assert cache.first_crawl
+    assert cache.changes == []
+
+
+def test_changes(tmp_path):
+    crawl(tmp_path / "cache.db", FIRST)
+    cache = crawl(tmp_path / "cache.db", {
+        '/': (1.0, [d('backups'), d('www'), f('readme.txt')]),
+        # site.zip rewritten, db.sql gone, and 'old' is now a file rather than a dir
+        '/backups': (5.0, [f('old', 10), f('site.zip', 950), f('new.bak')]),
+        '/www': (6.0, [f('web.config', mtime=2000.0), f('index.html'), d('uploads')]),
+        '/www/uploads': (7.0, [f('shell.aspx')]),
+    })
+    assert not cache.first_crawl
+    assert sorted(cache.changes) == sorted([
+        ('+', '/backups/old'), ('~', '/backups/site.zip'), ('+', '/backups/new.bak'), ('-', '/backups/db.sql'),
+        ('-', '/backups/old/2019.sql'), ('-', '/backups/old/2020.sql'),
+        ('~', '/www/web.config'), ('+', '/www/uploads/shell.aspx'),
+    ])
+    # Nothing left of the old subtree to be reported again
+    cache = crawl(tmp_path / "cache.db", {'/backups': (5.0, [f('old', 10), f('site.zip', 950), f('new.bak')])})
+    assert cache.changes == []
+
+
+def test_hosts_are_apart(tmp_path):
+    crawl(tmp_path / "cache.db", FIRST)
+    cache = crawl(tmp_path / "cache.db", {'/www': (4.0, [f('web.config')])}, host="10.10.1.21:21")
+    assert cache.first_crawl and cache.changes == []
+    assert crawl(tmp_path / "cache.db", {'/www': (4.0, [f('web.config')])}).changes == [('-', '/www/index.html')]
+
+
+def test_reuse(tmp_path):
+    crawl(tmp_path / "cache.db", FIRST)
+    cache = ListingCache(tmp_path / "cache.db", HOST)
+    # Only an unchanged leaf dir stands in for a LIST
+    assert sorted(cache.reuse('/www', 4.0)) == sorted(FIRST['/www'][1])
+    assert cache.reuse('/www', 4.5) is None
+    assert cache.reuse('/www', None) is None
+    assert cache.reuse('/backups', 2.0) is None
+    assert cache.reuse('/nowhere', 1.0) is None
+    assert cache.reused == 1
+    cache.close()
+    # Anything after close() is quietly ignored
+    assert cache.reuse('/www', 4.0) is None
+    cache.update('/www', 4.0, [])
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ==============================================================================
+# File:         test_crawl.py
+# Author:       Cashiuus
+# Created:      17-Oct-2026     -     Revised:
+#
+# Depends:      pyftpdlib, pytest (requirements-dev.txt)
+# Compat:       3.7+
+#
+#-[ Usage ]---------------------------------------------------------------------
+#
+#   End-to-end tests running ftp_crawler.py's main() against a bench_server.py
+#   tree, then checking the listing, crawl index and download store it leaves
+#   in the output dir.
+#
+#       python3 -m pytest -q tests/
+#
+# ==============================================================================
+from bench_server import SyntheticTree
+from helpers import TREE, check_downloads, crawl, downloaded, indexed, listed
+
+
+def test_sync_crawl(ftp_server, monkeypatch, tmp_path):
+    tree = SyntheticTree(**TREE)
+    port = ftp_server.start(tree)
+    crawl(monkeypatch, port, tmp_path, '--workers', '2')
+    paths = listed(tmp_path)
+    assert paths and len(paths) == len(set(paths))
+    assert all(tree.isfile(p) for p in paths)
+    # EXCLUDE_DIRS are pruned, never listed
+    assert not any('/INetCache/' in p for p in paths)
+    assert sorted(indexed(tmp_path)) == sorted(paths)
+    check_downloads(tree, downloaded(tmp_path))
+
+
+def test_async_crawl(ftp_server, monkeypatch, tmp_path):
+    tree = SyntheticTree(**TREE)
+    port = ftp_server.start(tree)
+    crawl(monkeypatch, port, tmp_path / "sync")
+    crawl(monkeypatch, port, tmp_path / "async", '--async', '--workers', '4')
+    paths = listed(tmp_path / "async")
+    assert len(paths) == len(set(paths))
+    assert sorted(paths) == sorted(listed(tmp_path / "sync"))
+    assert sorted(indexed(tmp_path / "async")) == sorted(paths)
+    files = downloaded(tmp_path / "async")
+    assert sorted(files) == sorted(downloaded(tmp_path / "sync"))
+    check_downloads(tree, files)
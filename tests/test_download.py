@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ==============================================================================
+# File:         test_download.py
+# Author:       Cashiuus
+# Created:      17-Oct-2026     -     Revised:
+#
+# Depends:      pytest (requirements-dev.txt)
+# Compat:       3.7+
+#
+#-[ Usage ]---------------------------------------------------------------------
+#
+#   DownloadPipeline's handling of each queued item, over a stand-in session
+#   so no server is needed.
+#
+#       python3 -m pytest -q tests/test_download.py
+#
+# ==============================================================================
+import errno
+import ftplib
+import io
+import shutil
+
+import ftputil.error
+import pytest
+
+from ftp_crawler import DownloadPipeline, LocalFileError, copy_remote_file
+from ftp_store import DownloadStore
+
+
+class FailingSession(object):
+    """ Stands in for an FTPSession whose every call() fails with 'error', as after running out of retries. """
+    def __init__(self, error):
+        self.error = error
+        self.calls = 0
+
+    def call(self, func, *args, **kwargs):
+        self.calls += 1
+        raise self.error
+
+    def keep_alive(self):
+        pass
+
+
+def test_download_failure_is_not_a_store_failure(tmp_path, capsys):
+    pipeline = DownloadPipeline('127.0.0.1', 'anonymous', 'anonymous', tmp_path)
+    # A dropped connection, which is an OSError as well as an FTPError
+    pipeline._download(FailingSession(ftputil.error.FTPOSError("Connection reset by peer")), '/etc/web.config')
+    pipeline._download(FailingSession(ftputil.error.TemporaryError("450 Busy")), '/etc/web.config')
+    assert pipeline.failed == 2
+    out = capsys.readouterr().out
+    assert out.count("Failed to download /etc/web.config") == 2
+    assert "Failed to store" not in out
+
+
+def test_peek_failure_keeps_the_session(tmp_path):
+    pipeline = DownloadPipeline('127.0.0.1', 'anonymous', 'anonymous', tmp_path, peek_bytes=4096)
+    for error in (ftputil.error.TemporaryError("450 Busy"), ftputil.error.PermanentError("550 Denied"),
+                  EOFError(), TimeoutError("timed out")):
+        # Returns rather than raising to _worker(), which would end the session
+        pipeline._peek(FailingSession(error), '/home/notes.txt')
+
+
+def test_archive_failure_keeps_the_session(tmp_path):
+    listed = []
+    pipeline = DownloadPipeline('127.0.0.1', 'anonymous', 'anonymous', tmp_path, archive_max=1048576,
+                                on_archive=lambda remote_path, members: listed.append(remote_path))
+    for error in (ftputil.error.TemporaryError("450 Busy"), ftputil.error.FTPOSError("Connection reset by peer"),
+                  EOFError()):
+        pipeline._list_archive(FailingSession(error), '/backups/site.zip', 4096)
+    assert not listed
+
+
+class ServingSession(object):
+    """ Stands in for an FTPSession whose host serves every file with 'data', counting the calls made over it. """
+    def __init__(self, data=b"<configuration/>"):
+        self.host = self
+        self.data = data
+        self.calls = 0
+
+    def open(self, remote_path, mode, rest=None):
+        return io.BytesIO(self.data[rest or 0:])
+
+    def call(self, func, *args, timed=True, **kwargs):
+        self.calls += 1
+        return func(self.host, *args, **kwargs)
+
+    def keep_alive(self):
+        pass
+
+
+def test_local_write_failure_is_a_store_failure(tmp_path, capsys):
+    # Nowhere to write to, which a retry over the connection won't fix
+    pipeline = DownloadPipeline('127.0.0.1', 'anonymous', 'anonymous', tmp_path / "missing")
+    session = ServingSession()
+    pipeline._download(session, '/etc/web.config')
+    assert pipeline.failed == 1
+    assert "Failed to store /etc/web.config" in capsys.readouterr().out
+
+    store = DownloadStore(tmp_path)
+    pipeline = DownloadPipeline('127.0.0.1', 'anonymous', 'anonymous', tmp_path, store=store)
+    shutil.rmtree(store.partial_dir)
+    pipeline._download(session, '/etc/web.config')
+    assert pipeline.failed == 1
+    assert "Failed to store /etc/web.config" in capsys.readouterr().out
+    store.close()
+
+
+def test_copy_remote_file_tells_local_errors_apart():
+    class FullDisk(object):
+        def write(self, chunk):
+            raise OSError(errno.ENOSPC, "No space left on device")
+    with pytest.raises(LocalFileError):
+        copy_remote_file(io.BytesIO(b"data"), FullDisk())
+    # Not one of the errors FTPSession.call() retries
+    assert not isinstance(LocalFileError(), ftplib.all_errors + (ftputil.error.FTPError,))
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ==============================================================================
+# File:         test_index.py
+# Author:       Cashiuus
+# Created:      17-Oct-2026     -     Revised:
+#
+# Depends:      pytest (requirements-dev.txt)
+# Compat:       3.7+
+#
+#-[ Usage ]---------------------------------------------------------------------
+#
+#   CrawlIndex, its background writer and the SQL search() builds, on an index
+#   in a temp dir.
+#
+#       python3 -m pytest -q tests/test_index.py
+#
+# ==============================================================================
+import threading
+
+import pytest
+
+import ftp_index
+import ftp_metrics
+from ftp_index import CrawlIndex, glob_ext, glob_pattern, longest_literal
+
+
+HOST_A = "10.10.1.20"
+HOST_B = "10.10.1.21"
+FIRST_CRAWL = [
+    ("/inetpub/wwwroot/web.config", 512, 1.0, "filename"),
+    ("/backups/site.tar.gz", 5000000, 1.0, "extension"),
+    ("/backups/db.sql", 2000000, 1.0, "extension"),
+    ("/logs/app.log", 100, 1.0, "all"),
+    ("/logs/old/app.2019.log", 100, 1.0, "all"),
+    ("/Users/bob/KeePass.kdbx", 4096, 1.0, "extension"),
+    ("/data/web_config.bak", 10, 1.0, "all"),
+]
+NEW_FILES = [("/logs/new.log", 50, 2.0, "all"), ("/backups/2024.tar.gz", 7000000, 2.0, "extension")]
+HOST_B_FILES = [("/srv/web.config", 300, 1.0, "filename"), ("/srv/notes.txt", 20, 1.0, "all")]
+
+
+def test_index_writer(tmp_path):
+    index = CrawlIndex(tmp_path / "index.db")
+    writer = index.begin("10.10.1.20")
+    writer.add([("/backups/site.zip", 4096, 1700000000.0, "ext"), ("/home/web.config", 512, 1700000000.0, "name")])
+    writer.close()
+    assert [row[1] for row in index.search()] == ["/backups/site.zip", "/home/web.config"]
+    index.close()
+
+
+def test_writer_that_dies_lets_go(tmp_path, monkeypatch):
+    def broken_add(self, host, crawl_id, records):
+        raise ValueError("not a record")
+    monkeypatch.setattr(CrawlIndex, '_add', broken_add)
+    index = CrawlIndex(tmp_path / "index.db", max_queued=1)
+    writer = index.begin("10.10.1.20")
+    writer.add([("/home/web.config", 512, 1700000000.0, "name")])
+    index._thread.join(5)
+    assert not index.writer_alive()
+    # Neither blocks on a queue no one is taking from any more
+    writer.add([("/home/web.config", 512, 1700000000.0, "name")] * 2)
+    writer.add([("/home/web.config", 512, 1700000000.0, "name")] * 2)
+    writer.close()
+    index.close()
+
+
+def test_profiled_writer(tmp_path, monkeypatch):
+    # A profiled thread still runs its target, whether or not Python can profile it
+    profiler = ftp_metrics.Profiler(tmp_path / "crawl.prof")
+    monkeypatch.setattr(ftp_metrics, '_profiler', profiler)
+    index = CrawlIndex(tmp_path / "index.db")
+    writer = index.begin("10.10.1.20")
+    writer.add([("/home/web.config", 512, 1700000000.0, "name")])
+    finished = threading.Thread(target=writer.close, daemon=True)
+    finished.start()
+    finished.join(10)
+    assert not finished.is_alive()
+    index.close()
+    profiler.close(top=5)
+    assert (tmp_path / "crawl.prof").stat().st_size > 0
+
+
+@pytest.fixture(params=[True, False], ids=['fts', 'scan'])
+def index(request, tmp_path, monkeypatch):
+    """ Index of two crawls of HOST_A (the second finding NEW_FILES) and one of HOST_B in between, at times 1000-2000.
+        Searched through the full-text index of names, then again without it.
+    """
+    clock = [1000.0]
+    monkeypatch.setattr(ftp_index, 'time', lambda: clock[0])
+    index = CrawlIndex(tmp_path / "index.db")
+    for (when, host, records) in ((1000.0, HOST_A, FIRST_CRAWL), (1500.0, HOST_B, HOST_B_FILES),
+                                  (2000.0, HOST_A, FIRST_CRAWL + NEW_FILES)):
+        clock[0] = when
+        writer = index.begin(host)
+        writer.add(records)
+        writer.close()
+    if not request.param:
+        if not index.fts:
+            pytest.skip("No full-text index in this SQLite build")
+        index.fts = False
+    yield index
+    index.close()
+
+
+def paths(rows, host=HOST_A):
+    return sorted(row[1] for row in rows if row[0] == host)
+
+
+def test_search_patterns(index):
+    assert len(index.search()) == len(FIRST_CRAWL + NEW_FILES + HOST_B_FILES)
+    # Substring of a name, with a '.' that is just a '.'
+    rows = index.search("web.config")
+    assert paths(rows) == ["/inetpub/wwwroot/web.config"] and paths(rows, HOST_B) == ["/srv/web.config"]
+    # '_' and '%' are plain characters too, not LIKE wildcards
+    assert paths(index.search("web_config")) == ["/data/web_config.bak"]
+    assert paths(index.search("WEB_%")) == []
+    assert paths(index.search("keepass")) == ["/Users/bob/KeePass.kdbx"]
+    assert paths(index.search("*.log")) == ["/logs/app.log", "/logs/new.log", "/logs/old/app.2019.log"]
+    assert paths(index.search("app.????.log")) == ["/logs/old/app.2019.log"]
+    assert paths(index.search("[ds][ib]*")) == ["/backups/db.sql", "/backups/site.tar.gz"]
+    # Paths, anywhere below the root unless anchored, where '*' spans dirs as well
+    assert paths(index.search("logs/old/*")) == ["/logs/old/app.2019.log"]
+    assert paths(index.search("/logs/*")) == ["/logs/app.log", "/logs/new.log", "/logs/old/app.2019.log"]
+    assert paths(index.search("/old/*")) == []
+    assert paths(index.search("wwwroot/*.config")) == ["/inetpub/wwwroot/web.config"]
+
+
+def test_search_filters(index):
+    assert paths(index.search(extensions=["KDBX", ".tar.gz"])) == \
+        ["/Users/bob/KeePass.kdbx", "/backups/2024.tar.gz", "/backups/site.tar.gz"]
+    assert paths(index.search(extensions=["gz"], min_size=6000000)) == ["/backups/2024.tar.gz"]
+    assert paths(index.search(min_size=2000000, max_size=5000000)) == ["/backups/db.sql", "/backups/site.tar.gz"]
+    rows = index.search(hosts=[HOST_B])
+    assert paths(rows, HOST_B) == ["/srv/notes.txt", "/srv/web.config"] and len(rows) == 2
+    assert index.search(hosts=["10.10.1.99"]) == []
+    assert len(index.search("*", limit=3)) == 3
+    assert index.search("web.config", hosts=[HOST_A])[0] == (HOST_A, "/inetpub/wwwroot/web.config", 512, 1.0,
+                                                             "filename")
+
+
+def test_search_new(index):
+    # Only HOST_A has a crawl before its last to compare with
+    rows = index.search(new=True)
+    assert paths(rows) == ["/backups/2024.tar.gz", "/logs/new.log"] and len(rows) == 2
+    assert paths(index.search("*.log", new=True)) == ["/logs/new.log"]
+    assert index.search(new=True, hosts=[HOST_B]) == []
+    # First seen by the crawls started since then
+    rows = index.search(since=1200.0)
+    assert paths(rows) == ["/backups/2024.tar.gz", "/logs/new.log"]
+    assert paths(rows, HOST_B) == ["/srv/notes.txt", "/srv/web.config"]
+    assert paths(index.search(since=1800.0)) == ["/backups/2024.tar.gz", "/logs/new.log"]
+    assert index.search(since=3000.0) == []
+
+
+def test_glob_helpers():
+    assert glob_pattern("Web.Config") == ("*web.config*", False)
+    assert glob_pattern("*.LOG") == ("*.log", False)
+    assert glob_pattern("logs/*.log") == ("*/logs/*.log", True)
+    assert glob_pattern("/logs/*") == ("/logs/*", True)
+    assert glob_ext("*.log") == "log"
+    assert glob_ext("*.tar.gz") == "gz"
+    assert glob_ext("*.log*") is None and glob_ext("*.[lt]og") is None
+    assert longest_literal("*/wwwroot/*.config") == "wwwroot"
+    assert longest_literal("*web_config*") == "config"
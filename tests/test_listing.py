@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ==============================================================================
+# File:         test_listing.py
+# Author:       Cashiuus
+# Created:      17-Oct-2026     -     Revised:
+#
+# Depends:      pyftpdlib, pytest (requirements-dev.txt)
+# Compat:       3.7+
+#
+#-[ Usage ]---------------------------------------------------------------------
+#
+#   list_remote_dir() over a MyFTPSession to a bench_server.py tree.
+#
+#       python3 -m pytest -q tests/test_listing.py
+#
+# ==============================================================================
+import ftplib
+
+import ftputil
+
+from bench_server import SyntheticTree
+from ftp_crawler import MyFTPSession, list_remote_dir
+
+
+def test_mlsd_facts_asked_for_once(ftp_server, monkeypatch):
+    tree = SyntheticTree(shape='profiles', users=2, files=2)
+    port = ftp_server.start(tree)
+    sent = []
+    putcmd = ftplib.FTP.putcmd
+
+    def counting_putcmd(self, line):
+        sent.append(line.split(' ')[0])
+        return putcmd(self, line)
+    monkeypatch.setattr(ftplib.FTP, 'putcmd', counting_putcmd)
+    with ftputil.FTPHost('127.0.0.1', 'anonymous', 'anonymous', port=port, session_factory=MyFTPSession) as ftp_host:
+        assert ftp_host._session.use_mlsd
+        for dirname in ('/', '/Users', '/Users/user001'):
+            (subdirs, files) = tree.listdir(dirname)
+            entries = list_remote_dir(ftp_host, dirname)
+            assert sorted(e.name for e in entries if e.is_dir) == sorted(subdirs)
+            assert sorted(e.name for e in entries if not e.is_dir) == sorted(files)
+            # Every fact list_remote_dir() reads still comes back
+            for e in entries:
+                if not e.is_dir:
+                    assert (e.size, e.mtime) == tree.file_stats(ftp_host.path.join(dirname, e.name))
+    assert sent.count('MLSD') == 3
+    assert sent.count('OPTS') == 1
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ==============================================================================
+# File:         test_match.py
+# Author:       Cashiuus
+# Created:      17-Oct-2026     -     Revised:
+#
+# Depends:      pytest (requirements-dev.txt)
+# Compat:       3.7+
+#
+#-[ Usage ]---------------------------------------------------------------------
+#
+#   FileMatcher and DirFilter against hand-picked names.
+#
+#       python3 -m pytest -q tests/test_match.py
+#
+# ==============================================================================
+from ftp_match import DirFilter, FileMatcher
+
+
+def make_matcher():
+    return FileMatcher(extensions=['.zip', '.tar.gz', '.kdbx'], filenames=['NTUSER.DAT', 'web.config'],
+                       exclude_files=['desktop.zip'], exclude_patterns=['thumbcache_*'],
+                       path_rules=['AppData/Roaming/Microsoft/Protect',
+                                   'AppData/Local/Google/Chrome/User Data/Default/Login Data'])
+
+
+def test_names_without_an_extension_never_match_on_the_one_before():
+    # Once, a name without an extension was matched on whatever extension the previous name had
+    (matches, _) = make_matcher().match_dir('/home', ['site.zip', 'README', 'Makefile', 'db.kdbx', 'LICENSE'])
+    assert matches == [('site.zip', 'extension'), ('db.kdbx', 'extension')]
+
+
+def test_extensions():
+    (matches, _) = make_matcher().match_dir('/home', ['backup.2022.zip', 'src.tar.gz', 'src.gz', 'zip', '.zip',
+                                                      'notes.zip.txt'])
+    # Matched on the real (last, or multi-part) extension, however many dots come before it
+    assert matches == [('backup.2022.zip', 'extension'), ('src.tar.gz', 'extension')]
+
+
+def test_case_insensitive():
+    (matches, downloads) = make_matcher().match_dir('/Users/bob', ['ntuser.dat', 'Web.Config', 'SITE.ZIP',
+                                                                  'Thumbcache_256.zip', 'Desktop.ZIP'])
+    assert matches == [('ntuser.dat', 'filename'), ('Web.Config', 'filename'), ('SITE.ZIP', 'extension')]
+    # Names keep their case, as they're downloaded by them
+    assert downloads == ['ntuser.dat', 'Web.Config']
+
+
+def test_path_rules():
+    matcher = make_matcher()
+    (matches, downloads) = matcher.match_dir('/Users/bob/appdata/roaming/Microsoft/Protect/S-1-5-21', ['Preferred'])
+    assert matches == [('Preferred', 'path')] and downloads == []
+    (matches, _) = matcher.match_dir('/Users/bob/AppData/Local/Google/Chrome/User Data/Default',
+                                     ['Login Data', 'History'])
+    assert matches == [('Login Data', 'path')]
+    (matches, _) = matcher.match_dir('/Users/bob/AppData/Roaming/Microsoft/ProtectNot', ['Preferred'])
+    assert matches == []
+
+
+def test_all_files():
+    (matches, _) = make_matcher().match_dir('/home', ['site.zip', 'README'], all_files=True)
+    assert matches == [('site.zip', 'extension'), ('README', 'all')]
+
+
+def test_dir_filter():
+    dir_filter = DirFilter(['/backups/old', 'AppData/Local/Temp', '*/AppData/Local/Microsoft/*'])
+    assert dir_filter.excluded('/backups/old')
+    assert dir_filter.excluded('/Backups/Old/2019')
+    assert not dir_filter.excluded('/backups/older')
+    assert not dir_filter.excluded('/mirror/backups/old')
+    assert dir_filter.excluded('/Users/bob/AppData/Local/Temp/x')
+    assert dir_filter.excluded('/Users/bob/AppData/Local/Microsoft/Windows/INetCache')
+    assert not dir_filter.excluded('/Users/bob/AppData/Local')
+    assert not DirFilter().excluded('/anything')
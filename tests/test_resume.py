@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ==============================================================================
+# File:         test_resume.py
+# Author:       Cashiuus
+# Created:      17-Oct-2026     -     Revised:
+#
+# Depends:      pyftpdlib, pytest (requirements-dev.txt)
+# Compat:       3.7+
+#
+#-[ Usage ]---------------------------------------------------------------------
+#
+#   A crawl interrupted part way through, then picked back up with --resume,
+#   ending up with the same listing and crawl index as one that ran straight
+#   through.
+#
+#       python3 -m pytest -q tests/test_resume.py
+#
+# ==============================================================================
+import pytest
+
+import ftp_crawler
+from bench_server import SyntheticTree
+from helpers import TREE, crawl, indexed, listed
+
+
+def test_resume_after_interrupt(ftp_server, monkeypatch, tmp_path):
+    port = ftp_server.start(SyntheticTree(**TREE))
+    crawl(monkeypatch, port, tmp_path / "whole")
+    expected = sorted(listed(tmp_path / "whole"))
+
+    write_dir = ftp_crawler.ListingWriter.write_dir
+    written = []
+
+    def interrupting_write_dir(self, dirname, records, is_new=None):
+        # A Ctrl-C part way through, right after a dir was listed
+        records = write_dir(self, dirname, records, is_new=is_new)
+        written.append(dirname)
+        if len(written) == 20:
+            raise KeyboardInterrupt
+        return records
+    monkeypatch.setattr(ftp_crawler.ListingWriter, 'write_dir', interrupting_write_dir)
+    with pytest.raises(KeyboardInterrupt):
+        crawl(monkeypatch, port, tmp_path / "resumed")
+    paths = listed(tmp_path / "resumed")
+    assert 0 < len(paths) < len(expected)
+    # What was listed before the interrupt made it to the index too
+    assert sorted(indexed(tmp_path / "resumed")) == sorted(paths)
+
+    monkeypatch.setattr(ftp_crawler.ListingWriter, 'write_dir', write_dir)
+    crawl(monkeypatch, port, tmp_path / "resumed", '--resume')
+    paths = listed(tmp_path / "resumed")
+    assert sorted(paths) == expected
+    assert sorted(indexed(tmp_path / "resumed")) == expected
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ==============================================================================
+# File:         test_store.py
+# Author:       Cashiuus
+# Created:      17-Oct-2026     -     Revised:
+#
+# Depends:      pyftpdlib, pytest (requirements-dev.txt)
+# Compat:       3.7+
+#
+#-[ Usage ]---------------------------------------------------------------------
+#
+#   DownloadStore on its own, then under crawls of a bench_server.py tree whose
+#   files look alike from their listings, and of a mirror of it.
+#
+#       python3 -m pytest -q tests/test_store.py
+#
+# ==============================================================================
+import os
+import posixpath
+
+from bench_server import SyntheticTree
+from ftp_store import DownloadStore
+from helpers import TREE, check_downloads, crawl, downloaded
+
+
+def download(store, host, remote_path, data, size=None, mtime=1000.0):
+    writer = store.open(host, remote_path, size=size, mtime=mtime)
+    writer.write(data)
+    writer.close()
+    return store.commit(writer)
+
+
+def test_same_contents_stored_once(tmp_path):
+    store = DownloadStore(tmp_path)
+    first = download(store, "10.10.1.20", "/inetpub/wwwroot/web.config", b"<configuration/>")
+    copy = download(store, "10.10.1.21", "/backup/web.config", b"<configuration/>")
+    other = download(store, "10.10.1.20", "/admin/web.config", b"<configuration mode='debug'/>")
+    assert first.read_bytes() == copy.read_bytes() == b"<configuration/>"
+    assert os.path.samefile(first, copy) and not os.path.samefile(first, other)
+    assert (store.stored, store.linked, store.saved_bytes) == (2, 1, 16)
+    assert not any(store.partial_dir.iterdir())
+    store.close()
+
+
+def test_lookup(tmp_path):
+    store = DownloadStore(tmp_path)
+    local_file = download(store, "10.10.1.20", "/etc/shadow", b"root:*:19000::::::", size=18)
+    local_file.unlink()
+    # Linked back into place while its size and mtime match, otherwise it has to be downloaded again
+    assert store.lookup("10.10.1.20", "/etc/shadow", 18, 1000.0) == local_file
+    assert local_file.read_bytes() == b"root:*:19000::::::"
+    assert store.lookup("10.10.1.20", "/etc/shadow", 18, 2000.0) is None
+    assert store.lookup("10.10.1.20", "/etc/shadow", None, 1000.0) is None
+    assert store.lookup("10.10.1.21", "/etc/shadow", 18, 1000.0) is None
+    assert store.lookup("10.10.1.20", "/backup/shadow", 18, 1000.0) is None
+    assert store.skipped == 1
+    store.close()
+    # Nothing lasts but the manifest, so a new run finds it just the same
+    store = DownloadStore(tmp_path)
+    assert store.lookup("10.10.1.20", "/etc/shadow", 18, 1000.0) == local_file
+    store.close()
+
+
+def test_resumed_download(tmp_path):
+    store = DownloadStore(tmp_path)
+    writer = store.open("10.10.1.20", "/backups/db.sql", size=12)
+    writer.write(b"INSERT")
+    writer.close()
+    writer = store.open("10.10.1.20", "/backups/db.sql", size=12, resume=True)
+    assert writer.offset == 6
+    writer.write(b" INTO")
+    writer.close()
+    # Hashed as a whole, as if it had come over in one go
+    resumed = store.commit(writer)
+    assert resumed.read_bytes() == b"INSERT INTO"
+    assert os.path.samefile(resumed, download(store, "10.10.1.21", "/db.sql", b"INSERT INTO"))
+    store.close()
+
+
+def test_local_path(tmp_path):
+    store = DownloadStore(tmp_path)
+    assert store.local_path("10.10.1.20:2121", "/../../etc/./passwd") == tmp_path / "files" / "10.10.1.20_2121" / \
+        "etc" / "passwd"
+    store.close()
+
+
+class SameStatsTree(SyntheticTree):
+    """ Same-named files have the same size and mtime in every dir, but their contents still differ. """
+    def file_stats(self, path):
+        return SyntheticTree.file_stats(self, posixpath.basename(path))
+
+
+def test_store_dedup(ftp_server, monkeypatch, tmp_path):
+    tree = SameStatsTree(**TREE)
+    port = ftp_server.start(tree)
+    crawl(monkeypatch, port, tmp_path)
+    files = downloaded(tmp_path)
+    # e.g. every profile's NTUSER.DAT looks alike from its listing, but each has to be its own download
+    assert len({posixpath.basename(p) for p in files}) < len(files)
+    check_downloads(tree, files)
+    blobs = [p for p in (tmp_path / "store").rglob('*') if p.is_file()]
+    assert len(blobs) == len(files)
+
+    # The same server under another name, a mirror, so every download is a copy of one already stored
+    crawl(monkeypatch, port, tmp_path, target='localhost')
+    mirrored = downloaded(tmp_path, host='localhost')
+    assert sorted(mirrored) == sorted(files)
+    for (remote_path, local_file) in mirrored.items():
+        assert os.path.samefile(local_file, files[remote_path])
+    assert len([p for p in (tmp_path / "store").rglob('*') if p.is_file()]) == len(blobs)
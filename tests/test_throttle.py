@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ==============================================================================
+# File:         test_throttle.py
+# Author:       Cashiuus
+# Created:      17-Oct-2026     -     Revised:
+#
+# Depends:      pytest (requirements-dev.txt)
+# Compat:       3.7+
+#
+#-[ Usage ]---------------------------------------------------------------------
+#
+#   AdaptiveThrottle's token bucket and AIMD rate, on a clock the tests move.
+#
+#       python3 -m pytest -q tests/test_throttle.py
+#
+# ==============================================================================
+import ftplib
+import socket
+
+import ftputil.error
+import pytest
+
+import ftp_throttle
+from ftp_throttle import AdaptiveThrottle, is_overload_error
+
+
+class Clock(object):
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(ftp_throttle, 'monotonic', clock)
+    return clock
+
+
+def test_token_bucket(clock):
+    throttle = AdaptiveThrottle(rate=10)
+    # One request can go straight away, the rest queue up behind it at 'rate'
+    assert [throttle.reserve() for _ in range(4)] == pytest.approx([0, 0.1, 0.2, 0.3])
+    clock.now += 0.4
+    assert throttle.reserve() == pytest.approx(0)
+    # Idle for long enough, and up to a second's worth can go out in a burst, but no more
+    clock.now += 60
+    assert [throttle.reserve() for _ in range(11)] == pytest.approx([0] * 10 + [0.1])
+
+
+def test_unthrottled(clock):
+    for rate in (0, None):
+        throttle = AdaptiveThrottle(rate=rate)
+        assert [throttle.reserve() for _ in range(100)] == [0] * 100
+        throttle.ok(5.0)
+        throttle.backoff()
+        assert throttle.rate == rate and throttle.backoffs == 0
+
+
+def test_rate_climbs_while_fast(clock):
+    throttle = AdaptiveThrottle(rate=10, max_rate=12)
+    for _ in range(3):
+        throttle.ok(0.05)
+    assert throttle.rate == pytest.approx(11.5)
+    for _ in range(10):
+        throttle.ok(0.05)
+    assert throttle.rate == 12
+
+
+def test_slow_response_cuts_rate(clock):
+    throttle = AdaptiveThrottle(rate=10)
+    throttle.ok(0.05)
+    # Much slower than the latency so far
+    throttle.ok(0.5)
+    assert throttle.rate == pytest.approx(10.5 * 0.8)
+    assert throttle.backoffs == 0
+
+
+def test_backoff(clock):
+    throttle = AdaptiveThrottle(rate=8, min_rate=0.5)
+    clock.now += 60
+    assert throttle.reserve() == 0
+    # e.g. a request that took 30 seconds to time out
+    clock.now += 30
+    throttle.backoff()
+    assert throttle.rate == 4 and throttle.backoffs == 1
+    # Banked tokens are gone too, so the next request waits its turn rather than bursting
+    assert throttle.reserve() == pytest.approx(0.25)
+    for _ in range(10):
+        throttle.backoff()
+    assert throttle.rate == 0.5
+
+
+def test_jitter(clock):
+    throttle = AdaptiveThrottle(rate=0, jitter=2.0)
+    waits = [throttle.reserve() for _ in range(100)]
+    assert all(0 <= w <= 2.0 for w in waits) and len(set(waits)) > 1
+
+
+def test_is_overload_error():
+    assert is_overload_error(socket.timeout("timed out"))
+    assert is_overload_error(ftplib.error_temp("421 Too many connections"))
+    assert is_overload_error(ftputil.error.TemporaryError("450 Busy"))
+    assert not is_overload_error(ftplib.error_perm("550 Permission denied"))
+    assert not is_overload_error(ConnectionResetError("Connection reset by peer"))
+    # What ftputil raises, wrapping the ftplib error that caused it
+    try:
+        try:
+            raise ftplib.error_temp("421 Slow down")
+        except ftplib.error_temp as e:
+            raise ftputil.error.FTPOSError("Listing failed") from e
+    except ftputil.error.FTPOSError as e:
+        assert is_overload_error(e)